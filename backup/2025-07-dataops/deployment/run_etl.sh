@@ -5,9 +5,10 @@ echo "=== Starting ETL Pipeline ==="
 echo "Time: $(date)"
 echo "Environment: Production"
 
-# Download data file
-echo "Downloading data from: ${DATA_URL}"
-curl -o /app/data/LoanStats_web.csv "${DATA_URL}"
+# Data file is fetched by main.py (conditional GET, resumable, checksum verified).
+# Keep the file name so .csv.gz / .csv.zst stay compressed.
+INPUT_FILE="/app/data/$(basename "${DATA_URL%%\?*}")"
+echo "Data source: ${DATA_URL}"
 
 # Update database config
 cat > /app/pre-production/config/database.py << EOF
@@ -26,15 +27,71 @@ DB_CONFIG = {
 
 # ตั้งค่าสำหรับการอ่านไฟล์
 FILE_CONFIG = {
-    'input_file': '/app/data/LoanStats_web.csv',
+    'input_file': '${INPUT_FILE}',
     'delimiter': ',',
-    'has_headers': True
+    'has_headers': True,
+    'csv_engine': 'pyarrow',  # 'pyarrow' = Arrow CSV reader แบบ multithreaded, 'c' = C parser เดิม
+    'memory_map': True,       # อ่านไฟล์ input ผ่าน mmap แทน buffered read
+    'parse_workers': 1,       # จำนวน process ที่ parse ไฟล์พร้อมกันแบบแบ่งช่วง (1 = ไม่แบ่ง, ใช้เมื่อรู้ types ก่อนอ่าน)
+    'filter_while_reading': True,  # กรองแถวตามเงื่อนไขของ clean_loan_data ทีละ chunk ระหว่างอ่าน (แถวที่ถูกกรองไม่อยู่ใน DataFrame ทั้งไฟล์)
+    'prune_while_reading': True,   # ลบ columns ที่มี null เกิน max_null_percentage ด้วยจำนวน null ที่นับระหว่าง parse
+    'staging_file': '/app/data/LoanStats_web.parquet'  # None = ไม่ใช้ staging cache (Parquet ของข้อมูลที่อ่านแล้ว)
+}
+
+# ตั้งค่าสำหรับการดาวน์โหลดไฟล์ input
+FETCH_CONFIG = {
+    'source_url': '${DATA_URL}',  # None = ใช้ไฟล์ input ในเครื่อง ไม่ดาวน์โหลด
+    'state_file': '/app/data/fetch_state.json',  # ETag/Last-Modified/checksum ของการดาวน์โหลดครั้งก่อน
+    'expected_sha256': '${DATA_SHA256}' or None,  # None = ไม่ตรวจ checksum กับค่าที่กำหนด
+    'timeout': 60,           # timeout ของการเชื่อมต่อ (วินาที)
+    'connections': 4,        # จำนวนการเชื่อมต่อที่ดาวน์โหลดพร้อมกันแบบแบ่งช่วง (1 = stream เดียว)
+    'parse_while_downloading': False,  # True = parse ไปพร้อมกับดาวน์โหลด (ใช้ stream เดียว ไม่ใช้ connections)
+    'buffer_blocks': 16      # จำนวน block (1 MB) สูงสุดที่รอ parser ระหว่างดาวน์โหลด
+}
+
+# ตั้งค่าสำหรับการคาดเดา data types
+INFERENCE_CONFIG = {
+    'sample_mode': None,     # None = คาดเดาระหว่างอ่านข้อมูล (อ่านไฟล์ครั้งเดียว), 'head' = chunk แรกๆ, 'reservoir' = สุ่มจากทั้งไฟล์
+    'sample_rows': 100000,   # จำนวนแถวของตัวอย่าง
+    'chunksize': 50000,      # จำนวนแถวต่อ chunk ตอนอ่านตัวอย่าง
+    'confidence': 0.95,      # ต่ำกว่านี้จะสแกน column นั้นทั้งไฟล์ใหม่
+    'schema_cache_file': '/app/data/schema_cache.json',  # None = ไม่ใช้ cache
+    'fingerprint_lines': 100  # จำนวนบรรทัดข้อมูลที่ใช้คำนวณ fingerprint
+}
+
+# ตั้งค่าการรัน pipeline
+PIPELINE_CONFIG = {
+    'execution_mode': 'in_memory',  # 'in_memory' หรือ 'streaming' (ประมวลผลและโหลดทีละ chunk)
+    'chunksize': 100000,            # จำนวนแถวต่อ chunk ในแบบ streaming
+    # 'pandas', 'polars' (lazy query plan เดียวตั้งแต่อ่านถึงสร้าง fact แบบ in_memory)
+    # หรือ 'duckdb' (query ไฟล์ CSV/Parquet โดยตรงด้วย SQL ใช้กับไฟล์ที่ใหญ่กว่า RAM ได้)
+    'transform_engine': 'pandas',
+    # settings ของ DuckDB (None = ค่า default) temp_directory คือที่ spill ข้อมูลเมื่อเกิน memory_limit
+    'duckdb_settings': {'memory_limit': None, 'temp_directory': None, 'threads': None}
 }
 
 # ตั้งค่าสำหรับการทำ data cleaning
 CLEANING_CONFIG = {
     'max_null_percentage': 30,  # ลบ column ที่มี null เกิน 30%
-    'acceptable_max_null': 26    # จำนวน null ที่ยอมรับได้ในแต่ละ column
+    'acceptable_max_null': 26,   # จำนวน null ที่ยอมรับได้ในแต่ละ column
+    'inplace': False,            # True = clean_loan_data ไม่สำเนา DataFrame ก่อนทำความสะอาด (ลดหน่วยความจำสูงสุด)
+    # กฎการทำความสะอาด (compile เป็น filter mask เดียว + การแปลงครั้งเดียวต่อ column)
+    # type: filter (drop_values, drop_null, name), fill_null (value), parse_date (format),
+    #       parse_percent (basis_points), cast (dtype)
+    'rules': [
+        {'type': 'filter', 'column': 'application_type', 'drop_values': ['<NA>'], 'drop_null': True,
+         'name': 'application_type_na'},
+        {'type': 'fill_null', 'column': 'emp_length', 'value': 'N/A'},
+        {'type': 'parse_date', 'column': 'issue_d', 'format': '%b-%Y'},
+        {'type': 'parse_percent', 'column': 'int_rate'}
+    ]
+}
+
+# ตั้งค่าการลดขนาด numeric columns ของ fact table ก่อนโหลด (ใช้กับ execution_mode='in_memory')
+DOWNCAST_CONFIG = {
+    'enabled': False,     # True = เปลี่ยน dtype ของ columns ใน SQL (int32/int8/float32) เฉพาะแบบ in_memory
+    'float_decimals': 4,  # float32 ต้องให้ค่าเดิมเมื่อปัดเป็นทศนิยมเท่านี้ ไม่เช่นนั้นคง float64
+    'columns': {}         # dtype ราย column เช่น {'annual_inc': 'float64'} ('auto' = เลือกเอง, None = ไม่แปลง)
 }
 EOF
 
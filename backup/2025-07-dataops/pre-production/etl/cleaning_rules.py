@@ -0,0 +1,236 @@
+"""
+ฟังก์ชันสำหรับ compile กฎการทำความสะอาดข้อมูล
+ไฟล์นี้แปลงกฎที่ประกาศไว้ (เช่นใน CLEANING_CONFIG['rules']) เป็น CleaningPlan
+ที่รวม filter ทุกข้อเป็น mask เดียว (กรองแถวครั้งเดียว) และรวมกฎของ column เดียวกัน
+เป็นการแปลงครั้งเดียวต่อ column เพิ่มกฎใหม่จึงไม่ต้องวนทั้ง DataFrame เพิ่ม
+"""
+
+import pandas as pd
+
+from utils.parsers import to_datetime_cached, parse_percent
+
+
+# ชนิดของกฎและ options ที่ใช้ได้ (options ที่ต้องระบุอยู่ใน REQUIRED_RULE_OPTIONS)
+RULE_OPTIONS = {
+    'filter': ('drop_values', 'drop_null', 'name'),
+    'fill_null': ('value',),
+    'parse_date': ('format',),
+    'parse_percent': ('basis_points',),
+    'cast': ('dtype',)
+}
+
+REQUIRED_RULE_OPTIONS = {
+    'fill_null': ('value',),
+    'cast': ('dtype',)
+}
+
+
+def _filter_predicate(column, drop_values=(), drop_null=False):
+    """
+    สร้าง function ที่คืน mask ของแถวที่เก็บไว้ตามกฎ filter
+
+    Parameters:
+    - column: ชื่อ column ที่ใช้กรอง
+    - drop_values: ค่าที่ต้องการกรองออก (default: ())
+    - drop_null: กรองแถวที่ column เป็น null ออกด้วยหรือไม่ (default: False)
+
+    Returns:
+    - function ที่รับ DataFrame แล้วคืน Series ของ bool (True = เก็บแถวไว้)
+      หรือ None ถ้าไม่มี column นี้
+    """
+    drop_values = list(drop_values)
+
+    def keep(df):
+        if column not in df.columns:
+            return None
+
+        values = df[column]
+        # column แบบ category เทียบเฉพาะ categories แล้วเลือกตาม codes
+        mask = ~values.isin(drop_values) if drop_values else pd.Series(True, index=df.index)
+        if drop_null:
+            mask &= values.notna()
+        return mask.fillna(False).astype(bool)
+
+    return keep
+
+
+def _fill_null_step(value):
+    """สร้างขั้นตอนแทนที่ค่า null ด้วย value"""
+    def step(values):
+        # category ต้องมี value อยู่ใน categories ก่อนจึงจะเติมค่าได้
+        if isinstance(values.dtype, pd.CategoricalDtype) and value not in values.cat.categories:
+            values = values.cat.add_categories(value)
+        return values.fillna(value)
+    return step
+
+
+def _parse_date_step(format=None):
+    """สร้างขั้นตอนแปลงข้อความเป็น datetime (parse เฉพาะค่าที่ไม่ซ้ำกัน)"""
+    def step(values):
+        if pd.api.types.is_datetime64_any_dtype(values):
+            return values
+        return to_datetime_cached(values, format=format)
+    return step
+
+
+def _parse_percent_step(basis_points=False):
+    """สร้างขั้นตอนแปลง percent strings เป็นสัดส่วน (column ที่แปลงระหว่างอ่านแล้วคงไว้)"""
+    def step(values):
+        if pd.api.types.is_numeric_dtype(values):
+            return values
+        return parse_percent(values, basis_points=basis_points)
+    return step
+
+
+def _cast_step(dtype):
+    """สร้างขั้นตอนแปลง dtype"""
+    def step(values):
+        return values.astype(dtype)
+    return step
+
+
+STEP_BUILDERS = {
+    'fill_null': _fill_null_step,
+    'parse_date': _parse_date_step,
+    'parse_percent': _parse_percent_step,
+    'cast': _cast_step
+}
+
+
+class CleaningPlan:
+    """
+    กฎการทำความสะอาดที่ compile แล้ว
+
+    กรองแถวก่อน (mask เดียวจากทุก filter) แล้วแปลง columns ทีละ column
+    ตามลำดับกฎของ column นั้น การแปลงที่มีต้นทุนสูงจึงทำเฉพาะแถวที่เก็บไว้
+    filter ทุกข้อดูค่าก่อนการแปลง
+    """
+
+    def __init__(self, row_filters, column_steps, filter_rules, column_rules):
+        """
+        Parameters:
+        - row_filters: dictionary ของชื่อ filter และ function ที่คืน mask ของแถวที่เก็บไว้
+        - column_steps: dictionary ของ column และ list ของขั้นตอนการแปลง (ตามลำดับ)
+        - filter_rules: list ของกฎ filter ที่ประกาศไว้ (ลำดับเดียวกับ row_filters)
+        - column_rules: dictionary ของ column และ list ของกฎการแปลงที่ประกาศไว้
+          (ให้ engine อื่น compile กฎชุดเดียวกันได้)
+        """
+        self.row_filters = row_filters
+        self.column_steps = column_steps
+        self.filter_rules = filter_rules
+        self.column_rules = column_rules
+
+    def filter_signatures(self):
+        """
+        ข้อความที่ระบุ filter แต่ละข้อ (ใช้แยก cache ตามเงื่อนไขการกรอง)
+
+        Returns:
+        - list ของข้อความ
+        """
+        return [f"{name}:{sorted(rule.items())}"
+                for name, rule in zip(self.row_filters, self.filter_rules)]
+
+    def filter_rows(self, df):
+        """
+        กรองแถวตาม filter ทุกข้อด้วย mask เดียว พร้อมนับจำนวนแถวที่ถูกกรองของแต่ละ filter
+
+        Parameters:
+        - df: DataFrame ของข้อมูล loan (ทั้งไฟล์หรือ chunk เดียว)
+
+        Returns:
+        - tuple: (DataFrame ที่กรองแล้ว, report)
+          report มี rows (จำนวนแถวก่อนกรอง), dropped (filter: จำนวนแถว)
+          และ dropped_nulls (column: จำนวน null ในแถวที่ถูกกรอง) สำหรับคำนวณเปอร์เซ็นต์ null ของทั้งไฟล์
+        """
+        keep = pd.Series(True, index=df.index)
+        dropped = {}
+
+        for name, predicate in self.row_filters.items():
+            mask = predicate(df)
+            if mask is None:
+                continue
+            # นับเฉพาะแถวที่ filter นี้กรองเพิ่มจาก filter ก่อนหน้า
+            dropped[name] = int((keep & ~mask).sum())
+            keep &= mask
+
+        report = {'rows': len(df), 'dropped': dropped, 'dropped_nulls': {}}
+        if keep.all():
+            return (df, report)
+
+        report['dropped_nulls'] = {col: int(count) for col, count in df[~keep].isnull().sum().items()}
+        # df[keep] สำเนาข้อมูลแล้ว แต่ pandas < 3 จำไว้ว่าเป็น slice ของ df และเตือน SettingWithCopyWarning
+        # เมื่อ convert_columns แทนที่ columns จึงคืน shallow copy ที่ไม่มี flag นี้ (ไม่สำเนาข้อมูลซ้ำ)
+        return (df[keep].copy(deep=False), report)
+
+    def convert_columns(self, df):
+        """
+        แปลง columns ตามกฎ (แก้ไข df เดิม แทนที่ทีละ column ไม่เขียนทับข้อมูลเดิม)
+
+        Parameters:
+        - df: DataFrame ที่กรองแถวแล้ว
+
+        Returns:
+        - DataFrame เดิมที่แปลง columns แล้ว (columns ที่ไม่มีใน df ข้ามไป)
+        """
+        for column, steps in self.column_steps.items():
+            if column not in df.columns:
+                continue
+            values = df[column]
+            for step in steps:
+                values = step(values)
+            df[column] = values
+        return df
+
+
+def compile_cleaning_rules(rules):
+    """
+    compile กฎการทำความสะอาดเป็น CleaningPlan
+
+    กฎแต่ละข้อเป็น dictionary ที่มี type และ column เช่น
+    {'type': 'filter', 'column': 'application_type', 'drop_values': ['<NA>'], 'drop_null': True}
+    {'type': 'fill_null', 'column': 'emp_length', 'value': 'N/A'}
+    {'type': 'parse_date', 'column': 'issue_d', 'format': '%b-%Y'}
+    {'type': 'parse_percent', 'column': 'int_rate'}
+    {'type': 'cast', 'column': 'loan_amnt', 'dtype': 'float64'}
+
+    Parameters:
+    - rules: list ของกฎ (filter ใช้ name เป็นชื่อใน report ได้ ค่าเริ่มต้นคือ '<column>_filter')
+
+    Returns:
+    - CleaningPlan
+
+    Raises:
+    - ValueError: ถ้ามีกฎที่ไม่รู้จัก ขาด option ที่ต้องระบุ หรือมี option ที่ไม่รู้จัก
+    """
+    row_filters = {}
+    filter_rules = []
+    column_steps = {}
+    column_rules = {}
+
+    for rule in rules:
+        rule_type = rule.get('type')
+        if rule_type not in RULE_OPTIONS:
+            raise ValueError(f"ไม่รู้จักกฎการทำความสะอาด: {rule_type}")
+        if 'column' not in rule:
+            raise ValueError(f"กฎ {rule_type} ต้องระบุ column")
+
+        options = {key: value for key, value in rule.items() if key not in ('type', 'column')}
+        unknown = set(options) - set(RULE_OPTIONS[rule_type])
+        if unknown:
+            raise ValueError(f"กฎ {rule_type} ไม่มี option: {', '.join(sorted(unknown))}")
+        missing = set(REQUIRED_RULE_OPTIONS.get(rule_type, ())) - set(options)
+        if missing:
+            raise ValueError(f"กฎ {rule_type} ต้องระบุ: {', '.join(sorted(missing))}")
+
+        column = rule['column']
+        if rule_type == 'filter':
+            name = options.pop('name', f'{column}_filter')
+            if name in row_filters:
+                raise ValueError(f"ชื่อ filter ซ้ำ: {name}")
+            row_filters[name] = _filter_predicate(column, **options)
+            filter_rules.append(rule)
+        else:
+            column_steps.setdefault(column, []).append(STEP_BUILDERS[rule_type](**options))
+            column_rules.setdefault(column, []).append(rule)
+
+    return CleaningPlan(row_filters, column_steps, filter_rules, column_rules)
@@ -5,58 +5,128 @@
 
 import pandas as pd
 
+from etl.cleaning_rules import compile_cleaning_rules
+from utils.ingest import null_percentages
 
-def remove_high_null_columns(df, max_null_percentage=30):
+
+# columns ที่ pipeline ใช้จริง (ส่งต่อเป็น usecols ให้การอ่านไฟล์ได้)
+ANALYSIS_COLUMNS = [
+    'application_type', 'annual_inc', 'annual_inc_joint', 
+    'dti', 'dti_joint', 'emp_length', 'issue_d', 'int_rate',
+    'home_ownership', 'loan_status', 'loan_amnt', 
+    'funded_amnt', 'installment'
+]
+
+
+def remove_high_null_columns(df, max_null_percentage=30, filter_report=None, null_profile=None):
     """
     ลบ columns ที่มี null values เกินเปอร์เซ็นต์ที่กำหนด
     
     Parameters:
     - df: DataFrame
     - max_null_percentage: เปอร์เซ็นต์ null สูงสุดที่ยอมรับได้
+    - filter_report: report จาก filter_rows ถ้า df ถูกกรองแถวระหว่างอ่านแล้ว
+      เปอร์เซ็นต์ null จะนับรวมแถวที่ถูกกรองด้วย เหมือนไม่ได้กรองก่อน (default: None)
+    - null_profile: null profile ที่นับไว้ระหว่าง parse (df.attrs['null_profile'] จาก read_typed_csv)
+      ใช้แทนการนับ null จาก df ใหม่ทั้งหมด columns ที่ไม่มีใน profile นับจาก df (default: None)
     
     Returns:
     - DataFrame ที่ลบ columns แล้ว
     """
-    missing_percentage = df.isnull().mean() * 100
-    columns_to_keep = missing_percentage[missing_percentage <= max_null_percentage].index.tolist()
+    if null_profile is not None:
+        missing_percentage = null_percentages(null_profile).reindex(df.columns)
+        unprofiled = missing_percentage.index[missing_percentage.isnull()].tolist()
+        if unprofiled:
+            missing_percentage = missing_percentage.fillna(df[unprofiled].isnull().mean() * 100)
+    elif filter_report is None:
+        missing_percentage = df.isnull().mean() * 100
+    else:
+        dropped_nulls = pd.Series(filter_report['dropped_nulls'], dtype='int64')
+        null_counts = df.isnull().sum().add(dropped_nulls, fill_value=0).reindex(df.columns)
+        missing_percentage = null_counts / max(filter_report['rows'], 1) * 100
+    columns_to_keep = columns_within_null_limit(missing_percentage, max_null_percentage)
     return df[columns_to_keep]
 
 
-def clean_loan_data(df):
+def columns_within_null_limit(missing_percentage, max_null_percentage=30):
+    """
+    เลือก columns ที่มีเปอร์เซ็นต์ null ไม่เกินที่กำหนด
+    
+    Parameters:
+    - missing_percentage: Series ของเปอร์เซ็นต์ null แยกตาม column
+    - max_null_percentage: เปอร์เซ็นต์ null สูงสุดที่ยอมรับได้
+    
+    Returns:
+    - list ของ columns ที่เก็บไว้
+    """
+    return missing_percentage[missing_percentage <= max_null_percentage].index.tolist()
+
+
+# กฎการทำความสะอาดข้อมูล loan (รูปแบบเดียวกับ CLEANING_CONFIG['rules'])
+LOAN_CLEANING_RULES = [
+    # กรองแถวที่ application_type เป็น '<NA>' หรือ null ออก
+    {'type': 'filter', 'column': 'application_type', 'drop_values': ['<NA>'], 'drop_null': True,
+     'name': 'application_type_na'},
+    # แทนที่ค่า null ใน emp_length ด้วย 'N/A'
+    {'type': 'fill_null', 'column': 'emp_length', 'value': 'N/A'},
+    # แปลง issue_d เป็น datetime โดย parse เฉพาะเดือนที่ไม่ซ้ำกัน
+    {'type': 'parse_date', 'column': 'issue_d', 'format': '%b-%Y'},
+    # แปลง int_rate จาก string เป็น float (ถอด % ออก)
+    {'type': 'parse_percent', 'column': 'int_rate'}
+]
+
+LOAN_CLEANING_PLAN = compile_cleaning_rules(LOAN_CLEANING_RULES)
+
+
+def filter_rows(df, plan=None):
+    """
+    กรองแถวตาม filter ของ plan พร้อมนับจำนวนแถวที่ถูกกรองของแต่ละ filter
+
+    Parameters:
+    - df: DataFrame ของข้อมูล loan (ทั้งไฟล์หรือ chunk เดียว)
+    - plan: CleaningPlan จาก compile_cleaning_rules หรือ None ใช้ LOAN_CLEANING_PLAN (default: None)
+
+    Returns:
+    - tuple: (DataFrame ที่กรองแล้ว, report) ตาม CleaningPlan.filter_rows
+    """
+    return (plan or LOAN_CLEANING_PLAN).filter_rows(df)
+
+
+def clean_loan_data(df, inplace=False, plan=None):
     """
     ทำความสะอาดข้อมูล loan โดยเฉพาะ
     
     Parameters:
     - df: DataFrame ของข้อมูล loan
+    - inplace: ไม่สำเนา df ก่อนทำความสะอาด (default: False)
+      กรองแถวก่อนแล้วแทนที่ columns ที่แปลงแล้วทีละ column (ไม่เขียนทับข้อมูลเดิม
+      จึงใช้ได้ทั้งเมื่อเปิดและไม่เปิด copy-on-write) หน่วยความจำสูงสุดจึงเหลือประมาณ df + ผลลัพธ์
+      ถ้าไม่มีแถวถูกกรอง columns ของ df จะถูกแทนที่ด้วย ใช้เมื่อไม่ต้องใช้ df เดิมต่อ
+    - plan: CleaningPlan จาก compile_cleaning_rules (เช่นจาก CLEANING_CONFIG['rules'])
+      หรือ None ใช้ LOAN_CLEANING_PLAN (default: None)
     
     Returns:
     - DataFrame ที่ clean แล้ว
     """
-    # สำเนา DataFrame เพื่อไม่ให้กระทบต้นฉบับ
-    df_clean = df.copy()
+    plan = plan or LOAN_CLEANING_PLAN
+    
+    if inplace:
+        # กรองแถวก่อน สำเนาเดียวที่เกิดขึ้นคือแถวที่เก็บไว้ (ไม่มีแถวถูกกรองก็ไม่สำเนา)
+        df_clean, _ = plan.filter_rows(df)
+    else:
+        # สำเนา DataFrame เพื่อไม่ให้กระทบต้นฉบับ
+        df_clean = df.copy()
     
     # ตรวจสอบว่า DataFrame ว่างหรือไม่
     if df_clean.empty:
         return df_clean
     
-    # แทนที่ค่า null ใน emp_length ด้วย 'N/A' (ถ้า column นี้มีอยู่)
-    if 'emp_length' in df_clean.columns:
-        df_clean['emp_length'] = df_clean['emp_length'].fillna('N/A')
-    
-    # กรองแถวที่ application_type เป็น '<NA>' ออก (ถ้า column นี้มีอยู่)
-    if 'application_type' in df_clean.columns:
-        df_clean = df_clean[df_clean['application_type'] != '<NA>']
+    # กรองแถวด้วย mask เดียวก่อนการแปลงที่มีต้นทุนสูง
+    if not inplace:
+        df_clean, _ = plan.filter_rows(df_clean)
     
-    # แปลง issue_d เป็น datetime (ถ้า column นี้มีอยู่)
-    if 'issue_d' in df_clean.columns:
-        df_clean['issue_d'] = pd.to_datetime(df_clean['issue_d'], format='%b-%Y')
-    
-    # แปลง int_rate จาก string เป็น float (ถอด % ออก) (ถ้า column นี้มีอยู่)
-    if 'int_rate' in df_clean.columns:
-        if df_clean['int_rate'].dtype == 'object' or df_clean['int_rate'].dtype == 'string':
-            df_clean['int_rate'] = df_clean['int_rate'].str.rstrip('%').astype('float') / 100.0
-    
-    return df_clean
+    # แปลงแต่ละ column ครั้งเดียวตามกฎของ column นั้น (column ที่ไม่มีอยู่ข้ามไป)
+    return plan.convert_columns(df_clean)
 
 
 def select_columns_for_analysis(df):
@@ -69,14 +139,7 @@ def select_columns_for_analysis(df):
     Returns:
     - DataFrame ที่มีเฉพาะ columns ที่ต้องการ
     """
-    columns_needed = [
-        'application_type', 'annual_inc', 'annual_inc_joint', 
-        'dti', 'dti_joint', 'emp_length', 'issue_d', 'int_rate',
-        'home_ownership', 'loan_status', 'loan_amnt', 
-        'funded_amnt', 'installment'
-    ]
-    
     # ตรวจสอบว่า columns ที่ต้องการมีอยู่ใน DataFrame
-    available_columns = [col for col in columns_needed if col in df.columns]
+    available_columns = [col for col in ANALYSIS_COLUMNS if col in df.columns]
     
     return df[available_columns]
@@ -8,6 +8,17 @@ import urllib
 import pandas as pd
 
 
+# ชื่อตารางในฐานข้อมูลของแต่ละ dimension และ fact table
+DIMENSION_TABLE_NAMES = {
+    'home_ownership': 'home_ownership_dim',
+    'loan_status': 'loan_status_dim',
+    'issue_d': 'issue_d_dim',
+    'application_type': 'application_type_dim',
+    'emp_length': 'emp_length_dim'
+}
+FACT_TABLE_NAME = 'loans_fact'
+
+
 def create_db_engine(config):
     """
     สร้าง database engine สำหรับเชื่อมต่อ SQL Server
@@ -62,7 +73,7 @@ def load_dimension_to_db(dimension_df, table_name, engine):
         return False
 
 
-def load_fact_to_db(fact_df, table_name, engine):
+def load_fact_to_db(fact_df, table_name, engine, if_exists='replace'):
     """
     โหลด fact table เข้าฐานข้อมูล
     
@@ -70,6 +81,7 @@ def load_fact_to_db(fact_df, table_name, engine):
     - fact_df: DataFrame ของ fact table
     - table_name: ชื่อตารางในฐานข้อมูล
     - engine: SQLAlchemy engine
+    - if_exists: 'replace' สร้างตารางใหม่ หรือ 'append' ต่อท้าย (default: 'replace')
     
     Returns:
     - bool: สำเร็จหรือไม่
@@ -79,7 +91,7 @@ def load_fact_to_db(fact_df, table_name, engine):
         fact_df.to_sql(
             table_name,
             con=engine,
-            if_exists='replace',
+            if_exists=if_exists,
             index=False
         )
         print(f"✓ โหลด {table_name} สำเร็จ ({len(fact_df)} แถว)")
@@ -90,6 +102,29 @@ def load_fact_to_db(fact_df, table_name, engine):
         return False
 
 
+def load_dimensions_to_db(dimensions, engine):
+    """
+    โหลด dimension tables ทั้งหมดเข้าฐานข้อมูล
+    
+    Parameters:
+    - dimensions: dictionary ของ dimension tables
+    - engine: SQLAlchemy engine
+    
+    Returns:
+    - tuple: (จำนวนที่โหลดสำเร็จ, จำนวนทั้งหมด)
+    """
+    success_count = 0
+    total_count = 0
+    
+    for dim_name, dim_df in dimensions.items():
+        table_name = DIMENSION_TABLE_NAMES.get(dim_name, f"{dim_name}_dim")
+        total_count += 1
+        if load_dimension_to_db(dim_df, table_name, engine):
+            success_count += 1
+    
+    return success_count, total_count
+
+
 def load_all_to_database(dimensions, fact_table, db_config):
     """
     โหลดทั้ง dimensions และ fact table เข้าฐานข้อมูล
@@ -105,29 +140,14 @@ def load_all_to_database(dimensions, fact_table, db_config):
     # สร้าง engine
     engine = create_db_engine(db_config)
     
-    success_count = 0
-    total_count = 0
-    
     # โหลด dimensions
-    dimension_table_names = {
-        'home_ownership': 'home_ownership_dim',
-        'loan_status': 'loan_status_dim',
-        'issue_d': 'issue_d_dim',
-        'application_type': 'application_type_dim',
-        'emp_length': 'emp_length_dim'
-    }
-    
     print("กำลังโหลด Dimension Tables...")
-    for dim_name, dim_df in dimensions.items():
-        table_name = dimension_table_names.get(dim_name, f"{dim_name}_dim")
-        total_count += 1
-        if load_dimension_to_db(dim_df, table_name, engine):
-            success_count += 1
+    success_count, total_count = load_dimensions_to_db(dimensions, engine)
     
     # โหลด fact table
     print("\nกำลังโหลด Fact Table...")
     total_count += 1
-    if load_fact_to_db(fact_table, 'loans_fact', engine):
+    if load_fact_to_db(fact_table, FACT_TABLE_NAME, engine):
         success_count += 1
     
     print(f"\nสรุป: โหลดสำเร็จ {success_count}/{total_count} ตาราง")
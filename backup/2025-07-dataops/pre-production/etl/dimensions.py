@@ -6,20 +6,56 @@
 import pandas as pd
 
 
-def create_dimension_table(df, column_name, dim_name):
+# dimension ทั่วไป (ชื่อ dimension เดียวกับชื่อ column) และ date dimension
+DIMENSION_COLUMNS = ['home_ownership', 'loan_status', 'application_type', 'emp_length']
+DATE_DIMENSION_COLUMNS = ['issue_d']
+
+# หน่วยของ datetime ที่ pd.to_datetime ได้จากข้อความเดือน-ปี (ns ก่อน pandas 3.0, us ตั้งแต่ 3.0)
+# Polars และ DuckDB ได้ us เสมอ จึงต้องแปลงให้ตรงกับ pipeline ของ pandas
+PARSED_DATETIME_DTYPE = 'datetime64[us]' if int(pd.__version__.split('.')[0]) >= 3 else 'datetime64[ns]'
+
+
+def factorize_dimension(column):
     """
-    สร้าง dimension table จาก column ที่ระบุ
+    แยก column เป็นค่าที่ไม่ซ้ำกันและ ID ของแต่ละแถวใน hash pass เดียว
+    
+    ค่าเรียงตามลำดับที่พบครั้งแรก (null เป็นค่าหนึ่งด้วย) ID คือตำแหน่งของค่านั้น
+    column แบบ category ใช้ integer codes แทนการ hash ข้อความ
     
     Parameters:
-    - df: DataFrame ต้นฉบับ
-    - column_name: ชื่อ column ที่จะใช้สร้าง dimension
+    - column: Series ของค่า dimension
+    
+    Returns:
+    - tuple: (Series ของค่าที่ไม่ซ้ำกัน, numpy array ของ IDs ตามลำดับแถว)
+    """
+    if isinstance(column.dtype, pd.CategoricalDtype):
+        # code -1 (null) เป็นค่าหนึ่งเหมือนค่าอื่น แล้วแปลง codes ที่พบกลับเป็นค่าเดิม
+        ids, codes = pd.factorize(column.cat.codes.to_numpy())
+        values = pd.Series(pd.Categorical.from_codes(codes, dtype=column.dtype))
+        return (values.astype(column.cat.categories.dtype), ids)
+    
+    ids, uniques = pd.factorize(column, use_na_sentinel=False)
+    return (pd.Series(uniques), ids)
+
+
+def dimension_from_values(values, column_name, dim_name, date=False):
+    """
+    สร้าง dimension table จากค่าที่ไม่ซ้ำกัน (ID คือตำแหน่งของค่า)
+    
+    Parameters:
+    - values: Series ของค่าที่ไม่ซ้ำกัน จาก factorize_dimension
+    - column_name: ชื่อ column ของค่า
     - dim_name: ชื่อของ dimension (ใช้สร้างชื่อ ID column)
+    - date: เพิ่ม month และ year หรือไม่ (default: False)
     
     Returns:
     - DataFrame ของ dimension table
     """
-    # สร้าง dimension table จาก unique values
-    dim_df = df[[column_name]].drop_duplicates().reset_index(drop=True)
+    dim_df = pd.DataFrame({column_name: values.reset_index(drop=True)})
+    
+    if date:
+        dim_df['month'] = dim_df[column_name].dt.month
+        dim_df['year'] = dim_df[column_name].dt.year
     
     # เพิ่ม ID column
     dim_df[f'{dim_name}_id'] = dim_df.index
@@ -27,6 +63,22 @@ def create_dimension_table(df, column_name, dim_name):
     return dim_df
 
 
+def create_dimension_table(df, column_name, dim_name):
+    """
+    สร้าง dimension table จาก column ที่ระบุ
+    
+    Parameters:
+    - df: DataFrame ต้นฉบับ
+    - column_name: ชื่อ column ที่จะใช้สร้าง dimension
+    - dim_name: ชื่อของ dimension (ใช้สร้างชื่อ ID column)
+    
+    Returns:
+    - DataFrame ของ dimension table
+    """
+    values, _ = factorize_dimension(df[column_name])
+    return dimension_from_values(values, column_name, dim_name)
+
+
 def create_date_dimension(df, date_column):
     """
     สร้าง date dimension table พร้อม month และ year
@@ -38,17 +90,8 @@ def create_date_dimension(df, date_column):
     Returns:
     - DataFrame ของ date dimension
     """
-    # สร้าง dimension table จาก unique dates
-    date_dim = df[[date_column]].drop_duplicates().reset_index(drop=True)
-    
-    # เพิ่ม month และ year
-    date_dim['month'] = date_dim[date_column].dt.month
-    date_dim['year'] = date_dim[date_column].dt.year
-    
-    # เพิ่ม ID column
-    date_dim[f'{date_column}_id'] = date_dim.index
-    
-    return date_dim
+    values, _ = factorize_dimension(df[date_column])
+    return dimension_from_values(values, date_column, date_column, date=True)
 
 
 def create_all_dimensions(df):
@@ -64,17 +107,60 @@ def create_all_dimensions(df):
     dimensions = {}
     
     # สร้าง dimension tables ทั่วไป
-    dimensions['home_ownership'] = create_dimension_table(df, 'home_ownership', 'home_ownership')
-    dimensions['loan_status'] = create_dimension_table(df, 'loan_status', 'loan_status')
-    dimensions['application_type'] = create_dimension_table(df, 'application_type', 'application_type')
-    dimensions['emp_length'] = create_dimension_table(df, 'emp_length', 'emp_length')
+    for column_name in DIMENSION_COLUMNS:
+        dimensions[column_name] = create_dimension_table(df, column_name, column_name)
     
     # สร้าง date dimension
-    dimensions['issue_d'] = create_date_dimension(df, 'issue_d')
+    for date_column in DATE_DIMENSION_COLUMNS:
+        dimensions[date_column] = create_date_dimension(df, date_column)
     
     return dimensions
 
 
+def match_dimension_dtypes(dim_df, column_name, column_type):
+    """
+    แปลง dtype ของ dimension table ที่สร้างนอก pandas (เช่น Polars หรือ DuckDB)
+    ให้ตรงกับ create_dimension_table
+    
+    Parameters:
+    - dim_df: DataFrame ของ dimension table
+    - column_name: ชื่อ column ของ dimension
+    - column_type: type ของ column จาก correct_column_types
+    
+    Returns:
+    - DataFrame เดิมที่แปลง dtype แล้ว
+    """
+    values = dim_df[column_name]
+    if column_type == 'string':
+        dim_df[column_name] = values.astype('string')
+    elif column_type == 'category':
+        # create_dimension_table สร้างจาก categories จึงได้ dtype ของ categories
+        dim_df[column_name] = values.astype(pd.Index(values.dropna().tolist()).dtype)
+    return dim_df
+
+
+def match_date_dimension_dtypes(date_dim, date_column):
+    """
+    แปลง dtype ของ date dimension ที่สร้างนอก pandas ให้ตรงกับ create_date_dimension
+    (dtype เป้าหมายได้จาก create_date_dimension ของ column ว่างที่มีหน่วย PARSED_DATETIME_DTYPE)
+    
+    Parameters:
+    - date_dim: DataFrame ของ date dimension
+    - date_column: ชื่อ column ที่เป็น date
+    
+    Returns:
+    - DataFrame เดิมที่แปลง dtype แล้ว
+    """
+    empty = pd.DataFrame({date_column: pd.Series(dtype=PARSED_DATETIME_DTYPE)})
+    target = create_date_dimension(empty, date_column).dtypes
+    date_dim[date_column] = date_dim[date_column].astype(target[date_column])
+    for field in ('month', 'year'):
+        # month/year ที่มี null เป็น float64 เหมือน .dt.month ของ pandas
+        if date_dim[field].notna().all():
+            date_dim[field] = date_dim[field].astype(target[field])
+    return date_dim
+
+
 def create_dimension_mappings(dimensions):
     """
     สร้าง mapping dictionaries สำหรับใช้ใน fact table
@@ -0,0 +1,308 @@
+"""
+ฟังก์ชันสำหรับสร้าง star schema ด้วย DuckDB (PIPELINE_CONFIG['transform_engine'] = 'duckdb')
+ไฟล์นี้อ่านไฟล์ CSV หรือ Parquet ครั้งเดียวเข้า DuckDB แบบ in-process
+การทำความสะอาด การหาค่าของ dimensions การกำหนด surrogate keys และการ join fact table
+เป็น SQL ทั้งหมด (vectorized และ spill ลง disk เมื่อเกิน memory_limit จึงใช้กับไฟล์ที่ใหญ่กว่า RAM ได้)
+แล้วคืน dimensions และ fact table เป็น pandas DataFrames แบบเดียวกับ pipeline ของ pandas
+"""
+
+try:
+    import duckdb
+except ImportError:
+    # duckdb เป็น dependency เสริม ใช้เฉพาะเมื่อเลือก engine นี้
+    duckdb = None
+
+from etl.data_cleaning import LOAN_CLEANING_PLAN, columns_within_null_limit
+from etl.dimensions import (DIMENSION_COLUMNS, DATE_DIMENSION_COLUMNS, match_dimension_dtypes,
+                            match_date_dimension_dtypes)
+from etl.fact_table import FACT_COLUMNS
+from utils.csv_reader import PANDAS_NA_VALUES
+from utils.ingest import null_percentages
+
+
+# type ของ SQL สำหรับอ่าน column ตาม column types (types อื่นอ่านเป็นข้อความ)
+READ_SQL_TYPES = {'float64': 'DOUBLE', 'int64': 'BIGINT', 'datetime64': 'TIMESTAMP'}
+
+# type ของ SQL สำหรับกฎ cast
+CAST_SQL_TYPES = {
+    'float64': 'DOUBLE', 'float32': 'FLOAT',
+    'int64': 'BIGINT', 'int32': 'INTEGER',
+    'string': 'VARCHAR', 'category': 'VARCHAR'
+}
+
+# รูปแบบของ percent string ที่ parse_percent รับได้ (หลังตัดเว้นวรรคและ %)
+PERCENT_PATTERN = r'[+-]?(\d+\.?\d*|\.\d+)'
+
+# จำนวนหลักสูงสุดของ percent string (เท่ากับ utils.parsers)
+PERCENT_MAX_DIGITS = 15
+
+
+def _identifier(name):
+    """ชื่อ column ใน SQL"""
+    return '"' + str(name).replace('"', '""') + '"'
+
+
+def _literal(value):
+    """ค่าคงที่ใน SQL"""
+    if isinstance(value, bool):
+        return 'TRUE' if value else 'FALSE'
+    if isinstance(value, (int, float)):
+        return repr(value)
+    return "'" + str(value).replace("'", "''") + "'"
+
+
+def _reader_sql(file_path, delimiter):
+    """table function ที่อ่านไฟล์ input (Parquet หรือ CSV/CSV บีบอัด ทุก column เป็นข้อความ)"""
+    if str(file_path).endswith('.parquet'):
+        return f"read_parquet({_literal(str(file_path))})"
+    null_values = ', '.join(_literal(value) for value in PANDAS_NA_VALUES)
+    return (f"read_csv({_literal(str(file_path))}, delim={_literal(delimiter)}, header=true, "
+            f"all_varchar=true, nullstr=[{null_values}])")
+
+
+def _parse_percent_sql(expr):
+    """
+    แปลง percent string เป็นสัดส่วนแบบเดียวกับ utils.parsers.parse_percent
+
+    หาร mantissa ด้วย 10**scale ครั้งเดียว จึงได้ค่า float เดียวกันทุก bit
+    ค่าที่แปลงไม่ได้ทำให้ query error
+    """
+    text = f"trim(regexp_replace(trim({expr}), '%$', ''))"
+    number = f"regexp_replace({text}, '^[+-]', '')"
+    fraction = f"split_part({number}, '.', 2)"
+    mantissa = f"CAST(replace({number}, '.', '') AS BIGINT)"
+    value = f"CAST({mantissa} AS DOUBLE) / power(10.0, length({fraction}) + 2)"
+    invalid = (f"NOT regexp_full_match({text}, {_literal(PERCENT_PATTERN)}) "
+               f"OR length(regexp_replace({text}, '[^0-9]', '', 'g')) > {PERCENT_MAX_DIGITS}")
+    return (f"CASE WHEN {expr} IS NULL THEN NULL "
+            f"WHEN {invalid} THEN error('แปลงเป็นเปอร์เซ็นต์ไม่ได้: ' || {expr}) "
+            f"WHEN starts_with({text}, '-') THEN -({value}) ELSE {value} END")
+
+
+def _read_sql(column, column_type, source_type):
+    """
+    expression ที่แปลง column ตาม column types ระหว่างอ่าน (เหมือน read_typed_csv)
+
+    Parameters:
+    - column: ชื่อ column
+    - column_type: type ของ column จาก correct_column_types
+    - source_type: type ของ column ในไฟล์ (Parquet มี types อยู่แล้ว)
+
+    Returns:
+    - expression ของ SQL
+    """
+    expr = _identifier(column)
+    if source_type != 'VARCHAR':
+        return expr
+    if column_type == 'percent':
+        return _parse_percent_sql(expr)
+    if column_type in READ_SQL_TYPES:
+        return f"CAST({expr} AS {READ_SQL_TYPES[column_type]})"
+    return expr
+
+
+def _filter_sql(rule):
+    """expression ของแถวที่เก็บไว้ตามกฎ filter (ดูค่าก่อนการแปลง)"""
+    column = _identifier(rule['column'])
+    keep = 'TRUE'
+    if rule.get('drop_values'):
+        values = ', '.join(_literal(value) for value in rule['drop_values'])
+        keep = f"coalesce({column} NOT IN ({values}), TRUE)"
+    if rule.get('drop_null'):
+        keep = f"{keep} AND {column} IS NOT NULL"
+    return f"({keep})"
+
+
+def _column_sql(column, rules, source_type):
+    """
+    รวมกฎการแปลงของ column หนึ่งเป็น expression เดียว
+
+    Parameters:
+    - column: ชื่อ column
+    - rules: list ของกฎการแปลงของ column นี้ (ตามลำดับที่ประกาศ)
+    - source_type: type ของ column หลังอ่าน
+
+    Returns:
+    - expression ของ SQL
+    """
+    expr = _identifier(column)
+    numeric = source_type in ('DOUBLE', 'FLOAT', 'BIGINT', 'INTEGER', 'SMALLINT', 'TINYINT')
+    parsed_date = source_type.startswith('TIMESTAMP') or source_type == 'DATE'
+
+    for rule in rules:
+        rule_type = rule['type']
+        if rule_type == 'fill_null':
+            expr = f"coalesce({expr}, {_literal(rule['value'])})"
+        elif rule_type == 'parse_date' and not parsed_date:
+            if rule.get('format'):
+                expr = f"strptime({expr}, {_literal(rule['format'])})"
+            else:
+                expr = f"CAST({expr} AS TIMESTAMP)"
+            parsed_date = True
+        elif rule_type == 'parse_percent' and not numeric:
+            if rule.get('basis_points'):
+                raise ValueError("DuckDB engine ไม่รองรับ parse_percent แบบ basis_points")
+            expr = _parse_percent_sql(expr)
+            numeric = True
+        elif rule_type == 'cast':
+            if rule['dtype'] not in CAST_SQL_TYPES:
+                raise ValueError(f"DuckDB engine ไม่รองรับการ cast เป็น {rule['dtype']}")
+            expr = f"CAST({expr} AS {CAST_SQL_TYPES[rule['dtype']]})"
+            numeric = rule['dtype'] not in ('string', 'category')
+
+    return expr
+
+
+def _fact_to_pandas(fact_table):
+    """
+    แปลง integer columns ที่ DuckDB คืนเป็น Int64 ให้ตรงกับ pandas
+    (pd.read_csv ได้ int64 ถ้าไม่มี null และ float64 ถ้ามี null)
+    """
+    for column in fact_table.columns:
+        if fact_table[column].dtype == 'Int64':
+            has_nulls = fact_table[column].isna().any()
+            fact_table[column] = fact_table[column].astype('float64' if has_nulls else 'int64')
+    return fact_table
+
+
+def build_star_schema_duckdb(file_path, column_types, delimiter=',', usecols=None,
+                             max_null_percentage=30, plan=None, settings=None):
+    """
+    อ่านไฟล์ input ครั้งเดียวเข้า DuckDB และสร้าง dimensions กับ fact table ด้วย SQL
+
+    ผลลัพธ์เหมือนกับ read_typed_csv, select_columns_for_analysis, remove_high_null_columns,
+    clean_loan_data, create_all_dimensions และ create_fact_table ของ pandas
+    (ID ของ dimension กำหนดตามลำดับที่พบค่าครั้งแรก)
+    ข้อมูลระหว่างทางอยู่ใน DuckDB ทั้งหมด เฉพาะผลลัพธ์ที่ต้องส่งให้ loader เท่านั้นที่อยู่ในหน่วยความจำของ pandas
+
+    Parameters:
+    - file_path: ที่อยู่ของไฟล์ CSV (ต้องมี header, รองรับ .gz/.zst) หรือไฟล์ .parquet
+    - column_types: dictionary จาก correct_column_types
+    - delimiter: ตัวคั่นในไฟล์ CSV (default: ,)
+    - usecols: list ของ columns ที่ต้องการ ตามลำดับของ select_columns_for_analysis
+      หรือ None (ทุก column ในไฟล์) (default: None)
+    - max_null_percentage: เปอร์เซ็นต์ null สูงสุดของ columns ที่เก็บไว้
+      หรือ None ถ้าไม่ลบ columns (default: 30)
+    - plan: CleaningPlan จาก compile_cleaning_rules หรือ None ใช้ LOAN_CLEANING_PLAN (default: None)
+    - settings: dictionary ของ settings ของ DuckDB เช่น memory_limit, temp_directory, threads
+      (ค่า None ใช้ค่า default ของ DuckDB) (default: None)
+
+    Returns:
+    - tuple: (dimensions, fact_table, stats) เป็น pandas DataFrames
+      stats มี raw_rows, prepared_rows, fact_rows, row_count_match, null_foreign_keys,
+      filter_report และ columns
+
+    Raises:
+    - ImportError: ถ้าไม่ได้ติดตั้ง duckdb
+    - ValueError: ถ้ามีค่าที่แปลงไม่ได้ หรือกฎที่ DuckDB engine ไม่รองรับ
+    """
+    if duckdb is None:
+        raise ImportError("ต้องติดตั้ง duckdb เพื่อใช้ transform_engine='duckdb'")
+
+    plan = plan or LOAN_CLEANING_PLAN
+    con = duckdb.connect()
+    try:
+        for key, value in (settings or {}).items():
+            if value is not None:
+                con.execute(f"SET {key} = {_literal(value)}")
+
+        reader = _reader_sql(file_path, delimiter)
+        file_types = {row[0]: row[1] for row in con.execute(f"DESCRIBE SELECT * FROM {reader}").fetchall()}
+        columns = [col for col in (usecols or file_types) if col in file_types]
+
+        # 1. อ่านไฟล์ครั้งเดียว (เฉพาะ columns ที่ใช้ แปลง types ระหว่างอ่าน) เก็บเป็น table
+        #    ขั้นต่อไปทั้งหมดอ่านจาก table นี้ ไม่ scan ไฟล์ซ้ำ (DuckDB spill ลง disk เมื่อเกิน memory_limit)
+        con.execute(
+            "CREATE TEMP TABLE source AS SELECT " +
+            ', '.join(f"{_read_sql(col, column_types.get(col), file_types[col])} AS {_identifier(col)}"
+                      for col in columns) +
+            f" FROM {reader}"
+        )
+        source_types = {row[0]: row[1] for row in con.execute("DESCRIBE source").fetchall()}
+
+        # นับ null ของทุกแถว แล้วลบ columns ที่มี null มากเกินไป
+        counts = con.execute(
+            "SELECT " + ', '.join(['count(*)'] + [f"count({_identifier(col)})" for col in columns]) +
+            " FROM source"
+        ).fetchone()
+        null_profile = {'rows': counts[0],
+                        'nulls': {col: counts[0] - count for col, count in zip(columns, counts[1:])}}
+        if max_null_percentage is not None:
+            columns = columns_within_null_limit(null_percentages(null_profile), max_null_percentage)
+
+        # 2. filter ของ columns ที่เหลือ (นับแถวที่ filter แต่ละข้อกรองเพิ่ม)
+        filters = [(name, _filter_sql(rule)) for name, rule in zip(plan.row_filters, plan.filter_rules)
+                   if rule['column'] in columns]
+        keep = ' AND '.join(condition for _, condition in filters) or 'TRUE'
+        dropped = {}
+        if filters:
+            counts = []
+            previous = 'TRUE'
+            for _, condition in filters:
+                counts.append(f"count(*) FILTER (WHERE {previous} AND NOT {condition})")
+                previous = f"{previous} AND {condition}"
+            dropped = dict(zip([name for name, _ in filters],
+                               con.execute(f"SELECT {', '.join(counts)} FROM source").fetchone()))
+
+        # 3. กรองแล้วแปลง columns ตามกฎ เก็บเป็น table (rowid เรียงตามลำดับแถวในไฟล์)
+        selected = []
+        for col in columns:
+            expr = _identifier(col)
+            if col in plan.column_rules:
+                expr = _column_sql(col, plan.column_rules[col], source_types[col])
+            selected.append(f"{expr} AS {_identifier(col)}")
+        con.execute(f"CREATE TEMP TABLE cleaned AS SELECT {', '.join(selected)} FROM source WHERE {keep}")
+
+        # 4. dimensions: ค่าที่ไม่ซ้ำกัน (รวม null) และ surrogate key ตามลำดับที่พบครั้งแรก
+        dimension_columns = [col for col in DIMENSION_COLUMNS + DATE_DIMENSION_COLUMNS if col in columns]
+        dimensions = {}
+        for col in dimension_columns:
+            column, id_column = _identifier(col), _identifier(f'{col}_id')
+            dim_table = _identifier(f'dim_{col}')
+            con.execute(
+                f"CREATE TEMP TABLE {dim_table} AS "
+                f"SELECT {column}, CAST(row_number() OVER (ORDER BY first_row) - 1 AS BIGINT) AS {id_column} "
+                f"FROM (SELECT {column}, min(rowid) AS first_row FROM cleaned GROUP BY {column})"
+            )
+            if col in DATE_DIMENSION_COLUMNS:
+                dim_df = con.execute(
+                    f"SELECT {column}, month({column}) AS month, year({column}) AS year, {id_column} "
+                    f"FROM {dim_table} ORDER BY {id_column}"
+                ).df()
+                dimensions[col] = match_date_dimension_dtypes(dim_df, col)
+            else:
+                dim_df = con.execute(f"SELECT * FROM {dim_table} ORDER BY {id_column}").df()
+                dimensions[col] = match_dimension_dtypes(dim_df, col, column_types.get(col))
+
+        # 5. fact table: measures และ foreign keys จากการ join กับ dimensions (null ตรงกับ null)
+        selected = []
+        joins = []
+        for col in FACT_COLUMNS:
+            if col in columns:
+                selected.append(f"cleaned.{_identifier(col)}")
+            elif col[:-len('_id')] in dimension_columns:
+                dim_col = col[:-len('_id')]
+                dim_table = _identifier(f'dim_{dim_col}')
+                selected.append(f"{dim_table}.{_identifier(col)}")
+                joins.append(f"LEFT JOIN {dim_table} ON cleaned.{_identifier(dim_col)} "
+                             f"IS NOT DISTINCT FROM {dim_table}.{_identifier(dim_col)}")
+        fact_table = _fact_to_pandas(con.execute(
+            f"SELECT {', '.join(selected)} FROM cleaned {' '.join(joins)} ORDER BY cleaned.rowid"
+        ).df())
+        prepared_rows = con.execute("SELECT count(*) FROM cleaned").fetchone()[0]
+    except (duckdb.ConversionException, duckdb.InvalidInputException) as e:
+        raise ValueError(str(e)) from e
+    finally:
+        con.close()
+
+    stats = {
+        'raw_rows': null_profile['rows'],
+        'prepared_rows': prepared_rows,
+        'fact_rows': len(fact_table),
+        'row_count_match': len(fact_table) == prepared_rows,
+        'null_foreign_keys': {col: int(fact_table[col].isnull().sum())
+                              for col in fact_table.columns if col.endswith('_id')},
+        'filter_report': {'rows': null_profile['rows'], 'dropped': dropped},
+        'columns': columns
+    }
+    return (dimensions, fact_table, stats)
@@ -5,6 +5,61 @@
 
 import pandas as pd
 
+from etl.dimensions import (factorize_dimension, dimension_from_values, DIMENSION_COLUMNS,
+                            DATE_DIMENSION_COLUMNS)
+
+
+# columns ของ fact table (เฉพาะที่มีอยู่จริงจะถูกเลือก)
+FACT_COLUMNS = [
+    # Measures
+    'loan_amnt', 'funded_amnt', 'int_rate', 'installment',
+    'annual_inc', 'annual_inc_joint', 'dti', 'dti_joint',
+    
+    # Foreign keys
+    'home_ownership_id', 'loan_status_id', 'issue_d_id',
+    'application_type_id', 'emp_length_id'
+]
+
+
+def map_dimension_ids(column, mapping):
+    """
+    แปลงค่าใน column เป็น dimension IDs
+
+    column แบบ category จะ map เฉพาะ categories แล้วเลือกผ่าน integer codes
+    แทนการ hash ข้อความทีละแถว
+
+    Parameters:
+    - column: Series ของค่า dimension
+    - mapping: dictionary จาก dimension values ไป IDs
+
+    Returns:
+    - Series ของ IDs (ค่าที่ไม่มีใน mapping เป็น NaN)
+      ค่า null ได้ ID ของ null ใน mapping เหมือนค่าอื่น (ทุก version ของ pandas)
+    """
+    keys = pd.Index(list(mapping))
+    ids = list(mapping.values())
+    # ID ของค่า null (NaN/None/NaT) ใน mapping ถ้ามี
+    null_keys = keys.isna()
+    null_id = ids[null_keys.argmax()] if null_keys.any() else None
+
+    if not isinstance(column.dtype, pd.CategoricalDtype):
+        mapped = column.map(mapping)
+        # pandas ก่อน 3.0 ไม่ map ค่า null ผ่าน dict จึงเติม ID ของ null เอง
+        if null_id is not None and mapped.isnull().any():
+            mapped = mapped.where(column.notna(), null_id)
+            if mapped.notna().all():
+                mapped = mapped.astype('int64')
+        return mapped
+
+    # code -1 คือค่า null ใช้ ID ของ null ถ้ามีใน mapping
+    positions = keys.get_indexer(list(column.cat.categories))
+    code_ids = {code: ids[position] for code, position in enumerate(positions)
+                if position != -1}
+    if null_id is not None:
+        code_ids[-1] = null_id
+
+    return column.cat.codes.map(code_ids)
+
 
 def create_fact_table(df, dimension_mappings):
     """
@@ -23,25 +78,50 @@ def create_fact_table(df, dimension_mappings):
     # Map dimension values ไปเป็น IDs
     for dim_name, mapping in dimension_mappings.items():
         if dim_name in df.columns:
-            fact_df[f'{dim_name}_id'] = fact_df[dim_name].map(mapping)
-    
-    # เลือกเฉพาะ columns ที่ต้องการใน fact table
-    fact_columns = [
-        # Measures
-        'loan_amnt', 'funded_amnt', 'int_rate', 'installment',
-        'annual_inc', 'annual_inc_joint', 'dti', 'dti_joint',
-        
-        # Foreign keys
-        'home_ownership_id', 'loan_status_id', 'issue_d_id',
-        'application_type_id', 'emp_length_id'
-    ]
+            fact_df[f'{dim_name}_id'] = map_dimension_ids(fact_df[dim_name], mapping)
     
-    # กรองเฉพาะ columns ที่มีอยู่จริง
-    available_columns = [col for col in fact_columns if col in fact_df.columns]
+    # เลือกเฉพาะ columns ที่ต้องการใน fact table ที่มีอยู่จริง
+    available_columns = [col for col in FACT_COLUMNS if col in fact_df.columns]
     
     return fact_df[available_columns]
 
 
+def create_star_schema(df):
+    """
+    สร้าง dimension tables และ fact table พร้อมกัน
+
+    factorize แต่ละ dimension column ครั้งเดียว ค่าที่ไม่ซ้ำกันเป็น dimension table
+    และ IDs เป็น foreign keys ของ fact table โดยตรง ไม่ต้องสร้าง mappings แล้ว map อีกรอบ
+    ผลลัพธ์เหมือนกับ create_all_dimensions ตามด้วย create_fact_table
+    (ค่า null เป็นสมาชิกหนึ่งของ dimension และได้ ID เหมือนค่าอื่นทั้งสองทาง)
+
+    Parameters:
+    - df: DataFrame ที่ clean แล้ว
+
+    Returns:
+    - tuple: (dictionary ของ dimension tables, DataFrame ของ fact table)
+      dimension columns ที่ไม่มีใน df ถูกข้ามไป
+    """
+    dimensions = {}
+    dimension_ids = {}
+
+    for column_name in DIMENSION_COLUMNS + DATE_DIMENSION_COLUMNS:
+        if column_name not in df.columns:
+            continue
+        values, ids = factorize_dimension(df[column_name])
+        dimensions[column_name] = dimension_from_values(
+            values, column_name, column_name, date=column_name in DATE_DIMENSION_COLUMNS)
+        dimension_ids[f'{column_name}_id'] = ids
+
+    # measures มาก่อน foreign keys ใน FACT_COLUMNS จึงต่อ IDs ท้าย measures ได้ตามลำดับ
+    fact_df = df[[col for col in FACT_COLUMNS if col in df.columns]].copy()
+    for col in FACT_COLUMNS:
+        if col in dimension_ids:
+            fact_df[col] = dimension_ids[col]
+
+    return (dimensions, fact_df)
+
+
 def validate_fact_table(fact_df, original_df):
     """
     ตรวจสอบความถูกต้องของ fact table
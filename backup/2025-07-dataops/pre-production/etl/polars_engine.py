@@ -0,0 +1,259 @@
+"""
+ฟังก์ชันสำหรับสร้าง star schema ด้วย Polars (PIPELINE_CONFIG['transform_engine'] = 'polars')
+ไฟล์นี้รวม select_columns_for_analysis, remove_high_null_columns, clean_loan_data,
+create_all_dimensions และ create_fact_table เป็น lazy query plan เดียว
+ที่อ่านเฉพาะ columns ที่ใช้ (projection pushdown) กรองแถวระหว่าง scan (predicate pushdown)
+และประมวลผลแบบ multithreaded แล้วแปลงผลกลับเป็น pandas DataFrames แบบเดียวกับ pipeline ของ pandas
+"""
+
+try:
+    import polars as pl
+except ImportError:
+    # polars เป็น dependency เสริม ใช้เฉพาะเมื่อเลือก engine นี้
+    pl = None
+
+from etl.data_cleaning import LOAN_CLEANING_PLAN, columns_within_null_limit
+from etl.dimensions import (DIMENSION_COLUMNS, DATE_DIMENSION_COLUMNS, match_dimension_dtypes,
+                            match_date_dimension_dtypes)
+from etl.fact_table import FACT_COLUMNS
+from utils.csv_reader import PANDAS_NA_VALUES
+from utils.ingest import null_percentages
+from utils.input_file import detect_compression
+
+
+# รูปแบบของ percent string ที่ parse_percent รับได้ (หลังตัดเว้นวรรคและ %)
+PERCENT_PATTERN = r'^[+-]?(\d+\.?\d*|\.\d+)$'
+
+# จำนวนหลักสูงสุดของ percent string (เท่ากับ utils.parsers)
+PERCENT_MAX_DIGITS = 15
+
+
+def _read_dtypes(column_types):
+    """
+    dtype ของ polars สำหรับอ่านแต่ละ column (types ที่ต้องแปลงต่ออ่านเป็นข้อความ)
+
+    Parameters:
+    - column_types: dictionary จาก correct_column_types
+
+    Returns:
+    - dictionary ของ column และ dtype ของ polars
+    """
+    read_as = {'float64': pl.Float64, 'int64': pl.Int64}
+    return {column: read_as.get(dtype, pl.String) for column, dtype in column_types.items()}
+
+
+def _cast_dtype(dtype):
+    """dtype ของ polars สำหรับกฎ cast"""
+    cast_to = {
+        'float64': pl.Float64, 'float32': pl.Float32,
+        'int64': pl.Int64, 'int32': pl.Int32,
+        'string': pl.String, 'category': pl.String
+    }
+    if dtype not in cast_to:
+        raise ValueError(f"Polars engine ไม่รองรับการ cast เป็น {dtype}")
+    return cast_to[dtype]
+
+
+def _percent_text(expr):
+    """ตัดเว้นวรรคและเครื่องหมาย % ของ percent string"""
+    return expr.str.strip_chars().str.strip_suffix('%').str.strip_chars()
+
+
+def _invalid_percent(expr):
+    """expression ที่เป็น True สำหรับค่าที่ parse_percent แปลงไม่ได้"""
+    text = _percent_text(expr)
+    return expr.is_not_null() & (~text.str.contains(PERCENT_PATTERN) |
+                                 (text.str.count_matches(r'\d') > PERCENT_MAX_DIGITS))
+
+
+def _parse_percent(expr):
+    """
+    แปลง percent string เป็นสัดส่วนแบบเดียวกับ utils.parsers.parse_percent
+
+    หาร mantissa ด้วย 10**scale ครั้งเดียว จึงได้ค่า float เดียวกันทุก bit
+    """
+    text = _percent_text(expr)
+    parts = text.str.replace(r'^[+-]', '').str.split_exact('.', 1)
+    fraction = parts.struct.field('field_1').fill_null('')
+    mantissa = (parts.struct.field('field_0') + fraction).cast(pl.Int64)
+    scale = pl.lit(10, dtype=pl.Int64).pow(fraction.str.len_chars() + 2)
+    value = mantissa.cast(pl.Float64) / scale.cast(pl.Float64)
+    return pl.when(text.str.starts_with('-')).then(-value).otherwise(value)
+
+
+def _filter_expr(rule):
+    """expression ของแถวที่เก็บไว้ตามกฎ filter (ดูค่าก่อนการแปลง)"""
+    column = pl.col(rule['column'])
+    keep = pl.lit(True)
+    if rule.get('drop_values'):
+        keep = (~column.is_in(list(rule['drop_values']))).fill_null(True)
+    if rule.get('drop_null'):
+        keep = keep & column.is_not_null()
+    return keep
+
+
+def _column_expr(column, rules, column_type):
+    """
+    รวมกฎการแปลงของ column หนึ่งเป็น expression เดียว
+
+    Parameters:
+    - column: ชื่อ column
+    - rules: list ของกฎการแปลงของ column นี้ (ตามลำดับที่ประกาศ)
+    - column_type: type ของ column จาก correct_column_types
+
+    Returns:
+    - tuple: (expression ของค่าที่แปลงแล้ว, list ของ expression ของค่าที่ parse_percent แปลงไม่ได้)
+    """
+    expr = pl.col(column)
+    numeric = column_type in ('float64', 'int64')
+    parsed_date = False
+    invalid = []
+
+    for rule in rules:
+        rule_type = rule['type']
+        if rule_type == 'fill_null':
+            expr = expr.fill_null(rule['value'])
+        elif rule_type == 'parse_date' and not parsed_date:
+            if rule.get('format'):
+                expr = expr.str.strptime(pl.Datetime('us'), rule['format'], strict=True)
+            else:
+                expr = expr.str.to_datetime(time_unit='us', strict=True)
+            parsed_date = True
+        elif rule_type == 'parse_percent' and not numeric:
+            if rule.get('basis_points'):
+                raise ValueError("Polars engine ไม่รองรับ parse_percent แบบ basis_points")
+            invalid.append(_invalid_percent(expr))
+            expr = _parse_percent(expr)
+            numeric = True
+        elif rule_type == 'cast':
+            expr = expr.cast(_cast_dtype(rule['dtype']))
+            numeric = rule['dtype'] not in ('string', 'category')
+
+    return expr.alias(column), invalid
+
+
+def build_star_schema_polars(file_path, column_types, delimiter=',', usecols=None,
+                             max_null_percentage=30, plan=None):
+    """
+    อ่านไฟล์ CSV และสร้าง dimensions กับ fact table ด้วย lazy query plan ของ Polars
+
+    ผลลัพธ์เหมือนกับ select_columns_for_analysis, remove_high_null_columns, clean_loan_data,
+    create_all_dimensions และ create_fact_table ของ pandas
+    (ID ของ dimension กำหนดตามลำดับที่พบค่าครั้งแรก)
+
+    ไฟล์ที่บีบอัด (.gz/.zst) scan แบบ lazy ไม่ได้ จึงแตกไฟล์และอ่านทั้งไฟล์เข้า memory ก่อน
+
+    Parameters:
+    - file_path: ที่อยู่ของไฟล์ CSV หรือ CSV ที่บีบอัด (ต้องมี header)
+    - column_types: dictionary จาก correct_column_types
+    - delimiter: ตัวคั่นในไฟล์ (default: ,)
+    - usecols: list ของ columns ที่ต้องการ ตามลำดับของ select_columns_for_analysis
+      หรือ None (ทุก column ในไฟล์) (default: None)
+    - max_null_percentage: เปอร์เซ็นต์ null สูงสุดของ columns ที่เก็บไว้
+      หรือ None ถ้าไม่ลบ columns (default: 30)
+    - plan: CleaningPlan จาก compile_cleaning_rules หรือ None ใช้ LOAN_CLEANING_PLAN (default: None)
+
+    Returns:
+    - tuple: (dimensions, fact_table, stats) เป็น pandas DataFrames
+      stats มี raw_rows, prepared_rows, fact_rows, row_count_match, null_foreign_keys,
+      filter_report และ columns
+
+    Raises:
+    - ImportError: ถ้าไม่ได้ติดตั้ง polars
+    - ValueError: ถ้ามีค่าที่แปลงไม่ได้ หรือกฎที่ Polars engine ไม่รองรับ
+    """
+    if pl is None:
+        raise ImportError("ต้องติดตั้ง polars เพื่อใช้ transform_engine='polars'")
+
+    plan = plan or LOAN_CLEANING_PLAN
+    options = dict(separator=delimiter, infer_schema=False,
+                   schema_overrides=_read_dtypes(column_types), null_values=PANDAS_NA_VALUES)
+    if detect_compression(file_path) is not None:
+        # scan_csv อ่านไฟล์บีบอัดไม่ได้ read_csv แตกไฟล์ให้
+        scan = pl.read_csv(file_path, **options).lazy()
+    else:
+        scan = pl.scan_csv(file_path, **options)
+    file_columns = scan.collect_schema().names()
+    columns = [col for col in (usecols or file_columns) if col in file_columns]
+
+    # 1. นับ null ของทุกแถว (อ่านเฉพาะ columns ที่ใช้) เพื่อเลือก columns ก่อนสร้าง plan หลัก
+    counts = scan.select(
+        [pl.len().alias('rows')] +
+        [pl.col(col).null_count().alias(str(index)) for index, col in enumerate(columns)]
+    ).collect().row(0)
+    null_profile = {'rows': counts[0], 'nulls': dict(zip(columns, counts[1:]))}
+    if max_null_percentage is not None:
+        columns = columns_within_null_limit(null_percentages(null_profile), max_null_percentage)
+
+    # 2. กรองแถวด้วย filter ของ columns ที่เหลือ (นับแถวที่ filter แต่ละข้อกรองเพิ่ม)
+    base = scan.select(columns)
+    keep = pl.lit(True)
+    dropped = []
+    for name, rule in zip(plan.row_filters, plan.filter_rules):
+        if rule['column'] not in columns:
+            continue
+        mask = _filter_expr(rule)
+        dropped.append((~mask & keep).sum().alias(f'dropped:{name}'))
+        keep = keep & mask
+
+    # 3. แปลง columns ตามกฎ (filter ทำก่อนเสมอ จึงแปลงเฉพาะแถวที่เก็บไว้)
+    conversions = []
+    invalid_values = []
+    for column, rules in plan.column_rules.items():
+        if column not in columns:
+            continue
+        expr, invalid = _column_expr(column, rules, column_types.get(column))
+        conversions.append(expr)
+        invalid_values += [pl.col(column).filter(keep & check).first().alias(f'invalid:{column}')
+                           for check in invalid]
+    cleaned = base.filter(keep).with_columns(conversions) if conversions else base.filter(keep)
+
+    # 4. ID ของ dimension ตามลำดับที่พบค่าครั้งแรก (ค่า null เป็นสมาชิกหนึ่งของ dimension)
+    dimension_columns = [col for col in DIMENSION_COLUMNS + DATE_DIMENSION_COLUMNS if col in columns]
+    with_ids = cleaned.with_row_index('__row').with_columns([
+        (pl.col('__row').min().over(col).rank('dense') - 1).cast(pl.Int64).alias(f'{col}_id')
+        for col in dimension_columns
+    ])
+
+    fact_columns = [col for col in FACT_COLUMNS
+                    if col in columns or col[:-len('_id')] in dimension_columns]
+    queries = [with_ids.select(fact_columns),
+               base.select([pl.len().alias('rows')] + dropped + invalid_values)]
+    for col in dimension_columns:
+        dim_query = with_ids.select(col, f'{col}_id').unique(subset=col, maintain_order=True)
+        if col in DATE_DIMENSION_COLUMNS:
+            dim_query = dim_query.select(col, pl.col(col).dt.month().alias('month'),
+                                         pl.col(col).dt.year().alias('year'), f'{col}_id')
+        queries.append(dim_query)
+
+    # รวมทุก query เป็น plan เดียว ส่วน scan/filter/แปลงที่ใช้ร่วมกันคำนวณครั้งเดียว
+    fact_frame, summary, *dim_frames = pl.collect_all(queries)
+
+    summary = summary.row(0, named=True)
+    for key, value in summary.items():
+        if key.startswith('invalid:') and value is not None:
+            raise ValueError(f"แปลงเป็นเปอร์เซ็นต์ไม่ได้: {value!r}")
+
+    dimensions = {}
+    for col, dim_frame in zip(dimension_columns, dim_frames):
+        if col in DATE_DIMENSION_COLUMNS:
+            dimensions[col] = match_date_dimension_dtypes(dim_frame.to_pandas(), col)
+        else:
+            dimensions[col] = match_dimension_dtypes(dim_frame.to_pandas(), col, column_types.get(col))
+
+    fact_table = fact_frame.to_pandas()
+    stats = {
+        'raw_rows': null_profile['rows'],
+        'prepared_rows': len(fact_table),
+        'fact_rows': len(fact_table),
+        'row_count_match': True,
+        'null_foreign_keys': {col: int(fact_table[col].isnull().sum())
+                              for col in fact_table.columns if col.endswith('_id')},
+        'filter_report': {
+            'rows': summary['rows'],
+            'dropped': {key[len('dropped:'):]: value for key, value in summary.items()
+                        if key.startswith('dropped:')}
+        },
+        'columns': columns
+    }
+    return (dimensions, fact_table, stats)
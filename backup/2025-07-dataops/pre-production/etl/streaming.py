@@ -0,0 +1,143 @@
+"""
+ฟังก์ชันสำหรับรัน pipeline แบบ streaming
+ไฟล์นี้ประมวลผลข้อมูลทีละ chunk ตั้งแต่ clean จนถึงสร้าง fact table
+เพื่อให้หน่วยความจำขึ้นกับขนาด chunk ไม่ใช่ขนาดไฟล์
+"""
+
+import pandas as pd
+
+from etl.data_cleaning import clean_loan_data, select_columns_for_analysis
+from etl.dimensions import (create_dimension_table, create_date_dimension,
+                            create_dimension_mappings, DIMENSION_COLUMNS,
+                            DATE_DIMENSION_COLUMNS)
+from etl.fact_table import create_fact_table, validate_fact_table
+
+
+def compute_null_percentages(chunks):
+    """
+    คำนวณเปอร์เซ็นต์ null ของแต่ละ column จากข้อมูลทีละ chunk
+
+    Parameters:
+    - chunks: iterable ของ DataFrame
+
+    Returns:
+    - Series ของเปอร์เซ็นต์ null แยกตาม column (ลำดับเดียวกับ columns ของ chunk)
+    """
+    null_counts = None
+    total_rows = 0
+
+    for chunk in chunks:
+        counts = chunk.isnull().sum()
+        null_counts = counts if null_counts is None else null_counts + counts
+        total_rows += len(chunk)
+
+    if null_counts is None:
+        return pd.Series(dtype='float64')
+
+    if total_rows == 0:
+        return null_counts.astype('float64')
+
+    return null_counts / total_rows * 100
+
+
+def build_dimensions(dimension_values):
+    """
+    สร้าง dimension tables จากค่าที่ไม่ซ้ำกันที่สะสมไว้
+
+    Parameters:
+    - dimension_values: dictionary ของ dimension name และ DataFrame ของค่าที่ไม่ซ้ำ
+      (เรียงตามลำดับที่พบครั้งแรก)
+
+    Returns:
+    - dictionary ของ dimension tables (เหมือนกับ create_all_dimensions)
+    """
+    dimensions = {}
+
+    for column_name in DIMENSION_COLUMNS:
+        dimensions[column_name] = create_dimension_table(
+            dimension_values[column_name], column_name, column_name)
+
+    for date_column in DATE_DIMENSION_COLUMNS:
+        dimensions[date_column] = create_date_dimension(
+            dimension_values[date_column], date_column)
+
+    return dimensions
+
+
+def build_star_schema_streaming(chunks, columns_to_keep, on_fact_chunk=None, cleaning_plan=None):
+    """
+    สร้าง dimensions และ fact table จากข้อมูลทีละ chunk
+
+    ID ของ dimension กำหนดตามลำดับที่พบค่าครั้งแรก ซึ่งตรงกับ drop_duplicates
+    ของทั้งไฟล์ ผลลัพธ์จึงเหมือนกับการประมวลผลทั้งหมดในหน่วยความจำ
+
+    Parameters:
+    - chunks: iterable ของ DataFrame ที่อ่านจากไฟล์
+    - columns_to_keep: columns ที่เหลือหลังลบ high null columns
+    - on_fact_chunk: function ที่รับ (fact_chunk, chunk_number) เช่น โหลดเข้าฐานข้อมูล
+      ถ้าไม่ระบุจะรวม fact chunks ทั้งหมดคืนให้ (default: None)
+      ถ้าคืนค่า False จะหยุดทันที (chunk ถัดไปจะต่อท้ายตารางที่โหลดไม่ครบ)
+    - cleaning_plan: CleaningPlan ที่ส่งต่อให้ clean_loan_data (default: None)
+
+    Returns:
+    - tuple: (dimensions, fact_table หรือ None, stats)
+    """
+    dimension_columns = DIMENSION_COLUMNS + DATE_DIMENSION_COLUMNS
+    dimension_values = {}
+    fact_chunks = []
+    stats = {
+        'chunks': 0,
+        'fact_chunks': 0,
+        'raw_rows': 0,
+        'prepared_rows': 0,
+        'fact_rows': 0,
+        'row_count_match': True,
+        'null_foreign_keys': {},
+        'failed_chunks': 0
+    }
+
+    for chunk in chunks:
+        stats['chunks'] += 1
+        stats['raw_rows'] += len(chunk)
+
+        # select, ลบ high null columns และ clean ทีละ chunk
+        chunk = select_columns_for_analysis(chunk)[columns_to_keep]
+        df_prepared = clean_loan_data(chunk, inplace=True, plan=cleaning_plan)
+        stats['prepared_rows'] += len(df_prepared)
+
+        # chunk ที่ไม่เหลือข้อมูลไม่มีผลต่อ dimensions และ fact table
+        if df_prepared.empty:
+            continue
+        chunk_number = stats['fact_chunks']
+        stats['fact_chunks'] += 1
+
+        # สะสมค่าที่ไม่ซ้ำของแต่ละ dimension (ค่าใหม่ต่อท้าย ID เดิมไม่เปลี่ยน)
+        for column_name in dimension_columns:
+            values = df_prepared[[column_name]]
+            if column_name in dimension_values:
+                values = pd.concat([dimension_values[column_name], values])
+            dimension_values[column_name] = values.drop_duplicates()
+
+        # สร้าง fact chunk จาก dimensions ที่มีอยู่ ณ ตอนนี้
+        dimension_mappings = create_dimension_mappings(build_dimensions(dimension_values))
+        fact_chunk = create_fact_table(df_prepared, dimension_mappings)
+
+        validation = validate_fact_table(fact_chunk, df_prepared)
+        stats['fact_rows'] += validation['fact_rows']
+        stats['row_count_match'] = stats['row_count_match'] and validation['row_count_match']
+        for col, count in validation['null_foreign_keys'].items():
+            stats['null_foreign_keys'][col] = stats['null_foreign_keys'].get(col, 0) + int(count)
+
+        if on_fact_chunk is None:
+            fact_chunks.append(fact_chunk)
+        elif on_fact_chunk(fact_chunk, chunk_number) is False:
+            stats['failed_chunks'] += 1
+            break
+
+    if not dimension_values:
+        return ({}, None, stats)
+
+    dimensions = build_dimensions(dimension_values)
+    fact_table = pd.concat(fact_chunks) if fact_chunks else None
+
+    return (dimensions, fact_table, stats)
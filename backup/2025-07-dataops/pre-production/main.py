@@ -11,12 +11,424 @@ from pathlib import Path
 sys.path.append(str(Path(__file__).parent))
 
 # Import modules ที่เราสร้าง
-from config.database import DB_CONFIG, FILE_CONFIG, CLEANING_CONFIG
-from utils.data_types import guess_column_types, correct_column_types
-from etl.data_cleaning import remove_high_null_columns, clean_loan_data, select_columns_for_analysis
-from etl.dimensions import create_all_dimensions, create_dimension_mappings
-from etl.fact_table import create_fact_table, validate_fact_table
-from etl.database_loader import load_all_to_database
+from config.database import (DB_CONFIG, FILE_CONFIG, CLEANING_CONFIG, INFERENCE_CONFIG,
+                             PIPELINE_CONFIG, FETCH_CONFIG, DOWNCAST_CONFIG)
+from utils.data_types import guess_column_types, correct_column_types, downcast_numeric_columns
+from utils.ingest import read_typed_csv, read_typed_csv_chunks
+from utils.schema_cache import (compute_schema_fingerprint, load_schema_cache,
+                                save_schema_cache, diff_column_types)
+from utils.source_fetcher import fetch_source, mark_source_loaded
+from utils.stream_buffer import consume_while_producing
+from utils.input_file import decompress_stream, detect_compression
+from utils.staging_cache import (compute_file_checksum, compute_staging_key,
+                                 load_staging_cache, save_staging_cache)
+from etl.data_cleaning import (remove_high_null_columns, clean_loan_data, select_columns_for_analysis,
+                               columns_within_null_limit, ANALYSIS_COLUMNS, LOAN_CLEANING_RULES)
+from etl.cleaning_rules import compile_cleaning_rules
+from etl.fact_table import create_star_schema, validate_fact_table
+from etl.database_loader import (load_all_to_database, create_db_engine, load_fact_to_db,
+                                 load_dimensions_to_db, FACT_TABLE_NAME)
+from etl.streaming import compute_null_percentages, build_star_schema_streaming
+from etl.polars_engine import build_star_schema_polars
+from etl.duckdb_engine import build_star_schema_duckdb
+
+
+# กฎการทำความสะอาดจาก CLEANING_CONFIG (compile ครั้งเดียว ใช้ทั้งตอนอ่านไฟล์และตอน clean)
+CLEANING_PLAN = compile_cleaning_rules(CLEANING_CONFIG.get('rules', LOAN_CLEANING_RULES))
+
+
+def active_row_filter():
+    """
+    row filter ที่ใช้ระหว่างอ่านไฟล์ (ตาม FILE_CONFIG['filter_while_reading'])
+    
+    Returns:
+    - CLEANING_PLAN.filter_rows หรือ None ถ้าให้ clean_loan_data กรองหลังอ่านครบแล้ว
+    """
+    return CLEANING_PLAN.filter_rows if FILE_CONFIG.get('filter_while_reading') else None
+
+
+def active_null_limit():
+    """
+    เปอร์เซ็นต์ null ที่ใช้ลบ columns ระหว่างอ่านไฟล์ (ตาม FILE_CONFIG['prune_while_reading'])
+    
+    Returns:
+    - CLEANING_CONFIG['max_null_percentage'] หรือ None ถ้าให้ remove_high_null_columns ลบหลังอ่านครบแล้ว
+    """
+    if FILE_CONFIG.get('prune_while_reading'):
+        return CLEANING_CONFIG['max_null_percentage']
+    return None
+
+
+def print_filter_report(report):
+    """
+    แสดงจำนวนแถวที่ถูกกรองระหว่างอ่านของแต่ละ filter
+    
+    Parameters:
+    - report: report จาก filter_rows (รวมทุก chunk แล้ว) หรือ None
+    """
+    if not report:
+        return
+    for name, count in report.get('dropped', {}).items():
+        print(f"   - กรองแถวระหว่างอ่าน ({name}): {count:,} แถว")
+
+
+def downcast_fact_table(fact_table):
+    """
+    ลดขนาด measures และ foreign keys ของ fact table ตามช่วงค่าที่พบ (ถ้าเปิดใช้ DOWNCAST_CONFIG)
+    
+    Parameters:
+    - fact_table: fact table DataFrame
+    
+    Returns:
+    - fact table ที่ลดขนาดแล้ว หรือ fact table เดิมถ้าไม่ได้เปิดใช้
+    """
+    if not DOWNCAST_CONFIG.get('enabled'):
+        return fact_table
+    
+    fact_table, report = downcast_numeric_columns(
+        fact_table,
+        DOWNCAST_CONFIG.get('columns'),
+        DOWNCAST_CONFIG.get('float_decimals', 4)
+    )
+    print(f"   - ลดขนาด {len(report['converted'])} columns "
+          f"ประหยัด {report['bytes_saved']:,} bytes")
+    for column, reason in report['failed_checks'].items():
+        print(f"   - ไม่ลดขนาด {column}: {reason}")
+    return fact_table
+
+
+def read_input_stream(stream):
+    """
+    อ่านข้อมูลจาก stream ระหว่างดาวน์โหลด (คาดเดา types จากข้อมูลที่อ่านแล้ว)
+    
+    Parameters:
+    - stream: file object ของข้อมูลที่กำลังดาวน์โหลด
+    
+    Returns:
+    - tuple: (success, DataFrame หรือ error message, column_types) เหมือน read_typed_csv
+    """
+    return read_typed_csv(
+        stream,
+        FILE_CONFIG['delimiter'],
+        FILE_CONFIG['has_headers'],
+        usecols=ANALYSIS_COLUMNS,
+        row_filter=active_row_filter(),
+        max_null_percentage=active_null_limit()
+    )
+
+
+def count_stream_nulls(stream):
+    """
+    คำนวณเปอร์เซ็นต์ null ทีละ chunk จาก stream ระหว่างดาวน์โหลด
+    
+    null ไม่ขึ้นกับ data types จึงนับได้ก่อนรู้ types ของไฟล์ใหม่
+    
+    Parameters:
+    - stream: file object ของข้อมูลที่กำลังดาวน์โหลด
+    
+    Returns:
+    - Series ของเปอร์เซ็นต์ null แยกตาม column
+    """
+    with read_typed_csv_chunks(stream, FILE_CONFIG['delimiter'], FILE_CONFIG['has_headers'],
+                               {}, usecols=ANALYSIS_COLUMNS,
+                               chunksize=PIPELINE_CONFIG['chunksize']) as reader:
+        return compute_null_percentages(select_columns_for_analysis(chunk) for chunk in reader)
+
+
+def fetch_input(consume=None):
+    """
+    ดาวน์โหลดไฟล์ input จาก FETCH_CONFIG['source_url'] เมื่อไฟล์ต้นทางเปลี่ยน
+    
+    Parameters:
+    - consume: function ที่อ่านข้อมูลจาก stream พร้อมกับการดาวน์โหลด
+      (ข้อมูลส่งผ่าน buffer ขนาดจำกัด) หรือ None ถ้าไม่ต้อง parse ระหว่างดาวน์โหลด
+    
+    Returns:
+    - tuple: (success, ผลลัพธ์จาก fetch_source หรือ error message, ผลลัพธ์ของ consume)
+      ผลลัพธ์ของ consume เป็น None ถ้าไม่ได้ดาวน์โหลดข้อมูลใหม่ หรือ parse ไม่สำเร็จ
+    """
+    def download(on_block=None):
+        return fetch_source(
+            FETCH_CONFIG['source_url'],
+            FILE_CONFIG['input_file'],
+            FETCH_CONFIG['state_file'],
+            expected_sha256=FETCH_CONFIG.get('expected_sha256'),
+            timeout=FETCH_CONFIG.get('timeout', 60),
+            connections=FETCH_CONFIG.get('connections', 1),
+            on_block=on_block
+        )
+    
+    consumed = None
+    if consume is None:
+        success, result = download()
+    else:
+        # ดาวน์โหลดใน thread แยก ส่วน thread หลัก parse ข้อมูลที่มาถึงแล้ว
+        compression = detect_compression(FILE_CONFIG['input_file'])
+        (success, result), consumed, error = consume_while_producing(
+            download, lambda reader: consume(decompress_stream(reader, compression)),
+            FETCH_CONFIG.get('buffer_blocks', 16))
+        if error is not None and success:
+            # ดาวน์โหลดครบแล้ว ขั้นต่อไปอ่านจากไฟล์ตามปกติ
+            print(f"   - parse ระหว่างดาวน์โหลดไม่สำเร็จ: {error}")
+    
+    if success and result['changed']:
+        resumed = " (ดาวน์โหลดต่อจากครั้งก่อน)" if result['resumed'] else ""
+        rate = result['bytes'] / max(result['elapsed'], 1e-6) / 1024 ** 2
+        print(f"   - ดาวน์โหลด {result['bytes']:,} bytes ใน {result['elapsed']:.1f} วินาที "
+              f"({rate:.1f} MB/s, {result['connections']} connections){resumed}")
+    return (success, result, consumed)
+
+
+def finish(success):
+    """
+    แสดงผลการรัน และบันทึกว่าไฟล์ต้นทางถูกโหลดแล้วเมื่อสำเร็จ
+    
+    Parameters:
+    - success: ETL process สำเร็จทั้งหมดหรือไม่
+    """
+    if success:
+        if FETCH_CONFIG.get('source_url'):
+            mark_source_loaded(FETCH_CONFIG['state_file'])
+        print("\n=== ETL Process เสร็จสมบูรณ์ ===")
+    else:
+        print("\n=== ETL Process มีข้อผิดพลาดบางส่วน ===")
+
+
+def lookup_schema_cache():
+    """
+    คำนวณ fingerprint ของไฟล์ input และอ่าน schema cache
+    
+    Returns:
+    - tuple: (fingerprint, cache เดิม) หรือ (None, None) ถ้าไม่ได้เปิดใช้ cache
+    """
+    cache_path = INFERENCE_CONFIG.get('schema_cache_file')
+    if not cache_path:
+        return (None, None)
+    
+    fingerprint = compute_schema_fingerprint(
+        FILE_CONFIG['input_file'],
+        FILE_CONFIG['delimiter'],
+        FILE_CONFIG['has_headers'],
+        INFERENCE_CONFIG.get('fingerprint_lines', 100),
+        usecols=ANALYSIS_COLUMNS
+    )
+    return (fingerprint, load_schema_cache(cache_path))
+
+
+def update_schema_cache(fingerprint, cached, column_types_corrected):
+    """
+    บันทึก column types ใหม่ลง schema cache และรายงาน columns ที่เปลี่ยนไป
+    
+    Parameters:
+    - fingerprint: fingerprint ของไฟล์ input
+    - cached: cache เดิม (หรือ None)
+    - column_types_corrected: dictionary จาก correct_column_types
+    """
+    # รายงาน columns ที่เปลี่ยนไปจาก cache เดิม
+    if cached:
+        changes = diff_column_types(cached['column_types'], column_types_corrected)
+        print("   - schema cache ไม่ตรงกับไฟล์ input วิเคราะห์ใหม่")
+        for change_type, columns in changes.items():
+            if columns:
+                print(f"     {change_type}: {', '.join(map(str, columns))}")
+    
+    save_schema_cache(INFERENCE_CONFIG['schema_cache_file'], fingerprint, column_types_corrected)
+
+
+def lookup_staging_cache(checksum=None, load=True):
+    """
+    คำนวณ key ของ staging cache จาก checksum ของไฟล์ input และอ่าน staging เดิม
+    
+    Parameters:
+    - checksum: sha256 ของไฟล์ input ที่ fetch_source คำนวณไว้แล้ว
+      หรือ None ให้คำนวณจากไฟล์ (default: None)
+    - load: อ่าน staging เดิมหรือไม่ (False เมื่อ parse ข้อมูลระหว่างดาวน์โหลดแล้ว
+      ต้องการเฉพาะ key สำหรับบันทึก) (default: True)
+    
+    Returns:
+    - tuple: (key, (DataFrame, column_types) หรือ None) หรือ (None, None) ถ้าไม่ได้เปิดใช้ staging
+    """
+    staging_path = FILE_CONFIG.get('staging_file')
+    if not staging_path:
+        return (None, None)
+    
+    # staging เก็บ types ที่ได้ไว้แล้ว key จึงขึ้นกับไฟล์และการตั้งค่าการอ่านเท่านั้น
+    row_filters = CLEANING_PLAN.filter_signatures() if active_row_filter() else None
+    inference = {name: INFERENCE_CONFIG[name] for name in ('sample_mode', 'confidence')}
+    key = compute_staging_key(checksum or compute_file_checksum(FILE_CONFIG['input_file']),
+                              usecols=ANALYSIS_COLUMNS, row_filters=row_filters,
+                              max_null_percentage=active_null_limit(), inference=inference)
+    return (key, load_staging_cache(staging_path, key) if load else None)
+
+
+def resolve_column_types(fingerprint, cached, allow_deferred=True):
+    """
+    หา data types ของแต่ละ column ก่อนอ่านข้อมูลทั้งไฟล์
+    
+    Parameters:
+    - fingerprint: fingerprint ของไฟล์ input (หรือ None)
+    - cached: schema cache เดิม (หรือ None)
+    - allow_deferred: ยอมให้คาดเดาระหว่างอ่านข้อมูลหรือไม่ (แบบ streaming ต้องรู้ types ก่อน)
+    
+    Returns:
+    - tuple: (success, column_types ที่แก้ไขแล้ว หรือ error message)
+      column_types เป็น None หมายถึงให้คาดเดาระหว่างอ่านข้อมูล (single pass)
+    """
+    # fingerprint ตรงกัน ไม่ต้องวิเคราะห์ใหม่
+    if cached and cached['fingerprint'] == fingerprint:
+        print("   - ใช้ data types จาก schema cache")
+        return (True, cached['column_types'])
+    
+    # ไม่ใช้ตัวอย่าง: คาดเดาจากข้อมูลที่อ่านในขั้นที่ 2 เลย ไม่ต้อง parse ไฟล์สองรอบ
+    if INFERENCE_CONFIG['sample_mode'] is None and allow_deferred:
+        print("   - จะคาดเดา data types ระหว่างอ่านข้อมูล")
+        return (True, None)
+    
+    success, column_types = guess_column_types(
+        FILE_CONFIG['input_file'],
+        FILE_CONFIG['delimiter'],
+        FILE_CONFIG['has_headers'],
+        sample_mode=INFERENCE_CONFIG['sample_mode'] or 'head',
+        sample_rows=INFERENCE_CONFIG['sample_rows'],
+        chunksize=INFERENCE_CONFIG['chunksize'],
+        confidence=INFERENCE_CONFIG['confidence'],
+        usecols=ANALYSIS_COLUMNS,
+        engine=FILE_CONFIG.get('csv_engine', 'c'),
+        memory_map=FILE_CONFIG.get('memory_map', False)
+    )
+    
+    if not success:
+        return (False, column_types)
+    
+    # แก้ไข data types ให้เหมาะสม
+    return (True, correct_column_types(column_types))
+
+
+def run_streaming_pipeline(column_types_corrected, missing_percentage=None):
+    """
+    รัน pipeline แบบ streaming: อ่าน clean สร้าง fact และโหลดเข้าฐานข้อมูลทีละ chunk
+    
+    Parameters:
+    - column_types_corrected: dictionary จาก correct_column_types
+    - missing_percentage: เปอร์เซ็นต์ null ที่นับไว้แล้วระหว่างดาวน์โหลด
+      หรือ None ให้นับจากไฟล์ (default: None)
+    
+    Returns:
+    - bool: สำเร็จทั้งหมดหรือไม่
+    """
+    def read_chunks(row_filter=None, usecols=ANALYSIS_COLUMNS):
+        return read_typed_csv_chunks(
+            FILE_CONFIG['input_file'],
+            FILE_CONFIG['delimiter'],
+            FILE_CONFIG['has_headers'],
+            column_types_corrected,
+            usecols=usecols,
+            chunksize=PIPELINE_CONFIG['chunksize'],
+            memory_map=FILE_CONFIG.get('memory_map', False),
+            row_filter=row_filter
+        )
+    
+    # 2. หา columns ที่มี null มากเกินไปจากทั้งไฟล์ก่อน เพื่อให้ทุก chunk ใช้ columns เดียวกัน
+    print("\n2. กำลังตรวจสอบค่า null ทีละ chunk...")
+    if missing_percentage is None:
+        with read_chunks() as reader:
+            missing_percentage = compute_null_percentages(
+                select_columns_for_analysis(chunk) for chunk in reader)
+    else:
+        print("   - ใช้ค่า null ที่นับระหว่างดาวน์โหลด")
+    columns_to_keep = columns_within_null_limit(missing_percentage, CLEANING_CONFIG['max_null_percentage'])
+    print(f"   - คงเหลือ {len(columns_to_keep)} columns หลังจากลบ high null columns")
+    
+    # 3. ทำความสะอาด สร้าง fact และโหลดเข้าฐานข้อมูลทีละ chunk
+    print(f"\n3. กำลังประมวลผลและโหลด Fact Table ทีละ {PIPELINE_CONFIG['chunksize']:,} แถว...")
+    engine = create_db_engine(DB_CONFIG)
+    
+    def load_fact_chunk(fact_chunk, chunk_number):
+        # chunk แรกสร้างตารางใหม่ chunk ถัดไปต่อท้าย
+        if_exists = 'replace' if chunk_number == 0 else 'append'
+        return load_fact_to_db(fact_chunk, FACT_TABLE_NAME, engine, if_exists)
+    
+    # เปอร์เซ็นต์ null นับจากทุกแถวแล้ว รอบนี้จึงกรองแถวระหว่างอ่านได้
+    # และไม่ต้อง parse columns ที่ถูกลบ
+    usecols = columns_to_keep if active_null_limit() is not None else ANALYSIS_COLUMNS
+    with read_chunks(active_row_filter(), usecols) as reader:
+        dimensions, _, stats = build_star_schema_streaming(reader, columns_to_keep, load_fact_chunk,
+                                                           CLEANING_PLAN)
+    
+    print_filter_report(reader.filter_report)
+    if stats['failed_chunks']:
+        print(f"เกิดข้อผิดพลาด: โหลด fact chunk ที่ {stats['fact_chunks']} ไม่สำเร็จ หยุดการโหลด")
+        return False
+    if stats['fact_rows'] == 0:
+        # ไม่มี chunk ที่ replace ตารางเดิม fact table ในฐานข้อมูลจึงยังเป็นของรอบก่อน
+        print("เกิดข้อผิดพลาด: ไม่มีแถวเหลือหลังทำความสะอาด ไม่ได้โหลด fact table")
+        return False
+    print(f"   - จำนวนแถวทั้งหมด: {stats['raw_rows']:,} ({stats['chunks']} chunks)")
+    print(f"   - จำนวนแถวหลังทำความสะอาด: {stats['prepared_rows']:,}")
+    print(f"   - Fact table: {stats['fact_rows']:,} แถว")
+    print(f"   - จำนวนแถวตรงกัน: {stats['row_count_match']}")
+    print(f"   - Null foreign keys: {stats['null_foreign_keys']}")
+    
+    # 4. โหลด dimensions หลังจากเห็นข้อมูลครบทุก chunk แล้ว
+    print("\n4. กำลังโหลด Dimension Tables...")
+    for dim_name, dim_df in dimensions.items():
+        print(f"   - {dim_name}: {len(dim_df)} แถว")
+    success_count, total_count = load_dimensions_to_db(dimensions, engine)
+    
+    return success_count == total_count
+
+
+def run_engine_pipeline(column_types_corrected, transform_engine):
+    """
+    รัน pipeline ด้วย Polars หรือ DuckDB: อ่าน clean สร้าง dimensions และ fact table
+    ใน engine นั้นทั้งหมด แล้วโหลด pandas DataFrames ที่ได้เข้าฐานข้อมูล
+    
+    Parameters:
+    - column_types_corrected: dictionary จาก correct_column_types
+    - transform_engine: 'polars' หรือ 'duckdb'
+    
+    Returns:
+    - bool: สำเร็จทั้งหมดหรือไม่
+    """
+    options = {
+        'usecols': ANALYSIS_COLUMNS,
+        'max_null_percentage': CLEANING_CONFIG['max_null_percentage'],
+        'plan': CLEANING_PLAN
+    }
+    if transform_engine == 'duckdb':
+        print("\n2. กำลังอ่านและประมวลผลข้อมูลด้วย DuckDB...")
+        build_star_schema = build_star_schema_duckdb
+        options['settings'] = PIPELINE_CONFIG.get('duckdb_settings')
+    else:
+        print("\n2. กำลังอ่านและประมวลผลข้อมูลด้วย Polars...")
+        build_star_schema = build_star_schema_polars
+    
+    try:
+        dimensions, fact_table, stats = build_star_schema(
+            FILE_CONFIG['input_file'],
+            column_types_corrected,
+            FILE_CONFIG['delimiter'],
+            **options
+        )
+    except Exception as e:
+        # รวมถึงไฟล์ที่อ่านไม่ได้ และ error ของ Polars/DuckDB เอง (ComputeError, duckdb.Error)
+        print(f"เกิดข้อผิดพลาด: {e}")
+        return False
+    
+    print_filter_report(stats['filter_report'])
+    print(f"   - จำนวนแถวทั้งหมด: {stats['raw_rows']:,}")
+    print(f"   - คงเหลือ {len(stats['columns'])} columns หลังจากลบ high null columns")
+    print(f"   - จำนวนแถวหลังทำความสะอาด: {stats['prepared_rows']:,}")
+    for dim_name, dim_df in dimensions.items():
+        print(f"   - {dim_name}: {len(dim_df)} แถว")
+    print(f"   - Fact table: {stats['fact_rows']:,} แถว")
+    print(f"   - จำนวนแถวตรงกัน: {stats['row_count_match']}")
+    print(f"   - Null foreign keys: {stats['null_foreign_keys']}")
+    
+    fact_table = downcast_fact_table(fact_table)
+
+    print("\n3. กำลังโหลดข้อมูลเข้าฐานข้อมูล...")
+    return load_all_to_database(dimensions, fact_table, DB_CONFIG)
 
 
 def main():
@@ -25,37 +437,113 @@ def main():
     """
     print("=== เริ่มต้น ETL Process ===\n")
     
+    streaming = PIPELINE_CONFIG.get('execution_mode') == 'streaming'
+    # Polars และ DuckDB อ่านไฟล์เองตาม types ที่รู้ก่อน (ไม่ parse ระหว่างดาวน์โหลด)
+    transform_engine = PIPELINE_CONFIG.get('transform_engine', 'pandas')
+    use_engine = not streaming and transform_engine in ('polars', 'duckdb')
+    
+    # 0. ดาวน์โหลดไฟล์ต้นทาง (ถ้าตั้งค่าไว้) และหยุดถ้าไม่มีอะไรเปลี่ยน
+    streamed = None
+    input_checksum = None
+    if FETCH_CONFIG.get('source_url'):
+        print("0. กำลังตรวจสอบไฟล์ต้นทาง...")
+        consume = None
+        if FETCH_CONFIG.get('parse_while_downloading') and not use_engine:
+            # parse ไปพร้อมกับดาวน์โหลด: นับ null (streaming) หรืออ่านข้อมูลทั้งหมด (in_memory)
+            consume = count_stream_nulls if streaming else read_input_stream
+        success, fetch_result, streamed = fetch_input(consume)
+        if not success:
+            print(f"เกิดข้อผิดพลาด: {fetch_result}")
+            return
+        if not fetch_result['changed'] and fetch_result['loaded']:
+            print("   - ไฟล์ต้นทางไม่เปลี่ยนตั้งแต่การโหลดครั้งก่อน ไม่ต้องประมวลผลใหม่")
+            return
+        # ไฟล์ input คือไฟล์ที่ fetch_source ตรวจ sha256 แล้ว ไม่ต้อง hash ใหม่
+        input_checksum = fetch_result['sha256']
+        print()
+    
     # 1. อ่านและวิเคราะห์ data types
     print("1. กำลังอ่านไฟล์และวิเคราะห์ data types...")
-    success, column_types = guess_column_types(
-        FILE_CONFIG['input_file'],
-        FILE_CONFIG['delimiter'],
-        FILE_CONFIG['has_headers']
-    )
+    try:
+        fingerprint, cached = lookup_schema_cache()
+    except OSError as e:
+        print(f"เกิดข้อผิดพลาด: {e}")
+        return
+    
+    if streamed is not None and not streaming:
+        # อ่านข้อมูลระหว่างดาวน์โหลดแล้ว types คาดเดาจากข้อมูลนั้น
+        success, column_types_corrected = (True, None)
+    else:
+        success, column_types_corrected = resolve_column_types(
+            fingerprint, cached, allow_deferred=not (streaming or use_engine))
     
     if not success:
-        print(f"เกิดข้อผิดพลาด: {column_types}")
+        print(f"เกิดข้อผิดพลาด: {column_types_corrected}")
         return
     
-    # แก้ไข data types ให้เหมาะสม
-    column_types_corrected = correct_column_types(column_types)
-    print(f"   - พบ {len(column_types_corrected)} columns")
+    if streaming:
+        print(f"   - พบ {len(column_types_corrected)} columns")
+        if fingerprint and not (cached and cached['fingerprint'] == fingerprint):
+            update_schema_cache(fingerprint, cached, column_types_corrected)
+        
+        finish(run_streaming_pipeline(column_types_corrected, streamed))
+        return
+    
+    if use_engine:
+        print(f"   - พบ {len(column_types_corrected)} columns")
+        if fingerprint and not (cached and cached['fingerprint'] == fingerprint):
+            update_schema_cache(fingerprint, cached, column_types_corrected)
+        
+        finish(run_engine_pipeline(column_types_corrected, transform_engine))
+        return
     
-    # 2. อ่านข้อมูลด้วย data types ที่ถูกต้อง
+    # 2. อ่านข้อมูลด้วย data types ที่ถูกต้อง (เฉพาะ columns ที่ pipeline ใช้)
     print("\n2. กำลังอ่านข้อมูลทั้งหมด...")
+    try:
+        # ข้อมูลที่ parse ระหว่างดาวน์โหลดใหม่กว่า staging เสมอ ไม่ต้องอ่าน staging
+        staging_key, staged = lookup_staging_cache(input_checksum, load=streamed is None)
+    except OSError as e:
+        print(f"เกิดข้อผิดพลาด: {e}")
+        return
     
-    # แยก datetime columns ออกมาเพื่อใช้ parse_dates แทน
-    datetime_columns = [col for col, dtype in column_types_corrected.items() if dtype == 'datetime64']
+    if staged is not None:
+        # ไฟล์ input ไม่เปลี่ยน โหลดจาก Parquet แทนการ parse CSV
+        print("   - ใช้ข้อมูลจาก staging cache")
+        raw_df, column_types_corrected = staged
+    else:
+        if streamed is not None:
+            print("   - ใช้ข้อมูลที่ parse ระหว่างดาวน์โหลด")
+            success, raw_df, column_types_corrected = streamed
+        else:
+            success, raw_df, column_types_corrected = read_typed_csv(
+                FILE_CONFIG['input_file'],
+                FILE_CONFIG['delimiter'],
+                FILE_CONFIG['has_headers'],
+                column_types_corrected,
+                usecols=ANALYSIS_COLUMNS,
+                engine=FILE_CONFIG.get('csv_engine', 'c'),
+                workers=FILE_CONFIG.get('parse_workers', 1),
+                memory_map=FILE_CONFIG.get('memory_map', False),
+                row_filter=active_row_filter(),
+                chunksize=PIPELINE_CONFIG['chunksize'],
+                max_null_percentage=active_null_limit()
+            )
+        
+        if not success:
+            print(f"เกิดข้อผิดพลาด: {raw_df}")
+            return
+        
+        if staging_key and save_staging_cache(FILE_CONFIG['staging_file'], staging_key,
+                                              raw_df, column_types_corrected):
+            print("   - บันทึกข้อมูลลง staging cache แล้ว")
     
-    # สร้าง dtype dict ใหม่โดยไม่รวม datetime columns
-    dtype_for_read = {col: dtype for col, dtype in column_types_corrected.items() if dtype != 'datetime64'}
+    print(f"   - พบ {len(column_types_corrected)} columns")
+    filter_report = raw_df.attrs.get('filter_report')
+    print_filter_report(filter_report)
     
-    # อ่านข้อมูลพร้อม parse datetime columns
-    raw_df = pd.read_csv(
-        FILE_CONFIG['input_file'], 
-        dtype=dtype_for_read,
-        parse_dates=datetime_columns
-    )
+    # บันทึก types ที่วิเคราะห์ใหม่ไว้ใช้รอบถัดไป
+    if fingerprint and not (cached and cached['fingerprint'] == fingerprint):
+        update_schema_cache(fingerprint, cached, column_types_corrected)
     
     # เลือกเฉพาะ columns ที่ต้องการ
     raw_df = select_columns_for_analysis(raw_df)
@@ -64,25 +552,26 @@ def main():
     # 3. ทำความสะอาดข้อมูล
     print("\n3. กำลังทำความสะอาดข้อมูล...")
     
-    # ลบ columns ที่มี null มากเกินไป
-    df_cleaned = remove_high_null_columns(raw_df, CLEANING_CONFIG['max_null_percentage'])
+    # ลบ columns ที่มี null มากเกินไป (ใช้จำนวน null ที่นับระหว่าง parse ซึ่งรวมแถวที่ถูกกรองแล้ว)
+    df_cleaned = remove_high_null_columns(raw_df, CLEANING_CONFIG['max_null_percentage'],
+                                          filter_report, raw_df.attrs.get('null_profile'))
     print(f"   - คงเหลือ {len(df_cleaned.columns)} columns หลังจากลบ high null columns")
     
     # ทำความสะอาดข้อมูล loan
-    df_prepared = clean_loan_data(df_cleaned)
+    df_prepared = clean_loan_data(df_cleaned, inplace=CLEANING_CONFIG.get('inplace', False),
+                                  plan=CLEANING_PLAN)
     print(f"   - จำนวนแถวหลังทำความสะอาด: {len(df_prepared):,}")
     
     # 4. สร้าง dimension tables
     print("\n4. กำลังสร้าง Dimension Tables...")
-    dimensions = create_all_dimensions(df_prepared)
+    # factorize แต่ละ dimension column ครั้งเดียว ได้ทั้ง dimension table และ foreign keys ของ fact table
+    dimensions, fact_table = create_star_schema(df_prepared)
     
     for dim_name, dim_df in dimensions.items():
         print(f"   - {dim_name}: {len(dim_df)} แถว")
     
     # 5. สร้าง fact table
     print("\n5. กำลังสร้าง Fact Table...")
-    dimension_mappings = create_dimension_mappings(dimensions)
-    fact_table = create_fact_table(df_prepared, dimension_mappings)
     print(f"   - Fact table: {len(fact_table):,} แถว")
     
     # 6. ตรวจสอบความถูกต้อง
@@ -91,14 +580,12 @@ def main():
     print(f"   - จำนวนแถวตรงกัน: {validation['row_count_match']}")
     print(f"   - Null foreign keys: {validation['null_foreign_keys']}")
     
+    fact_table = downcast_fact_table(fact_table)
+    
     # 7. โหลดเข้าฐานข้อมูล
     print("\n7. กำลังโหลดข้อมูลเข้าฐานข้อมูล...")
     success = load_all_to_database(dimensions, fact_table, DB_CONFIG)
-    
-    if success:
-        print("\n=== ETL Process เสร็จสมบูรณ์ ===")
-    else:
-        print("\n=== ETL Process มีข้อผิดพลาดบางส่วน ===")
+    finish(success)
 
 
 if __name__ == "__main__":
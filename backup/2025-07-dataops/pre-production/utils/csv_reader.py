@@ -0,0 +1,89 @@
+"""
+ฟังก์ชันสำหรับเลือก engine ในการอ่านไฟล์ CSV
+ไฟล์นี้ห่อ pd.read_csv ให้ใช้ Arrow CSV reader (multithreaded) ได้
+และกลับไปใช้ C engine เมื่อ option ที่ใช้ไม่รองรับหรือไม่มี pyarrow
+"""
+
+import pandas as pd
+
+
+# pyarrow engine ของ pandas < 3 ไม่อ่านค่า null ของ columns ข้อความ (เช่น '' หรือ '<NA>') เป็น null
+PYARROW_STRING_NULLS = int(pd.__version__.split('.')[0]) < 3
+
+# ค่าที่ pd.read_csv อ่านเป็น null โดย default (ให้ engine อื่นอ่าน null แบบเดียวกัน)
+PANDAS_NA_VALUES = [
+    '', '#N/A', '#N/A N/A', '#NA', '-1.#IND', '-1.#QNAN', '-NaN', '-nan', '1.#IND', '1.#QNAN',
+    '<NA>', 'N/A', 'NA', 'NULL', 'NaN', 'None', 'n/a', 'nan', 'null'
+]
+
+# options ที่ pyarrow engine ของ pandas ไม่รองรับ
+PYARROW_UNSUPPORTED_OPTIONS = (
+    'chunksize', 'iterator', 'nrows', 'skipfooter', 'comment', 'thousands',
+    'dialect', 'quoting', 'lineterminator', 'converters',
+    'float_precision', 'dayfirst', 'skipinitialspace'
+)
+
+
+def _resolve_usecols(file_path, options):
+    """
+    แปลง usecols ที่เป็น callable เป็น list ของ column names จาก header
+    (pyarrow engine รับ usecols แบบ callable ไม่ได้)
+    """
+    header = pd.read_csv(file_path, sep=options.get('sep', ','),
+                         header=options.get('header', 'infer'), nrows=0)
+    return [column for column in header.columns if options['usecols'](column)]
+
+
+def _null_strings(df, options):
+    """
+    แทนค่าข้อความที่ C engine อ่านเป็น null ด้วย null (ใช้กับผลของ pyarrow engine บน pandas < 3)
+    """
+    na_values = list(options.get('na_values') or [])
+    if options.get('keep_default_na', True):
+        na_values += PANDAS_NA_VALUES
+    for column in df.columns:
+        values = df[column]
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            nulls = [value for value in values.cat.categories if value in na_values]
+            if nulls:
+                df[column] = values.cat.remove_categories(nulls)
+        elif values.dtype == object or pd.api.types.is_string_dtype(values.dtype):
+            nulls = values.isin(na_values)
+            if nulls.any():
+                df[column] = values.mask(nulls)
+    return df
+
+
+def read_csv(file_path, engine='c', **options):
+    """
+    อ่านไฟล์ CSV ด้วย engine ที่เลือก
+
+    ถ้าเลือก 'pyarrow' แต่ใช้ไม่ได้ (ไม่มี pyarrow, option ไม่รองรับ
+    หรือ Arrow แปลง types บาง column ไม่ได้) จะอ่านด้วย C engine แทน
+
+    Parameters:
+    - file_path: ที่อยู่ของไฟล์ CSV
+    - engine: 'c' หรือ 'pyarrow' (default: 'c')
+    - options: parameters อื่นๆ ของ pd.read_csv
+
+    Returns:
+    - DataFrame หรือ iterator ของ chunks (ถ้าระบุ chunksize)
+    """
+    if engine == 'pyarrow' and not any(
+            options.get(option) is not None for option in PYARROW_UNSUPPORTED_OPTIONS):
+        # Arrow อ่านทั้งไฟล์และตรวจ types ทั้ง column อยู่แล้ว จึงไม่ต้องใช้ low_memory
+        # และจัดการ buffer ของไฟล์เอง จึงไม่ต้องใช้ memory_map
+        arrow_options = {key: value for key, value in options.items()
+                         if key not in ('low_memory', 'memory_map')}
+        try:
+            if callable(arrow_options.get('usecols')):
+                arrow_options['usecols'] = _resolve_usecols(file_path, options)
+            df = pd.read_csv(file_path, engine='pyarrow', **arrow_options)
+            if PYARROW_STRING_NULLS and options.get('na_filter', True):
+                df = _null_strings(df, options)
+            return df
+        except (ImportError, ValueError):
+            # ข้อผิดพลาดจริงของข้อมูลจะถูกรายงานอีกครั้งโดย C engine
+            pass
+
+    return pd.read_csv(file_path, **options)
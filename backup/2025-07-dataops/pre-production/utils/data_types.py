@@ -3,48 +3,294 @@
 ไฟล์นี้มีฟังก์ชันสำหรับวิเคราะห์ data types ของแต่ละ column ใน CSV
 """
 
-import re
+import numpy as np
 import pandas as pd
 
+from utils.csv_reader import read_csv
 
-def guess_column_types(file_path, delimiter=',', has_headers=True):
+
+# รูปแบบข้อมูลที่ตรวจสอบจากข้อความ (เรียงตามลำดับความสำคัญ)
+PATTERN_TYPES = {
+    'datetime64': r'\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}',
+    'date': r'\d{4}-\d{2}-\d{2}',
+    'month_year': r'(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)-\d{4}',  # เช่น Dec-2018
+    'percent': r'\s*-?\d+(?:\.\d+)?%\s*',  # เช่น 10.65%
+}
+
+# รวมทุกรูปแบบเป็น regex เดียว เพื่อสแกนแต่ละ column เพียงครั้งเดียว
+ANY_PATTERN = '|'.join(f'(?:{pattern})' for pattern in PATTERN_TYPES.values())
+NAMED_PATTERN = '^(?:' + '|'.join(
+    f'(?P<{name}>{pattern})' for name, pattern in PATTERN_TYPES.items()
+) + ')$'
+
+# infer_dtype ที่บอกว่า column มีข้อมูลหลายชนิดปนกัน
+MIXED_TYPES = ('mixed', 'mixed-integer')
+
+# column ข้อความที่มีค่าไม่ซ้ำน้อย (เช่น home_ownership, loan_status) อ่านเป็น category
+# เก็บเป็น integer codes แทน string ทุก cell ทั้งต้องมีค่าไม่ซ้ำไม่เกินจำนวนและสัดส่วนนี้
+CATEGORY_MAX_UNIQUE = 1000
+CATEGORY_MAX_RATIO = 0.5
+
+# integer dtypes ที่ใช้ลดขนาด (เรียงจากเล็กไปใหญ่)
+DOWNCAST_INTEGER_TYPES = ('int8', 'int16', 'int32')
+
+
+def _match_patterns(values):
+    """
+    นับจำนวนค่าที่ตรงกับแต่ละรูปแบบใน PATTERN_TYPES แบบ vectorized
+
+    ตรวจสอบเฉพาะค่าที่ไม่ซ้ำกัน แล้วถ่วงน้ำหนักด้วยจำนวนครั้งที่พบ
+
+    Parameters:
+    - values: Series ที่ไม่มีค่า null
+
+    Returns:
+    - dictionary ของชื่อรูปแบบและจำนวนค่าที่ตรง
+    """
+    hits = dict.fromkeys(PATTERN_TYPES, 0)
+
+    # column ตัวเลขไม่มีทางตรงกับรูปแบบข้อความ
+    if values.empty or not (pd.api.types.is_object_dtype(values)
+                            or pd.api.types.is_string_dtype(values)):
+        return hits
+
+    counts = values.astype(str).value_counts()
+    distinct = counts.index.to_series()
+
+    # สแกนรอบเดียวด้วย regex รวม ถ้าไม่มีค่าใดตรงเลยก็จบ
+    matched = distinct.str.fullmatch(ANY_PATTERN).astype(bool)
+    if not matched.any():
+        return hits
+
+    # แยกประเภทเฉพาะค่าที่ตรงกับบางรูปแบบ
+    groups = distinct[matched.values].str.extract(NAMED_PATTERN)
+    for name in PATTERN_TYPES:
+        hits[name] = int(counts[groups.index[groups[name].notna()]].sum())
+
+    return hits
+
+
+def _is_low_cardinality(values):
+    """
+    ตรวจสอบว่า column มีค่าไม่ซ้ำน้อยพอที่จะเก็บเป็น category หรือไม่
+
+    Parameters:
+    - values: Series ที่ไม่มีค่า null
+
+    Returns:
+    - bool
+    """
+    unique = values.nunique()
+    return unique <= CATEGORY_MAX_UNIQUE and unique <= len(values) * CATEGORY_MAX_RATIO
+
+
+def _infer_series_type(series):
+    """
+    คาดเดา data type ของ column เดียว พร้อมค่าความมั่นใจ
+
+    Parameters:
+    - series: Series ของ column ที่ต้องการตรวจสอบ
+
+    Returns:
+    - tuple: (inferred_type, confidence) โดย confidence อยู่ในช่วง 0-1
+    """
+    values = series.dropna()
+    hits = _match_patterns(values)
+    total = len(values)
+
+    # ค่า datetime ก็ถือว่าเป็น date ด้วย
+    date_hits = hits['datetime64'] + hits['date']
+
+    # กำหนด data type (column ที่ไม่มีค่าเลยจะถือว่าเป็น datetime เหมือนเดิม)
+    if hits['datetime64'] == total:
+        inferred_type = 'datetime64'
+    elif date_hits == total:
+        inferred_type = 'date'
+    elif hits['month_year'] == total:
+        inferred_type = 'month_year'
+    elif hits['percent'] == total:
+        inferred_type = 'percent'
+    else:
+        inferred_type = pd.api.types.infer_dtype(series, skipna=True)
+
+    # ไม่มีค่าให้ตรวจสอบเลย จึงไม่มั่นใจ
+    if values.empty:
+        return inferred_type, 0.0
+
+    if inferred_type == 'string' and _is_low_cardinality(values):
+        inferred_type = 'category'
+
+    confidence = 1.0
+
+    # ข้อมูลหลายชนิดปนกัน ใช้สัดส่วนของชนิดที่พบมากที่สุด
+    if inferred_type in MIXED_TYPES:
+        confidence = values.map(type).value_counts(normalize=True).iloc[0]
+
+    # บางค่าตรงกับรูปแบบแต่ไม่ทั้งหมด
+    match_ratio = max(date_hits, hits['month_year'], hits['percent']) / total
+    if 0 < match_ratio < 1:
+        confidence = min(confidence, max(match_ratio, 1 - match_ratio))
+
+    return inferred_type, confidence
+
+
+def infer_frame_types(df):
+    """
+    คาดเดา data type ของทุก column ใน DataFrame ที่อ่านมาแล้ว
+
+    Parameters:
+    - df: DataFrame ที่อ่านจาก CSV โดยไม่ระบุ dtype
+
+    Returns:
+    - dictionary ของ column names และ types
+    """
+    return {column: _infer_series_type(df[column])[0] for column in df.columns}
+
+
+def column_filter(usecols):
+    """
+    สร้าง usecols สำหรับ pd.read_csv จาก list ของ column names
+
+    ใช้ callable แทน list เพื่อให้ columns ที่ไม่มีในไฟล์ไม่ทำให้การอ่านล้มเหลว
+
+    Parameters:
+    - usecols: list ของ column names ที่ต้องการ หรือ None (อ่านทุก column)
+
+    Returns:
+    - callable หรือ None
+    """
+    if usecols is None:
+        return None
+
+    wanted = set(usecols)
+    return lambda column: column in wanted
+
+
+def _read_sample(file_path, delimiter, header, sample_mode, sample_rows,
+                 chunksize, random_state=None, usecols=None, memory_map=False):
+    """
+    อ่านตัวอย่างข้อมูลจากไฟล์ CSV แบบทีละ chunk โดยใช้หน่วยความจำจำกัด
+
+    Parameters:
+    - file_path: ที่อยู่ของไฟล์ CSV
+    - delimiter: ตัวคั่นในไฟล์
+    - header: แถวของ header (0 หรือ None)
+    - sample_mode: 'head' อ่านเฉพาะ chunk แรกๆ หรือ 'reservoir' สุ่มจากทั้งไฟล์
+    - sample_rows: จำนวนแถวสูงสุดของตัวอย่าง
+    - chunksize: จำนวนแถวต่อ chunk
+    - random_state: seed สำหรับการสุ่ม (ใช้กับ 'reservoir')
+    - usecols: list ของ columns ที่ต้องการอ่าน หรือ None
+    - memory_map: อ่านไฟล์ผ่าน memory map หรือไม่
+
+    Returns:
+    - DataFrame ของตัวอย่างข้อมูล
+    """
+    if sample_mode not in ('head', 'reservoir'):
+        raise ValueError(f"ไม่รู้จัก sample_mode: {sample_mode}")
+
+    rng = np.random.default_rng(random_state)
+    reservoir = None
+    seen = 0
+
+    with pd.read_csv(file_path, sep=delimiter, header=header, usecols=column_filter(usecols),
+                     chunksize=chunksize, memory_map=memory_map) as reader:
+        for chunk in reader:
+            chunk = chunk.reset_index(drop=True)
+
+            # เติมตัวอย่างจนครบ sample_rows
+            free = sample_rows if reservoir is None else sample_rows - len(reservoir)
+            if free > 0:
+                head = chunk.iloc[:free]
+                head.index = range(seen, seen + len(head))
+                reservoir = head if reservoir is None else pd.concat([reservoir, head])
+                chunk = chunk.iloc[free:]
+                seen += len(head)
+
+            if sample_mode == 'head':
+                if len(reservoir) >= sample_rows:
+                    break
+                continue
+
+            if chunk.empty:
+                continue
+
+            # Reservoir sampling: แถวที่ i ถูกเลือกด้วยความน่าจะเป็น k/(i+1)
+            positions = seen + np.arange(len(chunk))
+            slots = rng.integers(0, positions + 1)
+            hit_rows = np.flatnonzero(slots < sample_rows)
+            seen += len(chunk)
+            if hit_rows.size == 0:
+                continue
+
+            # ถ้าหลายแถวได้ slot เดียวกัน แถวที่มาทีหลังชนะ
+            hit_slots = slots[hit_rows][::-1]
+            unique_slots, first = np.unique(hit_slots, return_index=True)
+            replacement = chunk.iloc[hit_rows[::-1][first]]
+            replacement.index = unique_slots
+            reservoir = pd.concat([reservoir.drop(index=unique_slots), replacement])
+
+    if reservoir is None:
+        # ไฟล์มีแค่ header
+        return pd.read_csv(file_path, sep=delimiter, header=header,
+                           usecols=column_filter(usecols), nrows=0)
+
+    return reservoir.sort_index()
+
+
+def guess_column_types(file_path, delimiter=',', has_headers=True,
+                       sample_mode=None, sample_rows=100000, chunksize=50000,
+                       confidence=0.95, random_state=None, usecols=None, engine='c',
+                       memory_map=False):
     """
     อ่านไฟล์ CSV และคาดเดา data type ของแต่ละ column
-    
+
     Parameters:
     - file_path: ที่อยู่ของไฟล์ CSV
     - delimiter: ตัวคั่นในไฟล์ (default: ,)
     - has_headers: มี headers หรือไม่ (default: True)
-    
+    - sample_mode: None อ่านทั้งไฟล์, 'head' ใช้ chunk แรกๆ,
+      'reservoir' สุ่มตัวอย่างจากทั้งไฟล์ (default: None)
+    - sample_rows: จำนวนแถวของตัวอย่าง (default: 100000)
+    - chunksize: จำนวนแถวต่อ chunk ตอนอ่านตัวอย่าง (default: 50000)
+    - confidence: ค่าความมั่นใจขั้นต่ำ ถ้าต่ำกว่านี้จะสแกน column นั้นทั้งไฟล์ใหม่ (default: 0.95)
+    - random_state: seed สำหรับ 'reservoir' (default: None)
+    - usecols: list ของ columns ที่ต้องการ อ่านเฉพาะ columns เหล่านี้ (default: None)
+    - engine: 'c' หรือ 'pyarrow' สำหรับการอ่านทั้งไฟล์ (default: 'c')
+    - memory_map: อ่านไฟล์ผ่าน memory map หรือไม่ (default: False)
+
     Returns:
     - tuple: (success, column_types หรือ error message)
     """
     try:
-        # อ่านไฟล์ CSV
-        df = pd.read_csv(file_path, sep=delimiter, low_memory=False, 
-                        header=0 if has_headers else None)
+        header = 0 if has_headers else None
 
-        column_types = {}
+        if sample_mode is None:
+            # อ่านไฟล์ CSV ทั้งไฟล์
+            df = read_csv(file_path, engine, sep=delimiter, low_memory=False,
+                          header=header, usecols=column_filter(usecols),
+                          memory_map=memory_map)
 
-        # วิเคราะห์ data type ของแต่ละ column
-        for column in df.columns:
-            # ตรวจสอบว่าเป็น datetime format หรือไม่
-            is_datetime = all(re.match(r'\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}', str(value)) 
-                            for value in df[column].dropna())
+            # วิเคราะห์ data type ของแต่ละ column
+            return (True, infer_frame_types(df))
 
-            # ตรวจสอบว่าเป็น date format หรือไม่
-            is_date = all(re.match(r'\d{4}-\d{2}-\d{2}', str(value)) 
-                        for value in df[column].dropna())
-
-            # กำหนด data type
-            if is_datetime:
-                inferred_type = 'datetime64'
-            elif is_date:
-                inferred_type = 'date'
-            else:
-                inferred_type = pd.api.types.infer_dtype(df[column], skipna=True)
+        # อ่านเฉพาะตัวอย่างข้อมูล
+        sample = _read_sample(file_path, delimiter, header, sample_mode,
+                              sample_rows, chunksize, random_state, usecols, memory_map)
 
+        column_types = {}
+        ambiguous = []
+        for column in sample.columns:
+            inferred_type, score = _infer_series_type(sample[column])
             column_types[column] = inferred_type
+            if score < confidence:
+                ambiguous.append(column)
+
+        # สแกนใหม่ทั้งไฟล์เฉพาะ columns ที่ตัวอย่างยังไม่ชัดเจน
+        if ambiguous:
+            rescanned = read_csv(file_path, engine, sep=delimiter, low_memory=False,
+                                 header=header, usecols=ambiguous, memory_map=memory_map)
+            for column in ambiguous:
+                column_types[column] = _infer_series_type(rescanned[column])[0]
 
         return (True, column_types)
     
@@ -66,9 +312,144 @@ def correct_column_types(column_types):
     for col, dtype in column_types.items():
         if dtype == 'date':
             corrected[col] = 'datetime64'
-        elif dtype == 'floating':
+        elif dtype in ('floating', 'mixed-integer-float'):
             corrected[col] = 'float64'
+        elif dtype == 'integer':
+            corrected[col] = 'int64'
+        elif dtype == 'boolean':
+            corrected[col] = 'bool'
+        elif dtype in ('mixed', 'mixed-integer', 'empty'):
+            corrected[col] = 'object'
+        elif dtype == 'month_year':
+            # เก็บเป็นข้อความไว้ให้ clean_loan_data แปลงตาม format
+            corrected[col] = 'string'
+        elif dtype == 'percent':
+            # อ่านเป็นข้อความแล้วแปลงเป็นสัดส่วนด้วย parse_percent หลัง parse
+            corrected[col] = 'percent'
+        elif dtype == 'category':
+            # ค่าไม่ซ้ำน้อย อ่านเป็น category (integer codes) ตั้งแต่ตอน parse
+            corrected[col] = 'category'
         else:
             corrected[col] = dtype
     
     return corrected
+
+
+def _downcast_target(values):
+    """
+    เลือก dtype ที่เล็กที่สุดที่เก็บค่าใน column ได้โดยไม่เสียค่า
+
+    Parameters:
+    - values: Series ตัวเลข
+
+    Returns:
+    - string ของ dtype (ไม่แปลงถ้าเท่ากับ dtype เดิม)
+    """
+    non_null = values.dropna()
+    integer = pd.api.types.is_integer_dtype(values)
+    whole = integer or (
+        len(non_null) == len(values) and np.all(np.mod(non_null.to_numpy(), 1) == 0))
+
+    # จำนวนเต็มที่ไม่มี null ใช้ integer ที่ครอบคลุมช่วงค่าที่พบ
+    if whole:
+        low, high = non_null.min(), non_null.max()
+        for dtype in DOWNCAST_INTEGER_TYPES:
+            limits = np.iinfo(dtype)
+            if limits.min <= low and high <= limits.max:
+                return dtype
+        if integer:
+            return 'int64'
+
+    return 'float32'
+
+
+def _check_downcast(values, dtype, float_decimals):
+    """
+    ตรวจว่าแปลง column เป็น dtype แล้วค่ายังเหมือนเดิมหรือไม่
+
+    Parameters:
+    - values: Series ตัวเลข
+    - dtype: dtype ที่จะแปลงเป็น
+    - float_decimals: จำนวนตำแหน่งทศนิยมที่ float ต้องรักษาไว้
+
+    Returns:
+    - None ถ้าผ่าน หรือ string ของเหตุผลที่ไม่ผ่าน
+    """
+    target = np.dtype(dtype)
+    non_null = values.dropna().to_numpy(dtype='float64')
+
+    if target.kind in 'iu':
+        if len(non_null) < len(values):
+            return f"มีค่า null แปลงเป็น {dtype} ไม่ได้"
+        if not np.all(np.mod(non_null, 1) == 0):
+            return f"มีค่าทศนิยม แปลงเป็น {dtype} ไม่ได้"
+        limits = np.iinfo(target)
+        if non_null.size and (non_null.min() < limits.min or non_null.max() > limits.max):
+            return f"มีค่าเกินช่วงของ {dtype}"
+        return None
+
+    # float: ค่าที่แปลงแล้วต้องเท่าเดิมเมื่อปัดเป็นทศนิยม float_decimals ตำแหน่ง
+    converted = non_null.astype(target).astype('float64')
+    if not np.array_equal(np.round(converted, float_decimals), np.round(non_null, float_decimals)):
+        return f"{dtype} รักษาค่าที่ทศนิยม {float_decimals} ตำแหน่งไม่ได้"
+    return None
+
+
+def downcast_numeric_columns(df, column_dtypes=None, float_decimals=4):
+    """
+    ลดขนาด numeric columns เป็น dtype ที่เล็กที่สุดที่ปลอดภัยตามช่วงค่าที่พบ
+
+    จำนวนเต็มใช้ int8/int16/int32 ส่วนทศนิยมใช้ float32 เมื่อค่าที่ปัดเป็น
+    float_decimals ตำแหน่งยังเหมือนเดิม column ที่ไม่ผ่านการตรวจจะคง dtype เดิม
+
+    Parameters:
+    - df: DataFrame ที่ต้องการลดขนาด
+    - column_dtypes: dictionary ของ column และ dtype ที่ต้องการ
+      ('auto' = เลือกเอง, None = ไม่แปลง) column ที่ไม่ได้ระบุถือเป็น 'auto' (default: None)
+    - float_decimals: จำนวนตำแหน่งทศนิยมที่ float32 ต้องรักษาไว้ (default: 4)
+
+    Returns:
+    - tuple: (DataFrame ที่แปลงแล้ว, report)
+      report มี bytes_before, bytes_after, bytes_saved, converted (column: 'เดิม -> ใหม่')
+      และ failed_checks (column: เหตุผล)
+    """
+    column_dtypes = column_dtypes or {}
+    new_dtypes = {}
+    converted = {}
+    failed_checks = {}
+
+    for column in df.columns:
+        values = df[column]
+        dtype = column_dtypes.get(column, 'auto')
+        if dtype is None or values.empty:
+            continue
+        if not pd.api.types.is_numeric_dtype(values) or pd.api.types.is_bool_dtype(values):
+            if dtype != 'auto':
+                failed_checks[column] = f"ไม่ใช่ column ตัวเลข แปลงเป็น {dtype} ไม่ได้"
+            continue
+
+        if dtype == 'auto':
+            dtype = _downcast_target(values)
+        if np.dtype(dtype) == values.dtype:
+            continue
+
+        reason = _check_downcast(values, dtype, float_decimals)
+        if reason:
+            failed_checks[column] = reason
+            continue
+
+        new_dtypes[column] = dtype
+        converted[column] = f'{values.dtype} -> {dtype}'
+
+    bytes_before = int(df.memory_usage(index=False).sum())
+    result = df.astype(new_dtypes) if new_dtypes else df
+    bytes_after = int(result.memory_usage(index=False).sum())
+
+    report = {
+        'bytes_before': bytes_before,
+        'bytes_after': bytes_after,
+        'bytes_saved': bytes_before - bytes_after,
+        'converted': converted,
+        'failed_checks': failed_checks
+    }
+    return (result, report)
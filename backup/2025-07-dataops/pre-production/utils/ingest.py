@@ -0,0 +1,326 @@
+"""
+ฟังก์ชันสำหรับอ่านไฟล์ input
+ไฟล์นี้รวมการคาดเดา data types และการอ่านข้อมูลไว้ด้วยกัน
+เพื่อให้ parse ไฟล์ CSV เพียงครั้งเดียว
+"""
+
+import pandas as pd
+
+from utils.csv_reader import read_csv
+from utils.data_types import infer_frame_types, correct_column_types, column_filter
+from utils.parallel_reader import read_csv_parallel, concat_frames
+from utils.parsers import parse_percent
+
+
+# dtypes ที่ปล่อยให้ parser เลือกเอง เพราะถ้าบังคับแล้วมีค่า null
+# ในแถวที่ตัวอย่างไม่ได้ครอบคลุม การอ่านจะล้มเหลว
+PARSER_INFERRED_DTYPES = ('int64', 'bool')
+
+# types ที่ pd.read_csv ไม่รู้จัก อ่านเป็น dtype นี้ก่อนแล้วแปลงหลัง parse
+READ_AS_DTYPES = {'percent': 'string'}
+
+
+def build_read_options(column_types):
+    """
+    แยก column types เป็น dtype และ parse_dates สำหรับ pd.read_csv
+
+    Parameters:
+    - column_types: dictionary จาก correct_column_types
+
+    Returns:
+    - tuple: (dtype dictionary, list ของ datetime columns)
+    """
+    # แยก datetime columns ออกมาเพื่อใช้ parse_dates แทน
+    datetime_columns = [col for col, dtype in column_types.items() if dtype == 'datetime64']
+
+    # สร้าง dtype dict ใหม่โดยไม่รวม datetime columns
+    dtype_for_read = {col: READ_AS_DTYPES.get(dtype, dtype) for col, dtype in column_types.items()
+                      if dtype != 'datetime64' and dtype not in PARSER_INFERRED_DTYPES}
+
+    return dtype_for_read, datetime_columns
+
+
+def apply_column_types(df, column_types):
+    """
+    แปลง columns ของ DataFrame ที่อ่านมาแล้วตาม column types (แก้ไขใน df เดิม)
+
+    Parameters:
+    - df: DataFrame ที่อ่านจาก CSV โดยไม่ระบุ dtype
+    - column_types: dictionary จาก correct_column_types
+
+    Returns:
+    - DataFrame เดิมที่แปลง types แล้ว
+    """
+    dtype_for_read, datetime_columns = build_read_options(column_types)
+
+    for col in datetime_columns:
+        if col in df.columns:
+            df[col] = pd.to_datetime(df[col])
+
+    for col, dtype in dtype_for_read.items():
+        if col in df.columns and df[col].dtype != pd.api.types.pandas_dtype(dtype):
+            df[col] = df[col].astype(dtype)
+
+    return convert_percent_columns(df, column_types)
+
+
+def convert_percent_columns(df, column_types):
+    """
+    แปลง columns ที่เป็น percent strings เป็นสัดส่วน (แก้ไขใน df เดิม)
+
+    Parameters:
+    - df: DataFrame ที่อ่านจาก CSV
+    - column_types: dictionary จาก correct_column_types
+
+    Returns:
+    - DataFrame เดิมที่แปลง percent columns แล้ว
+    """
+    for col, dtype in column_types.items():
+        if dtype == 'percent' and col in df.columns and not pd.api.types.is_numeric_dtype(df[col]):
+            df[col] = parse_percent(df[col])
+
+    return df
+
+
+def add_counts(total, counts):
+    """
+    บวกจำนวนของ chunk หนึ่งเข้ากับ total (แก้ไข total เดิม)
+
+    Parameters:
+    - total: dictionary ที่สะสมไว้
+    - counts: dictionary ของจำนวน (ซ้อนกันได้) เช่น report จาก filter_rows หรือจาก count_nulls
+
+    Returns:
+    - total
+    """
+    for key, value in counts.items():
+        if isinstance(value, dict):
+            add_counts(total.setdefault(key, {}), value)
+        else:
+            total[key] = total.get(key, 0) + value
+    return total
+
+
+def count_nulls(df):
+    """
+    นับจำนวนแถวและค่า null ของแต่ละ column (null profile) ของ DataFrame หนึ่งส่วน
+
+    Parameters:
+    - df: DataFrame ที่อ่านมา (ทั้งไฟล์หรือ chunk เดียว)
+
+    Returns:
+    - dictionary: {'rows': จำนวนแถว, 'nulls': {column: จำนวน null}}
+    """
+    return {'rows': len(df), 'nulls': {col: int(count) for col, count in df.isnull().sum().items()}}
+
+
+def null_percentages(null_profile):
+    """
+    คำนวณเปอร์เซ็นต์ null ของแต่ละ column จาก null profile
+
+    Parameters:
+    - null_profile: dictionary จาก count_nulls (หรือผลรวมจาก add_counts)
+
+    Returns:
+    - Series ของเปอร์เซ็นต์ null แยกตาม column
+    """
+    nulls = pd.Series(null_profile.get('nulls', {}), dtype='float64')
+    return nulls / max(null_profile.get('rows', 0), 1) * 100
+
+
+def drop_high_null_columns(df, null_profile, max_null_percentage):
+    """
+    ลบ columns ที่ null profile บอกว่ามี null เกินเปอร์เซ็นต์ที่กำหนด
+
+    Parameters:
+    - df: DataFrame
+    - null_profile: dictionary จาก count_nulls ที่นับจากทุกแถวของไฟล์
+    - max_null_percentage: เปอร์เซ็นต์ null สูงสุดที่ยอมรับได้
+
+    Returns:
+    - DataFrame ที่ลบ columns แล้ว (columns ที่ไม่มีใน profile คงไว้)
+    """
+    missing_percentage = null_percentages(null_profile)
+    too_many_nulls = set(missing_percentage[missing_percentage > max_null_percentage].index)
+    return df.drop(columns=[col for col in df.columns if col in too_many_nulls])
+
+
+class TypedChunkReader:
+    """
+    ห่อ reader ของ pd.read_csv แบบ chunksize ให้แปลง types ที่ parser ทำไม่ได้
+    และกรองแถวทีละ chunk
+
+    ใช้กับ with และวน loop ได้เหมือน reader เดิม จำนวนแถวที่ถูกกรองสะสมไว้ใน filter_report
+    และ null profile ของทุกแถวที่อ่าน (ก่อนกรอง) สะสมไว้ใน null_profile
+    """
+
+    def __init__(self, reader, column_types, row_filter=None):
+        """
+        Parameters:
+        - reader: TextFileReader จาก pd.read_csv(..., chunksize=...)
+          หรือ None ถ้าใช้เฉพาะ prepare() กับ DataFrame ที่อ่านด้วยวิธีอื่น
+        - column_types: dictionary จาก correct_column_types
+        - row_filter: function ที่รับ DataFrame แล้วคืน (DataFrame ที่กรองแล้ว, report)
+          เช่น filter_rows หรือ None ถ้าไม่กรอง (default: None)
+        """
+        self.reader = reader
+        self.column_types = column_types
+        self.row_filter = row_filter
+        self.filter_report = {}
+        self.null_profile = {}
+
+    def prepare(self, chunk):
+        """นับค่า null แปลง percent columns และกรองแถวของ DataFrame หนึ่งส่วน"""
+        add_counts(self.null_profile, count_nulls(chunk))
+        chunk = convert_percent_columns(chunk, self.column_types)
+        if self.row_filter is None:
+            return chunk
+
+        chunk, report = self.row_filter(chunk)
+        add_counts(self.filter_report, report)
+        return chunk
+
+    def __iter__(self):
+        for chunk in self.reader:
+            yield self.prepare(chunk)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        """ปิดไฟล์ที่ reader เปิดไว้"""
+        self.reader.close()
+
+
+def read_typed_csv(file_path, delimiter=',', has_headers=True, column_types=None,
+                   usecols=None, engine='c', workers=1, memory_map=False,
+                   row_filter=None, chunksize=100000, max_null_percentage=None):
+    """
+    อ่านไฟล์ CSV ครั้งเดียวให้ได้ DataFrame ที่มี data types ถูกต้อง
+
+    ถ้าไม่ระบุ column_types จะคาดเดาจากข้อมูลที่อ่านมาแล้ว และแปลง columns
+    ในที่แทนการอ่านไฟล์ซ้ำ
+
+    ถ้าระบุ row_filter และรู้ column_types แล้ว จะกรองแถวทีละ chunk (หรือทีละช่วงเมื่อใช้ workers)
+    แถวที่ถูกกรองจึงไม่อยู่ใน DataFrame ทั้งไฟล์ ส่วนการคาดเดา types ต้องใช้ข้อมูลทั้งหมด
+    และ engine='pyarrow' อ่านทั้งไฟล์ในครั้งเดียว จึงกรองหลังอ่าน
+    report ของการกรองเก็บไว้ใน df.attrs['filter_report']
+
+    null profile ของทุกแถวที่อ่าน (ก่อนกรองแถว) นับระหว่าง parse และเก็บไว้ใน df.attrs['null_profile']
+    ถ้าระบุ max_null_percentage จะลบ columns ที่มี null เกินกำหนดด้วย profile นี้
+    (ก่อนรวม chunks เป็น DataFrame เดียว หรือก่อนแปลง types เมื่อคาดเดาจากข้อมูล)
+
+    Parameters:
+    - file_path: ที่อยู่ของไฟล์ CSV
+    - delimiter: ตัวคั่นในไฟล์ (default: ,)
+    - has_headers: มี headers หรือไม่ (default: True)
+    - column_types: dictionary จาก correct_column_types หรือ None (default: None)
+    - usecols: list ของ columns ที่ต้องการ อ่านเฉพาะ columns เหล่านี้ (default: None)
+    - engine: 'c' หรือ 'pyarrow' (default: 'c')
+    - workers: จำนวน process สำหรับ parse แบบแบ่งช่วง ใช้เมื่อรู้ column_types แล้ว
+      (default: 1 คือไม่แบ่ง)
+    - memory_map: อ่านไฟล์ผ่าน memory map หรือไม่ (default: False)
+    - row_filter: function ที่รับ DataFrame แล้วคืน (DataFrame ที่กรองแล้ว, report)
+      เช่น filter_rows หรือ None ถ้าไม่กรอง (default: None)
+    - chunksize: จำนวนแถวต่อ chunk เมื่อกรองแถวระหว่างอ่าน (default: 100000)
+    - max_null_percentage: เปอร์เซ็นต์ null สูงสุดของ columns ที่เก็บไว้
+      หรือ None ถ้าไม่ลบ columns ระหว่างอ่าน (default: None)
+
+    Returns:
+    - tuple: (success, DataFrame หรือ error message, column_types ที่แก้ไขแล้ว)
+    """
+    try:
+        header = 0 if has_headers else None
+
+        # รู้ types อยู่แล้ว (จาก cache หรือจากตัวอย่าง) อ่านพร้อมแปลงเลย
+        if column_types is not None:
+            dtype_for_read, datetime_columns = build_read_options(column_types)
+            if workers > 1:
+                prepared = TypedChunkReader(None, column_types, row_filter)
+                df = read_csv_parallel(file_path, workers, delimiter, has_headers,
+                                       usecols=usecols, transform=prepared.prepare,
+                                       dtype=dtype_for_read, parse_dates=datetime_columns)
+                null_profile = prepared.null_profile
+                if max_null_percentage is not None:
+                    df = drop_high_null_columns(df, null_profile, max_null_percentage)
+            elif row_filter is not None and engine != 'pyarrow':
+                with read_typed_csv_chunks(file_path, delimiter, has_headers, column_types,
+                                           usecols, chunksize, memory_map, row_filter) as prepared:
+                    frames = list(prepared)
+                null_profile = prepared.null_profile
+                if max_null_percentage is not None:
+                    # เลือก columns ของแต่ละ chunk ก่อนรวม columns ที่ลบจึงไม่ถูก copy
+                    frames = [drop_high_null_columns(frame, null_profile, max_null_percentage)
+                              for frame in frames]
+                df = concat_frames(frames)
+            else:
+                # Arrow อ่านทั้งไฟล์ในครั้งเดียว จึงนับ null แปลง และกรองแถวทั้ง DataFrame หลังอ่าน
+                prepared = TypedChunkReader(None, column_types, row_filter)
+                df = prepared.prepare(read_csv(file_path, engine, sep=delimiter, header=header,
+                                               usecols=column_filter(usecols), memory_map=memory_map,
+                                               dtype=dtype_for_read, parse_dates=datetime_columns))
+                null_profile = prepared.null_profile
+                if max_null_percentage is not None:
+                    df = drop_high_null_columns(df, null_profile, max_null_percentage)
+
+            if row_filter is not None:
+                df.attrs['filter_report'] = prepared.filter_report
+            df.attrs['null_profile'] = null_profile
+            return (True, df, column_types)
+
+        # ยังไม่รู้ types: อ่านครั้งเดียว แล้วคาดเดาจากข้อมูลในหน่วยความจำ
+        df = read_csv(file_path, engine, sep=delimiter, header=header,
+                      usecols=column_filter(usecols), low_memory=False,
+                      memory_map=memory_map)
+        column_types = correct_column_types(infer_frame_types(df))
+
+        # columns ที่จะถูกลบไม่ต้องแปลง types (แต่ยังคาดเดา types ไว้ให้ schema cache ครบทุก column)
+        null_profile = count_nulls(df)
+        if max_null_percentage is not None:
+            df = drop_high_null_columns(df, null_profile, max_null_percentage)
+        apply_column_types(df, column_types)
+
+        if row_filter is not None:
+            df, report = row_filter(df)
+            df.attrs['filter_report'] = report
+
+        df.attrs['null_profile'] = null_profile
+        return (True, df, column_types)
+
+    except Exception as e:
+        return (False, str(e), column_types)
+
+
+def read_typed_csv_chunks(file_path, delimiter=',', has_headers=True, column_types=None,
+                          usecols=None, chunksize=100000, memory_map=False, row_filter=None):
+    """
+    อ่านไฟล์ CSV ทีละ chunk ด้วย data types ที่รู้ล่วงหน้า
+
+    ทุก chunk ต้องได้ dtype เดียวกัน จึงต้องระบุ column_types (จาก cache หรือจากตัวอย่าง)
+
+    Parameters:
+    - file_path: ที่อยู่ของไฟล์ CSV
+    - delimiter: ตัวคั่นในไฟล์ (default: ,)
+    - has_headers: มี headers หรือไม่ (default: True)
+    - column_types: dictionary จาก correct_column_types
+    - usecols: list ของ columns ที่ต้องการ (default: None)
+    - chunksize: จำนวนแถวต่อ chunk (default: 100000)
+    - memory_map: อ่านไฟล์ผ่าน memory map หรือไม่ (default: False)
+    - row_filter: function ที่กรองแถวของแต่ละ chunk เหมือนใน read_typed_csv (default: None)
+
+    Returns:
+    - TypedChunkReader ที่ให้ DataFrame ทีละ chunk
+    """
+    if column_types is None:
+        raise ValueError("การอ่านทีละ chunk ต้องระบุ column_types")
+
+    dtype_for_read, datetime_columns = build_read_options(column_types)
+
+    reader = pd.read_csv(file_path, sep=delimiter, header=0 if has_headers else None,
+                         usecols=column_filter(usecols), dtype=dtype_for_read,
+                         parse_dates=datetime_columns, chunksize=chunksize,
+                         memory_map=memory_map)
+    return TypedChunkReader(reader, column_types, row_filter)
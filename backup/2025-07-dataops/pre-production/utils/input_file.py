@@ -0,0 +1,89 @@
+"""
+ฟังก์ชันสำหรับเปิดไฟล์ input
+ไฟล์นี้เปิดไฟล์แบบ memory map เพื่อให้การอ่านหลายรอบ (checksum, fingerprint,
+แบ่งช่วง parse) ใช้ page cache ของระบบร่วมกันโดยไม่ต้อง copy ผ่าน buffer ของ Python
+และเปิดไฟล์ที่บีบอัด (.gz, .zst) แบบแตกไฟล์ทีละส่วนโดยไม่สร้างไฟล์ชั่วคราว
+"""
+
+import gzip
+import io
+import mmap
+import os
+from contextlib import contextmanager
+
+
+# นามสกุลของไฟล์บีบอัดที่รองรับ (ตรงกับ compression='infer' ของ pd.read_csv)
+COMPRESSION_EXTENSIONS = {
+    '.gz': 'gzip',
+    '.zst': 'zstd'
+}
+
+
+def detect_compression(file_path):
+    """
+    ตรวจสอบชนิดการบีบอัดของไฟล์จากนามสกุล
+
+    Parameters:
+    - file_path: ที่อยู่ของไฟล์
+
+    Returns:
+    - 'gzip', 'zstd' หรือ None ถ้าไม่ได้บีบอัด
+    """
+    extension = os.path.splitext(str(file_path))[1].lower()
+    return COMPRESSION_EXTENSIONS.get(extension)
+
+
+def decompress_stream(stream, compression):
+    """
+    ห่อ binary stream ให้อ่านได้เป็นข้อมูลที่แตกไฟล์แล้ว
+
+    Parameters:
+    - stream: file object ของข้อมูลที่บีบอัด (หรือไม่บีบอัด)
+    - compression: 'gzip', 'zstd' หรือ None
+
+    Returns:
+    - file object สำหรับอ่านข้อมูลที่แตกไฟล์แล้ว
+    """
+    if compression == 'gzip':
+        return gzip.GzipFile(fileobj=stream, mode='rb')
+    if compression == 'zstd':
+        import zstandard
+        return io.BufferedReader(zstandard.ZstdDecompressor().stream_reader(stream))
+    return stream
+
+
+@contextmanager
+def open_decompressed(file_path):
+    """
+    เปิดไฟล์เป็น binary stream ของข้อมูลที่แตกไฟล์แล้ว (ไฟล์ที่ไม่ได้บีบอัดเปิดตามปกติ)
+
+    Parameters:
+    - file_path: ที่อยู่ของไฟล์
+
+    Returns:
+    - context manager ที่ให้ file object สำหรับอ่านทีละบรรทัด
+    """
+    with open(file_path, 'rb') as raw:
+        with decompress_stream(raw, detect_compression(file_path)) as f:
+            yield f
+
+
+@contextmanager
+def open_mapped(file_path):
+    """
+    เปิดไฟล์แบบ memory map (อ่านอย่างเดียว)
+
+    Parameters:
+    - file_path: ที่อยู่ของไฟล์
+
+    Returns:
+    - context manager ที่ให้ mmap object (หรือ bytes ว่างถ้าไฟล์ว่าง เพราะ mmap ไฟล์ว่างไม่ได้)
+      ไฟล์ที่บีบอัดจะได้ bytes ที่ยังไม่แตกไฟล์
+    """
+    with open(file_path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            yield b''
+            return
+
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            yield mapped
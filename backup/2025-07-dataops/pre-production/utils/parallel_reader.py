@@ -0,0 +1,178 @@
+"""
+ฟังก์ชันสำหรับอ่านไฟล์ CSV ขนาดใหญ่แบบขนาน
+ไฟล์นี้แบ่งไฟล์เป็นช่วง bytes ที่เริ่มต้นตรงกับต้นแถว แล้ว parse แต่ละช่วง
+ใน process pool ก่อนนำมาต่อกันตามลำดับเดิม
+"""
+
+import io
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+from utils.input_file import open_mapped, detect_compression
+
+
+# ขนาดขั้นต่ำของแต่ละช่วง ไฟล์เล็กกว่านี้ไม่คุ้มกับการเปิด process ใหม่
+MIN_RANGE_BYTES = 16 * 1024 * 1024
+
+QUOTE = b'"'
+NEWLINE = b'\n'
+
+
+def _count_quotes(data, start, end, block_size):
+    """นับจำนวน quote ในช่วง bytes [start, end) ของข้อมูล"""
+    count = 0
+    for block_start in range(start, end, block_size):
+        count += data[block_start:min(block_start + block_size, end)].count(QUOTE)
+    return count
+
+
+def _next_row_start(data, offset, in_quotes):
+    """
+    หา byte offset ของต้นแถวถัดไปหลัง offset
+
+    newline ที่อยู่ใน quoted field ไม่ใช่จุดจบแถว จึงต้องรู้ว่า offset
+    อยู่ใน quotes หรือไม่ (จำนวน quote ก่อนหน้าเป็นเลขคี่) แล้วไล่ต่อจากตรงนั้น
+    """
+    position = offset
+
+    while True:
+        newline = data.find(NEWLINE, position)
+        if newline == -1:
+            return len(data)
+
+        in_quotes ^= data[position:newline].count(QUOTE) % 2 == 1
+        if not in_quotes:
+            return newline + 1
+        position = newline + 1
+
+
+def find_row_boundaries(file_path, num_ranges, has_headers=True, block_size=1024 * 1024):
+    """
+    แบ่งไฟล์ CSV เป็นช่วง bytes ที่แต่ละช่วงเริ่มต้นที่ต้นแถว
+
+    Parameters:
+    - file_path: ที่อยู่ของไฟล์ CSV
+    - num_ranges: จำนวนช่วงที่ต้องการ (อาจได้น้อยกว่านี้ถ้าแถวยาวมาก)
+    - has_headers: มี headers หรือไม่ ถ้ามีช่วงแรกจะเริ่มหลังบรรทัด header (default: True)
+    - block_size: จำนวน bytes ที่นับ quotes ต่อครั้ง (default: 1 MB)
+
+    Returns:
+    - list ของ tuple (start, end) เรียงตามลำดับในไฟล์
+    """
+    with open_mapped(file_path) as data:
+        file_size = len(data)
+        data_start = _next_row_start(data, 0, False) if has_headers else 0
+        boundaries = [data_start]
+        step = (file_size - data_start) / max(num_ranges, 1)
+
+        for i in range(1, num_ranges):
+            target = data_start + int(step * i)
+            previous = boundaries[-1]
+            if target <= previous:
+                continue
+
+            # ต้นแถวก่อนหน้าอยู่นอก quotes เสมอ นับ quotes ต่อจากตรงนั้นถึงจุดที่ตัด
+            in_quotes = _count_quotes(data, previous, target, block_size) % 2 == 1
+            row_start = _next_row_start(data, target, in_quotes)
+            if row_start < file_size:
+                boundaries.append(row_start)
+
+    ends = boundaries[1:] + [file_size]
+    return [(start, end) for start, end in zip(boundaries, ends) if end > start]
+
+
+def _parse_range(task):
+    """parse ช่วง bytes หนึ่งช่วงของไฟล์ (รันใน worker process)"""
+    file_path, start, end, options = task
+
+    # ทุก worker map ไฟล์เดียวกัน จึงใช้ page cache ชุดเดียวกัน
+    with open_mapped(file_path) as data:
+        chunk = data[start:end]
+
+    return pd.read_csv(io.BytesIO(chunk), **options)
+
+
+def read_csv_parallel(file_path, workers, delimiter=',', has_headers=True, usecols=None,
+                      min_range_bytes=MIN_RANGE_BYTES, transform=None, **options):
+    """
+    อ่านไฟล์ CSV โดยแบ่งเป็นช่วงแล้ว parse พร้อมกันหลาย process
+
+    ควรระบุ dtype ของทุก column เพื่อให้ทุกช่วงได้ types เดียวกัน
+    ไฟล์ที่บีบอัดแบ่งตาม byte offset ไม่ได้ จึงอ่านด้วย parser เดียวตามลำดับ
+
+    Parameters:
+    - file_path: ที่อยู่ของไฟล์ CSV
+    - workers: จำนวน process ที่ใช้ parse
+    - delimiter: ตัวคั่นในไฟล์ (default: ,)
+    - has_headers: มี headers หรือไม่ (default: True)
+    - usecols: list ของ columns ที่ต้องการ (default: None)
+    - min_range_bytes: ขนาดขั้นต่ำของแต่ละช่วง (default: 16 MB)
+    - transform: function ที่รับและคืน DataFrame ของแต่ละช่วงก่อนนำมาต่อกัน
+      เช่น กรองแถว (default: None)
+    - options: parameters อื่นๆ ของ pd.read_csv เช่น dtype และ parse_dates
+
+    Returns:
+    - DataFrame ที่มีแถวเรียงตามลำดับในไฟล์
+    """
+    # ชื่อ columns จาก header (หรือเลขลำดับถ้าไม่มี header) ให้ทุกช่วงใช้ชื่อเดียวกัน
+    header = pd.read_csv(file_path, sep=delimiter, header=0 if has_headers else None,
+                         nrows=0 if has_headers else 1)
+    names = list(header.columns)
+
+    options = dict(options, sep=delimiter, header=None, names=names)
+    if usecols is not None:
+        wanted = set(usecols)
+        options['usecols'] = [column for column in names if column in wanted]
+
+    transform = transform or (lambda frame: frame)
+
+    if detect_compression(file_path) is not None:
+        return transform(pd.read_csv(file_path, skiprows=1 if has_headers else None, **options))
+
+    file_size = os.path.getsize(file_path)
+    num_ranges = max(1, min(workers, file_size // min_range_bytes))
+    ranges = find_row_boundaries(file_path, num_ranges, has_headers)
+
+    tasks = [(str(file_path), start, end, options) for start, end in ranges]
+    if len(tasks) <= 1:
+        frames = [transform(_parse_range(task)) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=len(tasks)) as executor:
+            # transform แต่ละช่วงทันทีที่ได้ผล ไม่ต้องเก็บข้อมูลก่อน transform ครบทุกช่วง
+            frames = [transform(frame) for frame in executor.map(_parse_range, tasks)]
+
+    if not frames:
+        # ไฟล์มีแต่ header
+        return transform(pd.read_csv(io.BytesIO(b''), **options))
+
+    return concat_frames(frames)
+
+
+def concat_frames(frames):
+    """
+    ต่อ DataFrame หลายส่วนของไฟล์เดียวกันตามลำดับ โดยคง category columns ไว้
+
+    แต่ละส่วน parse แยกกันจึงได้ categories ต่างกัน ถ้าต่อกันตรงๆ pandas จะแปลงกลับเป็น object
+    จึงให้ทุกส่วนใช้ categories ชุดเดียวกันก่อน (เรียงลำดับเหมือนที่ pd.read_csv สร้างเมื่ออ่านด้วย
+    parser เดียว)
+
+    Parameters:
+    - frames: list ของ DataFrame ที่มี columns เดียวกัน
+
+    Returns:
+    - DataFrame ที่ต่อกันแล้ว (index เริ่มจาก 0)
+    """
+    categories = {}
+    for column in frames[0].columns:
+        if isinstance(frames[0][column].dtype, pd.CategoricalDtype):
+            combined = union_categoricals([frame[column] for frame in frames],
+                                          sort_categories=True)
+            categories[column] = pd.CategoricalDtype(combined.categories)
+
+    if categories:
+        frames = [frame.astype(categories) for frame in frames]
+
+    return pd.concat(frames, ignore_index=True)
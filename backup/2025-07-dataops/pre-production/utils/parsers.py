@@ -0,0 +1,135 @@
+"""
+ฟังก์ชันสำหรับแปลงข้อความเป็นค่าที่ใช้คำนวณได้
+ไฟล์นี้แปลงเฉพาะค่าที่ไม่ซ้ำกันแล้วกระจายผลกลับไปทุกแถวผ่าน integer codes
+เพื่อให้ column ที่มีค่าซ้ำมาก (เช่น issue_d ที่มีไม่กี่ร้อยเดือน) แปลงเร็วตามจำนวนค่าที่ไม่ซ้ำ
+"""
+
+import numpy as np
+import pandas as pd
+
+
+def _unique_codes(values):
+    """
+    แยก column เป็น integer codes และค่าที่ไม่ซ้ำกัน (code -1 คือค่า null)
+
+    column แบบ category มี codes อยู่แล้วจึงไม่ต้อง hash ข้อความใหม่
+
+    Parameters:
+    - values: Series ที่ต้องการแยก
+
+    Returns:
+    - tuple: (numpy array ของ codes, Index ของค่าที่ไม่ซ้ำ)
+    """
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        return values.cat.codes.to_numpy(), values.cat.categories
+
+    return pd.factorize(values)
+
+
+def to_datetime_cached(values, format=None):
+    """
+    แปลง column เป็น datetime โดย parse ค่าที่ไม่ซ้ำกันเพียงครั้งเดียว
+
+    ได้ผลเหมือน pd.to_datetime(values, format=format)
+
+    Parameters:
+    - values: Series ของข้อความวันที่
+    - format: รูปแบบวันที่ เช่น '%b-%Y' หรือ None ให้ pandas คาดเดา (default: None)
+
+    Returns:
+    - Series ของ datetime (index และชื่อเดียวกับ values)
+    """
+    codes, uniques = _unique_codes(values)
+    parsed = pd.to_datetime(uniques, format=format).to_numpy()
+
+    # ต่อ NaT ไว้ท้ายสุด ให้ code -1 (ค่า null) เลือกได้ NaT
+    lookup = np.append(parsed, np.array(['NaT'], dtype=parsed.dtype))
+    return pd.Series(lookup[codes], index=values.index, name=values.name)
+
+
+# ตัวอักษรที่ใช้ใน percent string (เทียบเป็น byte)
+_ZERO, _NINE, _DOT, _PERCENT, _MINUS, _PLUS, _SPACE = (ord(c) for c in '09.%-+ ')
+
+# จำนวนหลักสูงสุดที่เก็บใน int64 และหารด้วย 10**scale ได้ค่าที่ใกล้ที่สุดเสมอ
+_MAX_DIGITS = 15
+
+
+def _parse_percent_bytes(strings):
+    """
+    แปลง percent strings เป็น (mantissa, scale) ด้วยการดำเนินการบน byte array
+
+    ค่า ' -10.65% ' ได้ mantissa -1065 และ scale 2 (คือ -10.65 เปอร์เซ็นต์)
+
+    Parameters:
+    - strings: numpy array ของข้อความ (ไม่มีค่า null)
+
+    Returns:
+    - tuple: (numpy array ของ mantissa แบบ int64, numpy array ของจำนวนหลักหลังจุดทศนิยม)
+    """
+    encoded = np.asarray(strings, dtype=object).astype(bytes)
+    width = max(encoded.dtype.itemsize, 1)
+    data = np.frombuffer(encoded.tobytes(), dtype=np.uint8).reshape(len(encoded), width)
+
+    is_digit = (data >= _ZERO) & (data <= _NINE)
+    is_dot = data == _DOT
+    is_percent = data == _PERCENT
+    is_sign = (data == _MINUS) | (data == _PLUS)
+    number_part = is_digit | is_dot
+
+    # ต้องเป็น [เว้นวรรค][เครื่องหมาย]ตัวเลข[.ตัวเลข][%][เว้นวรรค] เท่านั้น
+    invalid = ~(number_part | is_percent | is_sign | (data == _SPACE) | (data == 0)).all(axis=1)
+    invalid |= (is_dot.sum(axis=1) > 1) | (is_percent.sum(axis=1) > 1) | (is_sign.sum(axis=1) > 1)
+    invalid |= ~is_digit.any(axis=1)
+    invalid |= (is_sign & (np.cumsum(number_part, axis=1) > 0)).any(axis=1)
+    invalid |= ((number_part | is_sign) & (np.cumsum(is_percent, axis=1) > 0)).any(axis=1)
+    inside_number = (np.cumsum(number_part, axis=1) > 0) & \
+        (np.cumsum(number_part[:, ::-1], axis=1)[:, ::-1] > 0)
+    invalid |= ((data == _SPACE) & inside_number).any(axis=1)
+    invalid |= is_digit.sum(axis=1) > _MAX_DIGITS
+    if invalid.any():
+        raise ValueError(f"แปลงเป็นเปอร์เซ็นต์ไม่ได้: {strings[np.argmax(invalid)]!r}")
+
+    # ไล่ทีละตำแหน่งตัวอักษร (ตามความกว้างของข้อความ) แต่ทำพร้อมกันทุกค่า
+    mantissa = np.zeros(len(encoded), dtype=np.int64)
+    for position in range(width):
+        digit = is_digit[:, position]
+        mantissa[digit] = mantissa[digit] * 10 + (data[digit, position] - _ZERO)
+
+    scale = (is_digit & (np.cumsum(is_dot, axis=1) > 0)).sum(axis=1)
+    negative = (data == _MINUS).any(axis=1)
+    return np.where(negative, -mantissa, mantissa), scale
+
+
+def parse_percent(values, basis_points=False):
+    """
+    แปลง percent strings (เช่น '10.65%') เป็นสัดส่วน (0.1065) หรือ basis points (1065)
+
+    แปลงเฉพาะค่าที่ไม่ซ้ำกันด้วยการคำนวณบน byte array ไม่สร้าง string ระหว่างทาง
+    ผลเป็นค่า float ที่ใกล้กับเลขทศนิยมนั้นที่สุด (หาร mantissa ด้วย 10**scale ครั้งเดียว)
+
+    Parameters:
+    - values: Series ของ percent strings (เครื่องหมาย % ไม่บังคับ)
+    - basis_points: คืนค่าเป็น basis points แบบจำนวนเต็มแทนสัดส่วน (default: False)
+
+    Returns:
+    - Series ของ float64 (หรือ Int64 ถ้า basis_points) index และชื่อเดียวกับ values
+      ค่า null ได้ NaN/<NA>
+
+    Raises:
+    - ValueError: ถ้ามีค่าที่ไม่ใช่ตัวเลขเปอร์เซ็นต์ หรือละเอียดเกิน basis point
+    """
+    codes, uniques = _unique_codes(values)
+    mantissa, scale = _parse_percent_bytes(np.asarray(uniques, dtype=object))
+
+    if basis_points:
+        # 1 basis point = 0.01% จึงต้องมีทศนิยมไม่เกิน 2 ตำแหน่ง
+        if (scale > 2).any():
+            raise ValueError("ค่าเปอร์เซ็นต์ละเอียดเกิน basis point")
+        parsed = pd.array(mantissa * 10 ** (2 - scale), dtype='Int64')
+        result = parsed.take(codes, allow_fill=True)
+    else:
+        parsed = mantissa / 10.0 ** (scale + 2)
+        # ต่อ NaN ไว้ท้ายสุด ให้ code -1 (ค่า null) เลือกได้ NaN
+        result = np.append(parsed, np.nan)[codes]
+
+    return pd.Series(result, index=values.index, name=values.name)
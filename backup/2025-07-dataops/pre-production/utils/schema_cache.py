@@ -0,0 +1,122 @@
+"""
+ฟังก์ชันสำหรับ cache ผลการวิเคราะห์ data types
+ไฟล์นี้เก็บผลของ correct_column_types ลงดิสก์ โดยใช้ fingerprint ของ header
+และข้อมูลช่วงต้นไฟล์เป็น key เพื่อไม่ต้องวิเคราะห์ใหม่ทุกครั้งที่รัน
+"""
+
+import hashlib
+import json
+import os
+from itertools import islice
+
+from utils.input_file import open_mapped, open_decompressed, detect_compression
+
+
+# เปลี่ยนเลขนี้เมื่อวิธีคาดเดา data types เปลี่ยน เพื่อให้ cache เดิมใช้ไม่ได้
+SCHEMA_CACHE_VERSION = 4
+
+
+def compute_schema_fingerprint(file_path, delimiter=',', has_headers=True, sample_lines=100,
+                               usecols=None):
+    """
+    คำนวณ fingerprint จากบรรทัด header และข้อมูลช่วงต้นไฟล์
+
+    Parameters:
+    - file_path: ที่อยู่ของไฟล์ CSV
+    - delimiter: ตัวคั่นในไฟล์ (default: ,)
+    - has_headers: มี headers หรือไม่ (default: True)
+    - sample_lines: จำนวนบรรทัดข้อมูลที่ใช้คำนวณ (default: 100)
+    - usecols: list ของ columns ที่อ่าน (cache แยกตาม columns ที่เลือก) (default: None)
+
+    Returns:
+    - string ของ fingerprint (sha256 hex)
+    """
+    digest = hashlib.sha256()
+    projection = sorted(usecols) if usecols is not None else None
+    digest.update(f'{SCHEMA_CACHE_VERSION}|{delimiter}|{has_headers}|{projection}|'.encode('utf-8'))
+
+    if detect_compression(file_path) is not None:
+        # ไฟล์บีบอัดต้องแตกไฟล์ก่อน fingerprint จึงเป็นของข้อมูล CSV จริง
+        with open_decompressed(file_path) as f:
+            for line in islice(f, sample_lines + 1):
+                digest.update(line)
+        return digest.hexdigest()
+
+    with open_mapped(file_path) as data:
+        # header 1 บรรทัด + ข้อมูลตัวอย่าง
+        end = 0
+        for _ in range(sample_lines + 1):
+            newline = data.find(b'\n', end)
+            if newline == -1:
+                end = len(data)
+                break
+            end = newline + 1
+        digest.update(data[:end])
+
+    return digest.hexdigest()
+
+
+def load_schema_cache(cache_path):
+    """
+    อ่าน schema cache จากดิสก์
+
+    Parameters:
+    - cache_path: ที่อยู่ของไฟล์ cache
+
+    Returns:
+    - dictionary ที่มี 'fingerprint' และ 'column_types' หรือ None ถ้าไม่มี/อ่านไม่ได้
+    """
+    try:
+        with open(cache_path, 'r', encoding='utf-8') as f:
+            cached = json.load(f)
+    except (OSError, ValueError):
+        return None
+
+    if not isinstance(cached, dict) or 'fingerprint' not in cached or 'column_types' not in cached:
+        return None
+
+    return cached
+
+
+def save_schema_cache(cache_path, fingerprint, column_types):
+    """
+    บันทึก schema cache ลงดิสก์ (เขียนทับ cache เดิม)
+
+    Parameters:
+    - cache_path: ที่อยู่ของไฟล์ cache
+    - fingerprint: fingerprint ของไฟล์ input
+    - column_types: dictionary จาก correct_column_types
+
+    Returns:
+    - bool: สำเร็จหรือไม่
+    """
+    try:
+        # เขียนลงไฟล์ชั่วคราวก่อน เพื่อไม่ให้ได้ cache ที่เขียนไม่ครบ
+        temp_path = f'{cache_path}.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump({'fingerprint': fingerprint, 'column_types': column_types},
+                      f, ensure_ascii=False, indent=2)
+        os.replace(temp_path, cache_path)
+        return True
+
+    except OSError:
+        return False
+
+
+def diff_column_types(old_types, new_types):
+    """
+    เปรียบเทียบ column types ระหว่าง cache เดิมกับผลที่วิเคราะห์ใหม่
+
+    Parameters:
+    - old_types: dictionary ของ column types เดิม
+    - new_types: dictionary ของ column types ใหม่
+
+    Returns:
+    - dictionary ที่มี 'added', 'removed' และ 'changed' เป็น list ของชื่อ column
+    """
+    return {
+        'added': [col for col in new_types if col not in old_types],
+        'removed': [col for col in old_types if col not in new_types],
+        'changed': [col for col in new_types
+                    if col in old_types and old_types[col] != new_types[col]]
+    }
@@ -0,0 +1,291 @@
+"""
+ฟังก์ชันสำหรับดาวน์โหลดไฟล์ต้นทาง
+ไฟล์นี้ดาวน์โหลดไฟล์ input แบบมีเงื่อนไข (ETag/Last-Modified) ดาวน์โหลดต่อจากเดิม
+เมื่อถูกขัดจังหวะ (Range) และตรวจสอบ checksum ระหว่างดาวน์โหลด
+"""
+
+import contextlib
+import hashlib
+import json
+import os
+import re
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+
+def load_fetch_state(state_path):
+    """
+    อ่านสถานะการดาวน์โหลดครั้งก่อนจากดิสก์
+
+    Parameters:
+    - state_path: ที่อยู่ของไฟล์สถานะ
+
+    Returns:
+    - dictionary ของสถานะ หรือ dictionary ว่างถ้าไม่มี/อ่านไม่ได้
+    """
+    try:
+        with open(state_path, 'r', encoding='utf-8') as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+    return state if isinstance(state, dict) else {}
+
+
+def save_fetch_state(state_path, state):
+    """
+    บันทึกสถานะการดาวน์โหลดลงดิสก์ (เขียนทับสถานะเดิม)
+
+    Parameters:
+    - state_path: ที่อยู่ของไฟล์สถานะ
+    - state: dictionary ของสถานะ
+    """
+    temp_path = f'{state_path}.tmp'
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        json.dump(state, f, ensure_ascii=False, indent=2)
+    os.replace(temp_path, state_path)
+
+
+def mark_source_loaded(state_path):
+    """
+    บันทึกว่าไฟล์ที่ดาวน์โหลดล่าสุดถูกโหลดเข้าฐานข้อมูลเรียบร้อยแล้ว
+
+    Parameters:
+    - state_path: ที่อยู่ของไฟล์สถานะ
+    """
+    state = load_fetch_state(state_path)
+    if state:
+        state['loaded'] = True
+        save_fetch_state(state_path, state)
+
+
+def _validators(response):
+    """ดึง ETag และ Last-Modified จาก response"""
+    return {
+        'etag': response.headers.get('ETag'),
+        'last_modified': response.headers.get('Last-Modified')
+    }
+
+
+def _hash_file(file_path, digest, block_size, on_block=None):
+    """อัปเดต digest ด้วยข้อมูลที่มีอยู่แล้วในไฟล์ (และส่งต่อให้ on_block ถ้าระบุ)"""
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+            if on_block is not None:
+                on_block(block)
+
+
+def _open(url, headers, timeout):
+    """ส่ง GET request (HTTPError ของ 304/416 ถูกคืนเป็น response แทนการ raise)"""
+    request = urllib.request.Request(url, headers=headers)
+    try:
+        return urllib.request.urlopen(request, timeout=timeout)
+    except urllib.error.HTTPError as e:
+        if e.code in (304, 416):
+            return e
+        raise
+
+
+def _content_range(response):
+    """แยก Content-Range เป็น (start, end, total) หรือ None ถ้าไม่มี/ไม่รู้ขนาดไฟล์"""
+    match = re.match(r'bytes (\d+)-(\d+)/(\d+)', response.headers.get('Content-Range', ''))
+    if match is None:
+        return None
+    return tuple(int(value) for value in match.groups())
+
+
+def _write_at(file_path, offset, response, block_size):
+    """เขียนข้อมูลจาก response ลงไฟล์ที่ตำแหน่ง offset และคืนจำนวน bytes ที่เขียน"""
+    written = 0
+    with open(file_path, 'r+b') as f:
+        f.seek(offset)
+        for block in iter(lambda: response.read(block_size), b''):
+            f.write(block)
+            written += len(block)
+    return written
+
+
+def _download_ranges(url, file_path, first_response, validator, connections,
+                     block_size, timeout):
+    """
+    ดาวน์โหลดไฟล์เป็นหลายช่วงพร้อมกันลงไฟล์ที่จองขนาดไว้แล้ว
+
+    ช่วงแรกมาจาก first_response (206) ส่วนที่เหลือแบ่งให้ threads ละช่วง
+    แต่ละช่วงส่ง If-Range เพื่อให้แน่ใจว่าทุกช่วงมาจากไฟล์ต้นทางเวอร์ชันเดียวกัน
+    """
+    _, first_end, total_size = _content_range(first_response)
+    with open(file_path, 'wb') as f:
+        f.truncate(total_size)
+
+    start = first_end + 1
+    part_size = max(block_size, -(-(total_size - start) // connections))
+    ranges = [(offset, min(offset + part_size, total_size) - 1)
+              for offset in range(start, total_size, part_size)]
+
+    def fetch_range(range_start, range_end):
+        headers = {'Range': f'bytes={range_start}-{range_end}'}
+        if validator:
+            headers['If-Range'] = validator
+        with _open(url, headers, timeout) as response:
+            if response.getcode() != 206 or _content_range(response)[:2] != (range_start, range_end):
+                raise ValueError("ไฟล์ต้นทางเปลี่ยนระหว่างดาวน์โหลดแบบแบ่งช่วง")
+            return _write_at(file_path, range_start, response, block_size)
+
+    with ThreadPoolExecutor(max_workers=max(len(ranges), 1)) as executor:
+        futures = [executor.submit(fetch_range, *byte_range) for byte_range in ranges]
+        received = _write_at(file_path, 0, first_response, block_size)
+        received += sum(future.result() for future in futures)
+
+    if received != total_size:
+        raise ValueError(f"ดาวน์โหลดไม่ครบ: ได้ {received:,} จาก {total_size:,} bytes")
+    return (received, len(ranges) + 1)
+
+
+def fetch_source(url, dest_path, state_path, expected_sha256=None, timeout=60,
+                 block_size=1024 * 1024, connections=1, on_block=None):
+    """
+    ดาวน์โหลดไฟล์ต้นทางเมื่อมีการเปลี่ยนแปลง
+
+    - ส่ง If-None-Match/If-Modified-Since จากการดาวน์โหลดครั้งก่อน (304 = ไม่เปลี่ยน)
+    - ถ้ามีไฟล์ .part ที่ค้างอยู่จะขอเฉพาะส่วนที่เหลือด้วย Range และ If-Range
+    - ถ้า connections > 1 และ server รองรับ Range จะดาวน์โหลดหลายช่วงพร้อมกัน
+      (server ที่ไม่รองรับจะได้ stream เดียวตามปกติ)
+    - ตรวจ sha256 และแทนที่ไฟล์เดิมเมื่อข้อมูลครบและถูกต้องเท่านั้น
+
+    Parameters:
+    - url: URL ของไฟล์ต้นทาง
+    - dest_path: ที่อยู่ของไฟล์ปลายทาง
+    - state_path: ที่อยู่ของไฟล์สถานะ (validators และ checksum ของการดาวน์โหลดครั้งก่อน)
+    - expected_sha256: checksum ที่ต้องได้ หรือ None ถ้าไม่ตรวจ (default: None)
+    - timeout: timeout ของการเชื่อมต่อเป็นวินาที (default: 60)
+    - block_size: จำนวน bytes ที่อ่านต่อครั้ง และขนาดของช่วงแรก (default: 1 MB)
+    - connections: จำนวนการเชื่อมต่อพร้อมกัน (default: 1)
+    - on_block: function ที่รับข้อมูลทีละ block ตามลำดับในไฟล์ เช่น ส่งให้ parser
+      ระหว่างดาวน์โหลด (ใช้ stream เดียวเสมอเพราะต้องได้ข้อมูลตามลำดับ) (default: None)
+
+    Returns:
+    - tuple: (success, dictionary ของผลลัพธ์ หรือ error message)
+      ผลลัพธ์มี 'changed' (ไฟล์เปลี่ยนจากครั้งก่อนหรือไม่), 'loaded' (ไฟล์เดิมถูกโหลดแล้วหรือไม่),
+      'sha256', 'bytes' (จำนวน bytes ที่ดาวน์โหลดรอบนี้), 'resumed', 'connections'
+      และ 'elapsed' (วินาที)
+    """
+    try:
+        state = load_fetch_state(state_path)
+        if state.get('url') != url:
+            state = {}
+        partial_path = f'{dest_path}.part'
+        partial = state.get('partial') or {}
+
+        headers = {}
+        offset = 0
+        ranged = False
+        if os.path.exists(partial_path) and (partial.get('etag') or partial.get('last_modified')):
+            # ดาวน์โหลดต่อเฉพาะเมื่อไฟล์ต้นทางยังเป็นเวอร์ชันเดิม (If-Range)
+            offset = os.path.getsize(partial_path)
+            headers['Range'] = f'bytes={offset}-'
+            headers['If-Range'] = partial.get('etag') or partial['last_modified']
+        else:
+            if os.path.exists(dest_path) and state.get('sha256'):
+                if state.get('etag'):
+                    headers['If-None-Match'] = state['etag']
+                if state.get('last_modified'):
+                    headers['If-Modified-Since'] = state['last_modified']
+            if connections > 1 and on_block is None:
+                # ขอช่วงแรกก่อน ถ้าได้ 206 จะรู้ขนาดไฟล์และแบ่งช่วงที่เหลือ ถ้าได้ 200 ใช้ stream เดียว
+                headers['Range'] = f'bytes=0-{block_size - 1}'
+                ranged = True
+
+        started = time.perf_counter()
+        response = _open(url, headers, timeout)
+        with response:
+            if response.getcode() == 304:
+                return (True, {'changed': False, 'loaded': state.get('loaded', False),
+                               'sha256': state['sha256'], 'bytes': 0, 'resumed': False,
+                               'connections': 0, 'elapsed': time.perf_counter() - started})
+
+            if response.getcode() == 416:
+                if 'Range' not in headers:
+                    return (False, "server ตอบ 416 ทั้งที่ไม่ได้ขอ Range")
+                # ส่วนที่ค้างไว้ใช้ไม่ได้แล้ว (หรือไฟล์ว่างจนแบ่งช่วงไม่ได้) เริ่มดาวน์โหลดใหม่ทั้งไฟล์
+                with contextlib.suppress(FileNotFoundError):
+                    os.remove(partial_path)
+                state.pop('partial', None)
+                save_fetch_state(state_path, state)
+                # ช่วงแรกของการแบ่งช่วงใช้ไม่ได้ ดาวน์โหลดใหม่แบบ stream เดียว (ไม่ส่ง Range อีก)
+                return fetch_source(url, dest_path, state_path, expected_sha256, timeout, block_size,
+                                    1 if ranged else connections, on_block)
+
+            # บันทึก validators ก่อนเริ่มเขียน เพื่อให้ดาวน์โหลดต่อได้ถ้าถูกขัดจังหวะ
+            state['url'] = url
+            state['partial'] = _validators(response)
+            save_fetch_state(state_path, state)
+
+            resumed = response.getcode() == 206 and not ranged
+            if response.getcode() == 206 and ranged and not _content_range(response):
+                # server ไม่บอกขนาดไฟล์ แบ่งช่วงไม่ได้ ดาวน์โหลดใหม่แบบ stream เดียว
+                return fetch_source(url, dest_path, state_path, expected_sha256,
+                                    timeout, block_size, connections=1)
+
+            if response.getcode() == 206 and ranged:
+                validator = state['partial']['etag'] or state['partial']['last_modified']
+                try:
+                    received, used_connections = _download_ranges(
+                        url, partial_path, response, validator, connections, block_size, timeout)
+                except Exception:
+                    # ไฟล์ที่จองขนาดไว้มีช่องว่าง ดาวน์โหลดต่อจากไฟล์นี้ไม่ได้
+                    os.remove(partial_path)
+                    state.pop('partial', None)
+                    save_fetch_state(state_path, state)
+                    raise
+                digest = hashlib.sha256()
+                _hash_file(partial_path, digest, block_size)
+            else:
+                digest = hashlib.sha256()
+                if resumed:
+                    content_range = response.headers.get('Content-Range', '')
+                    if not content_range.startswith(f'bytes {offset}-'):
+                        return (False, f"Content-Range ไม่ตรงกับส่วนที่ดาวน์โหลดไว้: {content_range}")
+                    _hash_file(partial_path, digest, block_size, on_block)
+                    mode = 'ab'
+                else:
+                    mode = 'wb'
+
+                received = 0
+                used_connections = 1
+                with open(partial_path, mode) as f:
+                    for block in iter(lambda: response.read(block_size), b''):
+                        f.write(block)
+                        digest.update(block)
+                        received += len(block)
+                        if on_block is not None:
+                            on_block(block)
+
+                expected_length = response.headers.get('Content-Length')
+                if expected_length is not None and received != int(expected_length):
+                    return (False, f"ดาวน์โหลดไม่ครบ: ได้ {received:,} จาก {int(expected_length):,} bytes")
+        elapsed = time.perf_counter() - started
+
+        sha256 = digest.hexdigest()
+        if expected_sha256 and sha256 != expected_sha256.lower():
+            os.remove(partial_path)
+            state.pop('partial', None)
+            save_fetch_state(state_path, state)
+            return (False, f"checksum ไม่ตรงกัน: {sha256}")
+
+        os.replace(partial_path, dest_path)
+
+        # เนื้อหาเหมือนเดิม (เช่น server ไม่ส่ง validators) ถือว่าไม่เปลี่ยน
+        changed = sha256 != state.get('sha256')
+        loaded = state.get('loaded', False) and not changed
+        new_state = dict(state.pop('partial'), url=url, sha256=sha256, loaded=loaded)
+        save_fetch_state(state_path, new_state)
+
+        return (True, {'changed': changed, 'loaded': loaded, 'sha256': sha256,
+                       'bytes': received, 'resumed': resumed,
+                       'connections': used_connections, 'elapsed': elapsed})
+
+    except Exception as e:
+        return (False, str(e))
@@ -0,0 +1,129 @@
+"""
+ฟังก์ชันสำหรับ staging cache ของข้อมูลดิบ
+ไฟล์นี้เก็บ DataFrame ที่อ่านจาก CSV แล้ว (แปลง types และเลือก columns แล้ว)
+เป็นไฟล์ Parquet เพื่อให้การรันซ้ำโหลดข้อมูลได้ทันทีโดยไม่ต้อง parse CSV ใหม่
+"""
+
+import hashlib
+import json
+import os
+
+import pandas as pd
+
+from utils.input_file import open_mapped
+from utils.schema_cache import SCHEMA_CACHE_VERSION
+
+
+# เปลี่ยนเลขนี้เมื่อรูปแบบของ staging file เปลี่ยน เพื่อให้ staging เดิมใช้ไม่ได้
+STAGING_CACHE_VERSION = 1
+
+
+def compute_file_checksum(file_path):
+    """
+    คำนวณ checksum ของไฟล์ทั้งไฟล์ (อ่านผ่าน memory map)
+
+    Parameters:
+    - file_path: ที่อยู่ของไฟล์
+
+    Returns:
+    - string ของ checksum (sha256 hex)
+    """
+    with open_mapped(file_path) as data:
+        return hashlib.sha256(data).hexdigest()
+
+
+def compute_staging_key(checksum, usecols=None, row_filters=None, max_null_percentage=None,
+                        inference=None):
+    """
+    สร้าง key ของ staging cache จาก checksum ของไฟล์ input และ schema version
+
+    Parameters:
+    - checksum: checksum จาก compute_file_checksum
+    - usecols: list ของ columns ที่อ่าน (staging แยกตาม columns ที่เลือก) (default: None)
+    - row_filters: list ชื่อ row filters ที่ใช้ระหว่างอ่าน (staging แยกตาม filters) (default: None)
+    - max_null_percentage: เปอร์เซ็นต์ null ที่ใช้ลบ columns ระหว่างอ่าน
+      (staging แยกตามเกณฑ์) (default: None)
+    - inference: dictionary ของการตั้งค่าที่ใช้คาดเดา types เช่น sample_mode และ confidence
+      (staging แยกตามการตั้งค่า) (default: None)
+
+    Returns:
+    - string ของ key
+    """
+    projection = sorted(usecols) if usecols is not None else None
+    filters = sorted(row_filters) if row_filters else None
+    settings = sorted(inference.items()) if inference else None
+    return (f'{STAGING_CACHE_VERSION}|{SCHEMA_CACHE_VERSION}|{projection}|{filters}|'
+            f'{max_null_percentage}|{settings}|{checksum}')
+
+
+def _metadata_path(staging_path):
+    """ที่อยู่ของไฟล์ metadata ที่เก็บคู่กับ staging file"""
+    return f'{staging_path}.json'
+
+
+def load_staging_cache(staging_path, key):
+    """
+    อ่าน DataFrame จาก staging file ถ้า key ตรงกัน
+
+    Parameters:
+    - staging_path: ที่อยู่ของไฟล์ Parquet
+    - key: key จาก compute_staging_key
+
+    Returns:
+    - tuple: (DataFrame, column_types) หรือ None ถ้าไม่มี/key ไม่ตรง/อ่านไม่ได้
+      df.attrs (เช่น filter_report) ได้คืนจาก metadata
+    """
+    try:
+        with open(_metadata_path(staging_path), 'r', encoding='utf-8') as f:
+            metadata = json.load(f)
+    except (OSError, ValueError):
+        return None
+
+    if not isinstance(metadata, dict) or metadata.get('key') != key:
+        return None
+
+    try:
+        df = pd.read_parquet(staging_path)
+    except Exception:
+        # ไม่มี parquet engine หรือไฟล์เสีย ให้อ่านจาก CSV แทน
+        return None
+
+    df.attrs.update(metadata.get('attrs', {}))
+    return (df, metadata['column_types'])
+
+
+def save_staging_cache(staging_path, key, df, column_types):
+    """
+    บันทึก DataFrame ลง staging file (เขียนทับ staging เดิม)
+
+    Parameters:
+    - staging_path: ที่อยู่ของไฟล์ Parquet
+    - key: key จาก compute_staging_key
+    - df: DataFrame ที่อ่านและแปลง types แล้ว (df.attrs เก็บไว้ใน metadata)
+    - column_types: dictionary จาก correct_column_types
+
+    Returns:
+    - bool: สำเร็จหรือไม่
+    """
+    metadata_path = _metadata_path(staging_path)
+    temp_path = f'{staging_path}.tmp'
+
+    try:
+        # ลบ metadata เดิมก่อน เพื่อไม่ให้ key เดิมชี้ไปที่ไฟล์ที่เขียนไม่ครบ
+        if os.path.exists(metadata_path):
+            os.remove(metadata_path)
+
+        df.to_parquet(temp_path, index=False)
+        os.replace(temp_path, staging_path)
+
+        with open(f'{metadata_path}.tmp', 'w', encoding='utf-8') as f:
+            json.dump({'key': key, 'column_types': column_types, 'attrs': df.attrs},
+                      f, ensure_ascii=False, indent=2)
+        os.replace(f'{metadata_path}.tmp', metadata_path)
+        return True
+
+    except Exception:
+        # staging เป็นเพียง cache ถ้าเขียนไม่ได้ (เช่น ไม่มี pyarrow) ก็ข้ามไป
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        return False
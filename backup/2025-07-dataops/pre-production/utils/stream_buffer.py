@@ -0,0 +1,156 @@
+"""
+ฟังก์ชันสำหรับส่งข้อมูลระหว่าง thread ที่ดาวน์โหลดกับ parser
+ไฟล์นี้มี buffer ขนาดจำกัดที่อ่านได้เหมือน file object เพื่อให้ pd.read_csv
+parse ข้อมูลได้ทันทีที่ดาวน์โหลดมาถึง
+"""
+
+import io
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+
+# เครื่องหมายจบข้อมูลใน queue
+_END = object()
+
+
+class BlockStream(io.RawIOBase):
+    """
+    Buffer ระหว่าง producer (ดาวน์โหลด) กับ consumer (parser)
+
+    producer เรียก put() ทีละ block และ finish() เมื่อจบ ถ้า buffer เต็ม put() จะรอ
+    จนกว่า consumer อ่านออกไป consumer อ่านผ่าน read()/readinto() เหมือนไฟล์
+    """
+
+    def __init__(self, max_blocks=16):
+        """
+        Parameters:
+        - max_blocks: จำนวน block สูงสุดที่ค้างใน buffer (default: 16)
+        """
+        super().__init__()
+        self._queue = queue.Queue(max_blocks)
+        self._block = b''
+        self._position = 0
+        self._finished = False
+        self._error = None
+        self._reader_closed = threading.Event()
+        self._has_data = threading.Event()
+
+    def readable(self):
+        return True
+
+    def _put(self, item):
+        """ใส่ item ลง queue โดยหยุดรอถ้า consumer ปิด stream ไปแล้ว"""
+        while not self._reader_closed.is_set():
+            try:
+                self._queue.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+        raise OSError("parser หยุดอ่านข้อมูลแล้ว")
+
+    def put(self, block):
+        """ส่งข้อมูลหนึ่ง block ให้ parser (เรียกจาก thread ที่ดาวน์โหลด)"""
+        if block:
+            self._put(bytes(block))
+            self._has_data.set()
+
+    def finish(self, error=None):
+        """
+        แจ้งว่าข้อมูลหมดแล้ว (เรียกจาก thread ที่ดาวน์โหลด)
+
+        Parameters:
+        - error: error message ถ้าดาวน์โหลดไม่สำเร็จ parser จะได้ OSError แทนการจบไฟล์
+        """
+        self._error = error
+        self._has_data.set()
+        try:
+            self._put(_END)
+        except OSError:
+            pass
+
+    def wait_for_data(self):
+        """
+        รอจนกว่าจะมีข้อมูลแรกหรือ producer จบ
+
+        Returns:
+        - bool: มีข้อมูลให้อ่านหรือไม่ (False เช่น ได้ 304 ไม่มี body)
+        """
+        self._has_data.wait()
+        return not self._queue.empty() and self._queue.queue[0] is not _END
+
+    def readinto(self, buffer):
+        """อ่านข้อมูลลง buffer (คืน 0 เมื่อจบข้อมูล)"""
+        if self._position >= len(self._block):
+            if self._finished:
+                return 0
+            item = self._queue.get()
+            if item is _END:
+                self._finished = True
+                if self._error:
+                    raise OSError(self._error)
+                return 0
+            self._block, self._position = item, 0
+
+        size = min(len(buffer), len(self._block) - self._position)
+        buffer[:size] = self._block[self._position:self._position + size]
+        self._position += size
+        return size
+
+    def close(self):
+        """ปิด stream ฝั่ง consumer ทำให้ producer ที่รออยู่หยุด"""
+        self._reader_closed.set()
+        super().close()
+
+
+def consume_while_producing(produce, consume, max_blocks=16):
+    """
+    รัน producer ใน thread แยก และให้ consumer อ่านข้อมูลที่มาถึงแล้วผ่าน BlockStream
+
+    ถ้า consumer ไม่สำเร็จ (raise หรือคืน tuple ที่ขึ้นต้นด้วย False แบบ read_typed_csv)
+    จะอ่านข้อมูลที่เหลือทิ้งจนจบ เพื่อให้ producer ทำงานจนเสร็จตามปกติ
+
+    Parameters:
+    - produce: function ที่รับ put (ส่งข้อมูลทีละ block) แล้วคืน (success, ผลลัพธ์ หรือ error message)
+    - consume: function ที่รับ file object แล้วคืนผลลัพธ์
+    - max_blocks: จำนวน block สูงสุดที่ค้างใน buffer (default: 16)
+
+    Returns:
+    - tuple: ((success, ผลลัพธ์ของ produce), ผลลัพธ์ของ consume หรือ None,
+      error ของ consume หรือ None)
+      ผลลัพธ์ของ consume เป็น None ถ้าไม่มีข้อมูล หรือ consume ไม่สำเร็จ
+    """
+    stream = BlockStream(max_blocks)
+
+    def run_producer():
+        success, result = (False, "producer หยุดทำงานก่อนจบ")
+        try:
+            success, result = produce(stream.put)
+            return (success, result)
+        finally:
+            stream.finish(None if success else result)
+
+    consumed = None
+    error = None
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        future = executor.submit(run_producer)
+        reader = io.BufferedReader(stream)
+        try:
+            if stream.wait_for_data():
+                consumed = consume(reader)
+                if isinstance(consumed, tuple) and consumed and consumed[0] is False:
+                    # read_typed_csv คืน error แทนการ raise
+                    raise ValueError(consumed[1])
+        except Exception as e:
+            consumed, error = None, e
+        finally:
+            # อ่านส่วนที่เหลือทิ้งก่อนปิด producer จึงไม่ได้ error ว่า parser หยุดอ่าน
+            try:
+                while reader.read(1024 * 1024):
+                    pass
+            except (OSError, ValueError):
+                pass
+            reader.close()
+        produced = future.result()
+
+    return (produced, consumed, error)
@@ -0,0 +1,112 @@
+"""
+Test cases สำหรับการ compile กฎการทำความสะอาด
+ไฟล์นี้ทดสอบ compile_cleaning_rules และ CleaningPlan
+"""
+
+import pytest
+import pandas as pd
+import sys
+from pathlib import Path
+
+# เพิ่ม path เพื่อ import module จาก pre-production
+sys.path.append(str(Path(__file__).parent.parent / 'pre-production'))
+
+from etl.cleaning_rules import compile_cleaning_rules
+from etl.data_cleaning import clean_loan_data, LOAN_CLEANING_RULES
+
+
+class TestCompileCleaningRules:
+    """Test cases สำหรับ compile_cleaning_rules function"""
+
+    @pytest.fixture
+    def loans_df(self):
+        """สร้าง DataFrame ที่มีทั้ง columns ของกฎเดิมและ column ใหม่"""
+        return pd.DataFrame({
+            'application_type': ['Individual', '<NA>', None, 'Joint App', 'Individual'],
+            'emp_length': ['10+ years', None, '< 1 year', None, '5 years'],
+            'issue_d': ['Jan-2018', 'Feb-2018', 'Mar-2018', 'Apr-2018', 'May-2018'],
+            'int_rate': ['10.25%', '15.50%', '8.75%', '12.00%', '9.99%'],
+            'loan_status': ['Current', 'Charged Off', 'Current', 'Default', 'Fully Paid'],
+            'revol_util': ['45.1%', None, '12%', '80.5%', '3%'],
+            'term': [' 36 months', ' 60 months', ' 36 months', ' 36 months', ' 60 months'],
+        }).astype({'application_type': 'string', 'emp_length': 'category'})
+
+    def test_loan_rules_match_clean_loan_data(self, loans_df):
+        """ทดสอบว่ากฎของ LOAN_CLEANING_RULES ที่ compile แล้วได้ผลเหมือน clean_loan_data"""
+        # Arrange
+        plan = compile_cleaning_rules(LOAN_CLEANING_RULES)
+
+        # Act
+        filtered_df, _ = plan.filter_rows(loans_df)
+        result_df = plan.convert_columns(filtered_df.copy())
+
+        # Assert
+        pd.testing.assert_frame_equal(result_df, clean_loan_data(loans_df))
+        assert result_df.index.tolist() == [0, 3, 4]
+        assert result_df['emp_length'].tolist() == ['10+ years', 'N/A', '5 years']
+
+    def test_new_column_rules(self, loans_df):
+        """ทดสอบกฎของ columns ใหม่ (filter หลายข้อ, parse_percent, fill_null ต่อด้วย cast)"""
+        # Arrange
+        rules = LOAN_CLEANING_RULES + [
+            {'type': 'filter', 'column': 'loan_status', 'drop_values': ['Default', 'Charged Off']},
+            {'type': 'parse_percent', 'column': 'revol_util'},
+            {'type': 'fill_null', 'column': 'revol_util', 'value': 0.0},
+            {'type': 'cast', 'column': 'term', 'dtype': 'category'},
+        ]
+        plan = compile_cleaning_rules(rules)
+
+        # Act
+        result_df = clean_loan_data(loans_df, plan=plan)
+        _, report = plan.filter_rows(loans_df)
+
+        # Assert
+        assert result_df.index.tolist() == [0, 4]
+        assert result_df['revol_util'].tolist() == [0.451, 0.03]
+        assert isinstance(result_df['term'].dtype, pd.CategoricalDtype)
+        # แถวที่ filter แรกกรองแล้วไม่ถูกนับซ้ำใน filter ถัดไป
+        assert report['dropped'] == {'application_type_na': 2, 'loan_status_filter': 1}
+
+    def test_filters_see_values_before_conversion(self, loans_df):
+        """ทดสอบว่า filter ดูค่าก่อน fill_null แม้จะประกาศไว้หลังกฎแปลงค่า"""
+        # Arrange
+        plan = compile_cleaning_rules([
+            {'type': 'fill_null', 'column': 'emp_length', 'value': 'N/A'},
+            {'type': 'filter', 'column': 'emp_length', 'drop_null': True},
+        ])
+
+        # Act
+        result_df = clean_loan_data(loans_df, plan=plan)
+
+        # Assert
+        assert result_df.index.tolist() == [0, 2, 4]
+        assert 'N/A' not in result_df['emp_length'].tolist()
+
+    def test_missing_columns_are_skipped(self):
+        """ทดสอบว่ากฎของ columns ที่ไม่มีใน DataFrame ถูกข้ามไป"""
+        # Arrange
+        df = pd.DataFrame({'loan_amnt': [1000, 2000]})
+        plan = compile_cleaning_rules(LOAN_CLEANING_RULES)
+
+        # Act
+        result_df = clean_loan_data(df, plan=plan)
+
+        # Assert
+        pd.testing.assert_frame_equal(result_df, df)
+
+    @pytest.mark.parametrize('rule', [
+        {'type': 'strip', 'column': 'term'},
+        {'type': 'cast', 'column': 'term'},
+        {'type': 'fill_null', 'value': 'N/A'},
+        {'type': 'parse_date', 'column': 'issue_d', 'fmt': '%b-%Y'},
+    ])
+    def test_invalid_rule_raises(self, rule):
+        """ทดสอบว่ากฎที่ไม่รู้จักหรือ options ไม่ครบ/ไม่ถูกต้อง error ตั้งแต่ตอน compile"""
+        # Act / Assert
+        with pytest.raises(ValueError):
+            compile_cleaning_rules([rule])
+
+
+# สำหรับรันทดสอบแบบ standalone
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -8,12 +8,13 @@ import pandas as pd
 import numpy as np
 from datetime import datetime
 import sys
+import tracemalloc
 from pathlib import Path
 
 # เพิ่ม path เพื่อ import module จาก pre-production
 sys.path.append(str(Path(__file__).parent.parent / 'pre-production'))
 
-from etl.data_cleaning import clean_loan_data
+from etl.data_cleaning import clean_loan_data, filter_rows, remove_high_null_columns
 
 
 class TestCleanLoanData:
@@ -58,6 +59,37 @@ class TestCleanLoanData:
         assert len(result_df) == original_count - na_count
         assert '<NA>' not in result_df['application_type'].values
     
+    @pytest.mark.parametrize('dtype', ['object', 'string', 'category'])
+    def test_application_type_null_filter(self, sample_df, dtype):
+        """ทดสอบว่า application_type ที่เป็น null ถูกกรองออกทุก dtype (รวมถึง object)"""
+        # Arrange
+        sample_df['application_type'] = sample_df['application_type'].replace('<NA>', None)
+        sample_df = sample_df.astype({'application_type': dtype})
+        
+        # Act
+        result_df = clean_loan_data(sample_df)
+        
+        # Assert
+        assert len(result_df) == 4
+        assert result_df['application_type'].notna().all()
+    
+    def test_category_columns_match_string_columns(self, sample_df):
+        """ทดสอบว่า columns แบบ category ได้ผลเหมือนแบบข้อความ รวมถึงการกรองค่า null"""
+        # Arrange
+        sample_df['application_type'] = sample_df['application_type'].replace('<NA>', None)
+        string_df = sample_df.astype({'application_type': 'string', 'emp_length': 'string'})
+        category_df = sample_df.astype({'application_type': 'category', 'emp_length': 'category'})
+        
+        # Act
+        expected = clean_loan_data(string_df)
+        result_df = clean_loan_data(category_df)
+        
+        # Assert
+        assert isinstance(result_df['emp_length'].dtype, pd.CategoricalDtype)
+        assert result_df.index.tolist() == expected.index.tolist()
+        assert result_df['emp_length'].tolist() == expected['emp_length'].tolist()
+        assert result_df['application_type'].tolist() == expected['application_type'].tolist()
+    
     def test_issue_d_datetime_conversion(self, sample_df):
         """ทดสอบว่า issue_d ถูกแปลงเป็น datetime"""
         # Act
@@ -89,6 +121,115 @@ class TestCleanLoanData:
         filtered_original = sample_df[sample_df['application_type'] != '<NA>']
         assert result_df['loan_amnt'].tolist() == filtered_original['loan_amnt'].tolist()
         assert result_df['home_ownership'].tolist() == filtered_original['home_ownership'].tolist()
+    
+    @pytest.mark.parametrize('dtype', ['string', 'category'])
+    def test_inplace_matches_copy(self, sample_df, dtype):
+        """ทดสอบว่าแบบ inplace ได้ผลเหมือนแบบสำเนา ทั้งเมื่อมีและไม่มีแถวถูกกรอง"""
+        # Arrange
+        typed_df = sample_df.astype({'application_type': dtype, 'emp_length': dtype})
+        unfiltered_df = typed_df[typed_df['application_type'] != '<NA>'].copy()
+        
+        # Act / Assert
+        for df in (typed_df, unfiltered_df):
+            expected = clean_loan_data(df)
+            result_df = clean_loan_data(df.copy(), inplace=True)
+            pd.testing.assert_frame_equal(result_df, expected)
+    
+    @staticmethod
+    def _peak_memory(clean, df):
+        """วัดหน่วยความจำสูงสุด (bytes) ที่จองเพิ่มระหว่าง clean(df)"""
+        tracemalloc.start()
+        try:
+            start = tracemalloc.get_traced_memory()[0]
+            clean(df)
+            return tracemalloc.get_traced_memory()[1] - start
+        finally:
+            tracemalloc.stop()
+    
+    @pytest.mark.slow
+    def test_inplace_reduces_peak_memory(self):
+        """ทดสอบว่าแบบ inplace ใช้หน่วยความจำสูงสุดน้อยกว่าแบบสำเนาอย่างชัดเจน"""
+        # Arrange
+        rows = 200000
+        rng = np.random.default_rng(0)
+        
+        def make_df():
+            return pd.DataFrame({
+                'application_type': pd.Categorical(
+                    rng.choice(['Individual', 'Joint App', '<NA>'], rows, p=[0.9, 0.05, 0.05])),
+                'emp_length': pd.Categorical(rng.choice(['10+ years', '< 1 year', None], rows)),
+                'issue_d': pd.Categorical(rng.choice(['Jan-2018', 'Dec-2018'], rows)),
+                'int_rate': rng.uniform(0.05, 0.3, rows),
+                **{f'measure_{i}': rng.uniform(0, 50000, rows) for i in range(8)},
+            })
+        
+        # Act
+        copy_peak = self._peak_memory(clean_loan_data, make_df())
+        inplace_peak = self._peak_memory(lambda df: clean_loan_data(df, inplace=True), make_df())
+        
+        # Assert
+        assert inplace_peak < copy_peak * 0.8
+
+
+class TestFilterRows:
+    """Test cases สำหรับ filter_rows function"""
+
+    @pytest.fixture
+    def raw_df(self):
+        """สร้าง DataFrame ที่มีแถวถูกกรองและ column ที่มี null ใกล้เกณฑ์"""
+        return pd.DataFrame({
+            'application_type': ['Individual', '<NA>', None, 'Joint App', '<NA>'],
+            'dti_joint': [None, None, 15.5, None, None],
+            'loan_amnt': [1000, 2000, 3000, 4000, 5000],
+        }).astype({'application_type': 'string'})
+
+    def test_drop_counts(self, raw_df):
+        """ทดสอบว่าแถวที่ถูกกรองตรงกับ clean_loan_data และนับจำนวนของแต่ละ filter"""
+        # Act
+        result_df, report = filter_rows(raw_df)
+
+        # Assert
+        assert result_df['loan_amnt'].tolist() == clean_loan_data(raw_df)['loan_amnt'].tolist()
+        assert report['rows'] == 5
+        assert report['dropped'] == {'application_type_na': 3}
+        assert report['dropped_nulls']['dti_joint'] == 2
+
+    def test_null_percentage_includes_dropped_rows(self, raw_df):
+        """ทดสอบว่าการลบ high null columns หลังกรองแถวได้ผลเหมือนไม่ได้กรองก่อน"""
+        # Arrange
+        expected = remove_high_null_columns(raw_df, 70)
+        filtered_df, report = filter_rows(raw_df)
+
+        # Act
+        result_df = remove_high_null_columns(filtered_df, 70, report)
+
+        # Assert
+        assert list(expected.columns) == ['application_type', 'loan_amnt']
+        assert list(result_df.columns) == list(expected.columns)
+
+    def test_null_profile_replaces_null_count(self, raw_df):
+        """ทดสอบว่า null profile ที่นับระหว่าง parse ให้ผลเหมือนการนับ null จาก DataFrame"""
+        # Arrange
+        expected = remove_high_null_columns(raw_df, 70)
+        filtered_df, _ = filter_rows(raw_df)
+        null_profile = {'rows': 5, 'nulls': raw_df.isnull().sum().to_dict()}
+
+        # Act
+        result_df = remove_high_null_columns(filtered_df, 70, null_profile=null_profile)
+
+        # Assert
+        assert list(result_df.columns) == list(expected.columns)
+
+    def test_null_profile_missing_column_counts_from_frame(self, raw_df):
+        """ทดสอบว่า column ที่ไม่มีใน null profile นับ null จาก DataFrame แทนการถูกลบทิ้ง"""
+        # Arrange
+        null_profile = {'rows': 5, 'nulls': raw_df[['dti_joint']].isnull().sum().to_dict()}
+
+        # Act
+        result_df = remove_high_null_columns(raw_df, 70, null_profile=null_profile)
+
+        # Assert
+        assert list(result_df.columns) == ['application_type', 'loan_amnt']
 
 
 # สำหรับรันทดสอบแบบ standalone
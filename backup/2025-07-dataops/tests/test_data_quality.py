@@ -13,7 +13,7 @@ import sys
 sys.path.append(str(Path(__file__).parent.parent / 'pre-production'))
 
 from etl.dimensions import create_all_dimensions, create_dimension_mappings
-from etl.fact_table import create_fact_table
+from etl.fact_table import create_fact_table, create_star_schema
 from etl.data_cleaning import clean_loan_data
 
 
@@ -105,6 +105,84 @@ class TestDataQuality:
         assert all(fact_table['int_rate'] < 1), "พบ int_rate ที่เกิน 100%"
 
 
+class TestCreateStarSchema:
+    """Test cases สำหรับ create_star_schema function"""
+    
+    @pytest.fixture
+    def prepared_data(self):
+        """สร้าง cleaned data ที่มีค่าซ้ำ ค่า null และ index ที่ไม่เรียงต่อกัน (แถวถูกกรองแล้ว)"""
+        data = {
+            'application_type': ['Individual', 'Joint App', 'Individual', 'Individual', 'Joint App'],
+            'emp_length': ['10+ years', None, '5 years', None, '10+ years'],
+            'issue_d': pd.to_datetime(['2018-01-01', '2018-02-01', '2018-01-01', None, '2018-02-01']),
+            'int_rate': [0.1025, 0.1550, 0.0875, 0.12, 0.099],
+            'home_ownership': ['RENT', 'MORTGAGE', 'OWN', 'RENT', 'RENT'],
+            'loan_status': ['Current', 'Fully Paid', 'Current', 'Current', 'Charged Off'],
+            'loan_amnt': [10000, 20000, 15000, 8000, 25000],
+            'installment': [339.31, 641.59, 489.95, 265.68, 789.45],
+        }
+        return pd.DataFrame(data, index=[0, 2, 3, 7, 8])
+    
+    @staticmethod
+    def build_with_mappings(df):
+        """สร้าง star schema ด้วย create_all_dimensions ตามด้วย create_fact_table"""
+        dimensions = create_all_dimensions(df)
+        return dimensions, create_fact_table(df, create_dimension_mappings(dimensions))
+    
+    @staticmethod
+    def values(column):
+        """ค่าใน column เป็น list (ค่า null เป็น None ทุก dtype)"""
+        return column.astype(object).where(column.notna(), None).tolist()
+    
+    @pytest.mark.parametrize('categorical', [False, True])
+    @pytest.mark.parametrize('builder', ['star_schema', 'mappings'])
+    def test_expected_dimensions_and_ids(self, prepared_data, categorical, builder):
+        """ทดสอบ dimensions และ foreign keys ที่คาดไว้ ค่า null ได้ ID ของตัวเองทั้งสองทาง"""
+        # Arrange
+        if categorical:
+            prepared_data = prepared_data.astype({'emp_length': 'category', 'loan_status': 'category'})
+        build = create_star_schema if builder == 'star_schema' else self.build_with_mappings
+        
+        # Act
+        dimensions, fact_table = build(prepared_data)
+        
+        # Assert
+        assert list(dimensions) == ['home_ownership', 'loan_status', 'application_type',
+                                    'emp_length', 'issue_d']
+        assert self.values(dimensions['home_ownership']['home_ownership']) == ['RENT', 'MORTGAGE', 'OWN']
+        assert self.values(dimensions['emp_length']['emp_length']) == ['10+ years', None, '5 years']
+        assert self.values(dimensions['issue_d']['issue_d']) == [
+            pd.Timestamp('2018-01-01'), pd.Timestamp('2018-02-01'), None]
+        assert self.values(dimensions['issue_d']['month']) == [1, 2, None]
+        for dim_name, dim_df in dimensions.items():
+            assert dim_df[f'{dim_name}_id'].tolist() == list(range(len(dim_df)))
+        
+        expected_ids = {
+            'home_ownership_id': [0, 1, 2, 0, 0],
+            'loan_status_id': [0, 1, 0, 0, 2],
+            'issue_d_id': [0, 1, 0, 2, 1],
+            'application_type_id': [0, 1, 0, 0, 1],
+            'emp_length_id': [0, 1, 2, 1, 0],
+        }
+        assert list(fact_table.columns) == ['loan_amnt', 'int_rate', 'installment'] + list(expected_ids)
+        for column, ids in expected_ids.items():
+            assert fact_table[column].dtype == 'int64'
+            assert fact_table[column].tolist() == ids
+        assert fact_table.index.tolist() == [0, 2, 3, 7, 8]
+    
+    def test_ids_follow_first_appearance(self, prepared_data):
+        """ทดสอบว่า ID ตามลำดับที่พบค่าครั้งแรก และ null เป็นสมาชิกหนึ่งของ dimension"""
+        # Act
+        dimensions, fact_table = create_star_schema(prepared_data)
+        
+        # Assert
+        assert dimensions['loan_status']['loan_status'].tolist() == ['Current', 'Fully Paid', 'Charged Off']
+        assert fact_table['loan_status_id'].tolist() == [0, 1, 0, 0, 2]
+        assert dimensions['emp_length']['emp_length'].isna().tolist() == [False, True, False]
+        assert fact_table['emp_length_id'].tolist() == [0, 1, 2, 1, 0]
+        assert fact_table.index.tolist() == [0, 2, 3, 7, 8]
+
+
 # สำหรับรันทดสอบแบบ standalone
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])
@@ -0,0 +1,196 @@
+"""
+Test cases สำหรับการคาดเดา data types
+ไฟล์นี้ทดสอบ guess_column_types และ correct_column_types
+"""
+
+import pytest
+import pandas as pd
+import sys
+from pathlib import Path
+
+# เพิ่ม path เพื่อ import module จาก pre-production
+sys.path.append(str(Path(__file__).parent.parent / 'pre-production'))
+
+from utils.data_types import guess_column_types, correct_column_types, downcast_numeric_columns
+
+
+class TestGuessColumnTypes:
+    """Test cases สำหรับ guess_column_types function"""
+
+    @pytest.fixture
+    def csv_file(self, tmp_path):
+        """สร้างไฟล์ CSV ตัวอย่างสำหรับทดสอบ"""
+        rows = 1000
+        df = pd.DataFrame({
+            'loan_amnt': [1000.5 + i for i in range(rows)],
+            'created_at': ['2018-01-01 10:00:00'] * rows,
+            'last_pymnt_d': ['2018-01-01'] * rows,
+            'home_ownership': ['RENT', 'OWN'] * (rows // 2),
+            'issue_d': ['Dec-2018', 'Jan-2019'] * (rows // 2),
+            'int_rate': [' 10.65%', '7.5%'] * (rows // 2),
+            # column ที่ chunk แรกเป็นตัวเลขแต่ chunk ถัดไปมีข้อความปน
+            'zip_code': ['123'] * 150 + ['ABC'] * 20 + ['123'] * (rows - 170),
+            # column ที่ช่วงแรกไม่มีค่าเลย
+            'dti_joint': [None] * (rows - 10) + [15.5] * 10,
+            # column ข้อความที่ค่าไม่ซ้ำกันเลย
+            'emp_title': [f'title {i}' for i in range(rows)],
+        })
+        file_path = tmp_path / 'loans.csv'
+        df.to_csv(file_path, index=False)
+        return file_path
+
+    def test_full_scan_types(self, csv_file):
+        """ทดสอบว่าการอ่านทั้งไฟล์คาดเดา types ได้ถูกต้อง"""
+        # Act
+        success, column_types = guess_column_types(csv_file)
+
+        # Assert
+        assert success
+        assert column_types['loan_amnt'] == 'floating'
+        assert column_types['created_at'] == 'datetime64'
+        assert column_types['last_pymnt_d'] == 'date'
+        assert column_types['home_ownership'] == 'category'
+
+    def test_low_cardinality_strings_are_category(self, csv_file):
+        """ทดสอบว่า column ข้อความที่มีค่าไม่ซ้ำน้อยเป็น category ส่วนที่ค่าไม่ซ้ำมากยังเป็น string"""
+        # Act
+        success, column_types = guess_column_types(csv_file)
+        corrected = correct_column_types(column_types)
+
+        # Assert
+        assert success
+        assert column_types['home_ownership'] == 'category'
+        assert column_types['emp_title'] == 'string'
+        assert corrected['home_ownership'] == 'category'
+
+    def test_lending_club_formats(self, csv_file):
+        """ทดสอบว่ารูปแบบ Mon-YYYY และ NN.NN% ของ LendingClub ถูกตรวจพบ"""
+        # Act
+        success, column_types = guess_column_types(csv_file)
+
+        # Assert
+        assert success
+        assert column_types['issue_d'] == 'month_year'
+        assert column_types['int_rate'] == 'percent'
+
+    @pytest.mark.parametrize('sample_mode', ['head', 'reservoir'])
+    def test_sampled_types_match_full_scan(self, csv_file, sample_mode):
+        """ทดสอบว่าการใช้ตัวอย่างได้ผลเหมือนการอ่านทั้งไฟล์"""
+        # Arrange
+        _, expected = guess_column_types(csv_file)
+
+        # Act
+        success, column_types = guess_column_types(
+            csv_file, sample_mode=sample_mode, sample_rows=200,
+            chunksize=100, random_state=0
+        )
+
+        # Assert
+        assert success
+        assert list(column_types) == list(expected)
+        assert column_types == expected
+
+    def test_ambiguous_columns_are_rescanned(self, csv_file):
+        """ทดสอบว่า column ที่ตัวอย่างไม่ชัดเจนถูกสแกนใหม่ทั้งไฟล์"""
+        # Act
+        success, column_types = guess_column_types(
+            csv_file, sample_mode='head', sample_rows=200, chunksize=100
+        )
+
+        # Assert
+        assert success
+        assert column_types['dti_joint'] == 'floating'  # ตัวอย่างไม่มีค่าเลย
+        assert column_types['zip_code'] == 'category'   # ตัวอย่างมีหลายชนิดปนกัน
+
+    def test_missing_file_returns_error(self, tmp_path):
+        """ทดสอบว่าไฟล์ที่ไม่มีอยู่คืนค่า error message"""
+        # Act
+        success, message = guess_column_types(tmp_path / 'missing.csv', sample_mode='head')
+
+        # Assert
+        assert not success
+        assert isinstance(message, str)
+
+
+class TestCorrectColumnTypes:
+    """Test cases สำหรับ correct_column_types function"""
+
+    def test_date_and_float_mapping(self):
+        """ทดสอบว่า date และ floating ถูกแปลงเป็น dtype ของ pandas"""
+        # Act
+        corrected = correct_column_types({'issue_d': 'date', 'dti': 'floating', 'term': 'string'})
+
+        # Assert
+        assert corrected == {'issue_d': 'datetime64', 'dti': 'float64', 'term': 'string'}
+
+    def test_lending_club_formats(self):
+        """ทดสอบว่า month_year อ่านเป็น string ให้ clean_loan_data แปลงต่อ ส่วน percent คงไว้ให้แปลงหลัง parse"""
+        # Act
+        corrected = correct_column_types({'issue_d': 'month_year', 'int_rate': 'percent'})
+
+        # Assert
+        assert corrected == {'issue_d': 'string', 'int_rate': 'percent'}
+
+
+
+class TestDowncastNumericColumns:
+    """Test cases สำหรับ downcast_numeric_columns function"""
+
+    @pytest.fixture
+    def fact_df(self):
+        """สร้าง fact table ตัวอย่างที่เป็น float64/int64 ทั้งหมด"""
+        return pd.DataFrame({
+            'loan_amnt': [10000.0, 25000.0, 35000.0],
+            'annual_inc': [55000.0, None, 120000.0],
+            'dti': [18.46, 37.01, 11.25],
+            'installment': [865.78, 1416.06, 340.44],
+            'home_ownership_id': [0, 1, 2],
+            'issue_d_id': [0, 150, 300],
+            'home_ownership': ['RENT', 'OWN', 'MORTGAGE'],
+        })
+
+    def test_narrowest_safe_types(self, fact_df):
+        """ทดสอบว่าแต่ละ column ได้ dtype ที่เล็กที่สุดที่เก็บค่าได้ครบ"""
+        # Act
+        result, report = downcast_numeric_columns(fact_df, float_decimals=2)
+
+        # Assert
+        assert result['loan_amnt'].dtype == 'int32'
+        assert result['annual_inc'].dtype == 'float32'    # มี null จึงเป็น integer ไม่ได้
+        assert result['dti'].dtype == 'float32'
+        assert result['home_ownership_id'].dtype == 'int8'
+        assert result['issue_d_id'].dtype == 'int16'
+        assert result['home_ownership'].tolist() == fact_df['home_ownership'].tolist()
+        assert report['bytes_saved'] == report['bytes_before'] - report['bytes_after'] > 0
+        assert report['converted']['loan_amnt'] == 'float64 -> int32'
+        pd.testing.assert_frame_equal(result, fact_df, check_dtype=False, atol=1e-4)
+
+    def test_failed_precision_check_keeps_dtype(self, fact_df):
+        """ทดสอบว่า column ที่ float32 รักษาทศนิยมไม่ได้คง float64 และถูกรายงาน"""
+        # Act
+        result, report = downcast_numeric_columns(fact_df, float_decimals=4)
+
+        # Assert
+        assert result['installment'].dtype == 'float64'
+        assert 'installment' in report['failed_checks']
+        assert 'installment' not in report['converted']
+
+    def test_per_column_overrides(self, fact_df):
+        """ทดสอบการกำหนด dtype ราย column รวมถึงการข้ามและ dtype ที่ไม่ปลอดภัย"""
+        # Act
+        result, report = downcast_numeric_columns(fact_df, {
+            'loan_amnt': 'float32',
+            'dti': None,
+            'issue_d_id': 'int8',
+        })
+
+        # Assert
+        assert result['loan_amnt'].dtype == 'float32'
+        assert result['dti'].dtype == 'float64'
+        assert result['issue_d_id'].dtype == 'int64'
+        assert report['failed_checks']['issue_d_id'] == 'มีค่าเกินช่วงของ int8'
+
+
+# สำหรับรันทดสอบแบบ standalone
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
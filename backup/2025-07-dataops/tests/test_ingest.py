@@ -0,0 +1,158 @@
+"""
+Test cases สำหรับการอ่านไฟล์ input
+ไฟล์นี้ทดสอบ read_typed_csv ทั้งแบบรู้ types ล่วงหน้าและแบบอ่านครั้งเดียว
+"""
+
+import pytest
+import pandas as pd
+import sys
+from pathlib import Path
+
+# เพิ่ม path เพื่อ import module จาก pre-production
+sys.path.append(str(Path(__file__).parent.parent / 'pre-production'))
+
+from utils.data_types import guess_column_types, correct_column_types
+from utils.ingest import read_typed_csv, read_typed_csv_chunks
+from etl.data_cleaning import filter_rows
+
+
+class TestReadTypedCsv:
+    """Test cases สำหรับ read_typed_csv function"""
+
+    @pytest.fixture
+    def csv_file(self, tmp_path):
+        """สร้างไฟล์ CSV ตัวอย่างสำหรับทดสอบ"""
+        df = pd.DataFrame({
+            'loan_amnt': [10000, 20000, 15000],
+            'dti': [15.5, None, 18.7],
+            'last_pymnt_d': ['2018-01-01', '2018-02-01', None],
+            'issue_d': ['Jan-2018', 'Feb-2018', 'Mar-2018'],
+            'int_rate': ['10.25%', '15.50%', '8.75%'],
+            'application_type': ['Individual', '<NA>', 'Joint App'],
+        })
+        file_path = tmp_path / 'loans.csv'
+        df.to_csv(file_path, index=False)
+        return file_path
+
+    def test_single_pass_matches_two_pass(self, csv_file):
+        """ทดสอบว่าการอ่านครั้งเดียวได้ผลเหมือนการคาดเดาแล้วอ่านซ้ำ"""
+        # Arrange
+        _, column_types = guess_column_types(csv_file)
+        _, expected, _ = read_typed_csv(csv_file, column_types=correct_column_types(column_types))
+
+        # Act
+        success, result_df, result_types = read_typed_csv(csv_file)
+
+        # Assert
+        assert success
+        assert result_types == correct_column_types(column_types)
+        pd.testing.assert_frame_equal(result_df, expected)
+
+    def test_column_types_are_applied(self, csv_file):
+        """ทดสอบว่า columns ถูกแปลงเป็น dtype ที่คาดเดาได้"""
+        # Act
+        success, result_df, _ = read_typed_csv(csv_file)
+
+        # Assert
+        assert success
+        assert pd.api.types.is_datetime64_any_dtype(result_df['last_pymnt_d'])
+        assert result_df['dti'].dtype == 'float64'
+        assert result_df['int_rate'].tolist() == [0.1025, 0.155, 0.0875]
+
+    def test_usecols_projection(self, csv_file):
+        """ทดสอบว่าอ่านเฉพาะ columns ที่ต้องการ และข้าม columns ที่ไม่มีในไฟล์"""
+        # Act
+        success, result_df, result_types = read_typed_csv(
+            csv_file, usecols=['int_rate', 'loan_amnt', 'not_in_file']
+        )
+
+        # Assert
+        assert success
+        assert list(result_df.columns) == ['loan_amnt', 'int_rate']
+        assert list(result_types) == ['loan_amnt', 'int_rate']
+
+    def test_chunks_convert_percent_columns(self, csv_file):
+        """ทดสอบว่าการอ่านทีละ chunk แปลง percent columns เหมือนการอ่านทั้งไฟล์"""
+        # Arrange
+        _, expected, column_types = read_typed_csv(csv_file)
+
+        # Act
+        with read_typed_csv_chunks(csv_file, column_types=column_types, chunksize=2) as reader:
+            chunks = list(reader)
+
+        # Assert
+        assert len(chunks) == 2
+        pd.testing.assert_frame_equal(pd.concat(chunks, ignore_index=True), expected)
+
+    @pytest.mark.parametrize('typed', [False, True])
+    def test_row_filter_while_reading(self, csv_file, typed):
+        """ทดสอบว่าการกรองแถวระหว่างอ่านได้ผลเหมือนการกรองหลังอ่าน พร้อม report"""
+        # Arrange
+        _, full_df, column_types = read_typed_csv(csv_file)
+        expected = filter_rows(full_df)[0].reset_index(drop=True)
+
+        # Act
+        success, result_df, _ = read_typed_csv(csv_file, column_types=column_types if typed else None,
+                                               row_filter=filter_rows, chunksize=2)
+
+        # Assert
+        assert success
+        pd.testing.assert_frame_equal(result_df.reset_index(drop=True), expected)
+        assert result_df.attrs['filter_report']['rows'] == 3
+        assert result_df.attrs['filter_report']['dropped'] == {'application_type_na': 1}
+
+    def test_row_filter_with_pyarrow(self, csv_file):
+        """ทดสอบว่า engine='pyarrow' กรองแถวหลังอ่านได้ผลเหมือนการกรองทีละ chunk ด้วย C engine"""
+        # Arrange
+        pytest.importorskip('pyarrow')
+        _, _, column_types = read_typed_csv(csv_file)
+        _, expected, _ = read_typed_csv(csv_file, column_types=column_types,
+                                        row_filter=filter_rows, chunksize=2)
+
+        # Act
+        success, result_df, _ = read_typed_csv(csv_file, column_types=column_types,
+                                               engine='pyarrow', row_filter=filter_rows,
+                                               max_null_percentage=30)
+
+        # Assert
+        assert success
+        assert result_df.attrs['filter_report'] == expected.attrs['filter_report']
+        assert result_df.attrs['null_profile'] == expected.attrs['null_profile']
+        assert result_df['loan_amnt'].tolist() == expected['loan_amnt'].tolist()
+        assert list(result_df.columns) == ['loan_amnt', 'issue_d', 'int_rate']
+
+    @pytest.mark.parametrize('mode', ['single_pass', 'typed', 'filtered', 'parallel'])
+    def test_null_profile_prunes_columns(self, csv_file, mode):
+        """ทดสอบว่า null profile นับจากทุกแถวระหว่าง parse และใช้ลบ columns ที่มี null เกินกำหนด"""
+        # Arrange
+        _, full_df, column_types = read_typed_csv(csv_file)
+        options = {
+            'single_pass': {},
+            'typed': {'column_types': column_types},
+            'filtered': {'column_types': column_types, 'row_filter': filter_rows, 'chunksize': 2},
+            'parallel': {'column_types': column_types, 'workers': 2},
+        }[mode]
+
+        # Act
+        success, result_df, _ = read_typed_csv(csv_file, max_null_percentage=30, **options)
+
+        # Assert
+        assert success
+        assert result_df.attrs['null_profile']['rows'] == 3
+        assert result_df.attrs['null_profile']['nulls'] == full_df.isnull().sum().to_dict()
+        # dti, last_pymnt_d และ application_type ('<NA>' อ่านเป็น null) มี null 1 ใน 3 แถว เกิน 30%
+        assert list(result_df.columns) == ['loan_amnt', 'issue_d', 'int_rate']
+
+    def test_missing_file_returns_error(self, tmp_path):
+        """ทดสอบว่าไฟล์ที่ไม่มีอยู่คืนค่า error message"""
+        # Act
+        success, message, _ = read_typed_csv(tmp_path / 'missing.csv')
+
+        # Assert
+        assert not success
+        assert isinstance(message, str)
+
+
+# สำหรับรันทดสอบแบบ standalone
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,145 @@
+"""
+Test cases สำหรับการเปิดไฟล์ input
+ไฟล์นี้ทดสอบ open_mapped การอ่านไฟล์ผ่าน memory map และการอ่านไฟล์ที่บีบอัด
+"""
+
+import gzip
+import pytest
+import pandas as pd
+import sys
+from pathlib import Path
+
+# เพิ่ม path เพื่อ import module จาก pre-production
+sys.path.append(str(Path(__file__).parent.parent / 'pre-production'))
+
+from utils.input_file import open_mapped, open_decompressed, detect_compression
+from utils.ingest import read_typed_csv, read_typed_csv_chunks
+from utils.data_types import guess_column_types
+from utils.schema_cache import compute_schema_fingerprint
+
+
+class TestOpenMapped:
+    """Test cases สำหรับ open_mapped function"""
+
+    def test_maps_file_content(self, tmp_path):
+        """ทดสอบว่าข้อมูลที่ map ได้ตรงกับเนื้อหาของไฟล์"""
+        # Arrange
+        file_path = tmp_path / 'loans.csv'
+        file_path.write_bytes(b'loan_amnt,term\n1000,36 months\n')
+
+        # Act
+        with open_mapped(file_path) as data:
+            content = data[:]
+            first_newline = data.find(b'\n')
+
+        # Assert
+        assert content == b'loan_amnt,term\n1000,36 months\n'
+        assert first_newline == 14
+
+    def test_empty_file(self, tmp_path):
+        """ทดสอบว่าไฟล์ว่างได้ bytes ว่างแทนการ error"""
+        # Arrange
+        file_path = tmp_path / 'empty.csv'
+        file_path.write_bytes(b'')
+
+        # Act
+        with open_mapped(file_path) as data:
+            length = len(data)
+
+        # Assert
+        assert length == 0
+
+    def test_read_typed_csv_with_memory_map(self, tmp_path):
+        """ทดสอบว่าการอ่านผ่าน memory map ได้ผลเหมือนการอ่านปกติ"""
+        # Arrange
+        file_path = tmp_path / 'loans.csv'
+        pd.DataFrame({'loan_amnt': [1000.5, None], 'term': ['36 months', '60 months']}
+                     ).to_csv(file_path, index=False)
+        _, expected, _ = read_typed_csv(file_path)
+
+        # Act
+        success, df, _ = read_typed_csv(file_path, memory_map=True)
+
+        # Assert
+        assert success
+        pd.testing.assert_frame_equal(df, expected)
+
+
+class TestCompressedInput:
+    """Test cases สำหรับการอ่านไฟล์ input ที่บีบอัด"""
+
+    @pytest.fixture
+    def csv_file(self, tmp_path):
+        """สร้างไฟล์ CSV ตัวอย่างสำหรับทดสอบ"""
+        rows = 200
+        df = pd.DataFrame({
+            'loan_amnt': [1000.5 + i for i in range(rows)],
+            'issue_d': ['Dec-2018', 'Jan-2019'] * (rows // 2),
+            'zip_code': ['123'] * 150 + ['ABC'] * (rows - 150),
+        })
+        file_path = tmp_path / 'loans.csv'
+        df.to_csv(file_path, index=False)
+        return file_path
+
+    @pytest.fixture(params=['gzip', 'zstd'])
+    def compressed_file(self, request, csv_file):
+        """บีบอัดไฟล์ CSV ตัวอย่างเป็น .gz หรือ .zst"""
+        data = csv_file.read_bytes()
+        if request.param == 'gzip':
+            file_path = csv_file.with_name('loans.csv.gz')
+            file_path.write_bytes(gzip.compress(data))
+        else:
+            zstandard = pytest.importorskip('zstandard')
+            file_path = csv_file.with_name('loans.csv.zst')
+            file_path.write_bytes(zstandard.ZstdCompressor().compress(data))
+        return file_path
+
+    def test_detect_compression(self):
+        """ทดสอบการตรวจชนิดการบีบอัดจากนามสกุล"""
+        # Assert
+        assert detect_compression('LoanStats_web.csv.gz') == 'gzip'
+        assert detect_compression('LoanStats_web.csv.ZST') == 'zstd'
+        assert detect_compression('LoanStats_web.csv') is None
+
+    def test_open_decompressed(self, csv_file, compressed_file):
+        """ทดสอบว่า stream ที่แตกไฟล์ได้ข้อมูลเหมือนไฟล์ต้นฉบับ"""
+        # Act
+        with open_decompressed(compressed_file) as f:
+            content = f.read()
+
+        # Assert
+        assert content == csv_file.read_bytes()
+
+    def test_fingerprint_uses_decompressed_data(self, csv_file, compressed_file):
+        """ทดสอบว่า fingerprint คำนวณจากข้อมูล CSV ที่แตกไฟล์แล้ว"""
+        # Act
+        fingerprint = compute_schema_fingerprint(compressed_file, sample_lines=10)
+
+        # Assert
+        assert fingerprint == compute_schema_fingerprint(csv_file, sample_lines=10)
+
+    def test_sampled_and_chunked_paths(self, csv_file, compressed_file):
+        """ทดสอบว่าการอ่านตัวอย่าง ทีละ chunk และแบบขนานใช้กับไฟล์บีบอัดได้"""
+        # Arrange
+        _, expected, column_types = read_typed_csv(csv_file)
+
+        # Act
+        success, sampled_types = guess_column_types(compressed_file, sample_mode='head',
+                                                    sample_rows=160, chunksize=50)
+        chunks = list(read_typed_csv_chunks(compressed_file, column_types=column_types,
+                                            chunksize=64, memory_map=True))
+        _, parallel_df, _ = read_typed_csv(compressed_file, column_types=column_types,
+                                           workers=4)
+
+        # Assert
+        assert success
+        assert sampled_types['zip_code'] == 'category'
+        # แต่ละ chunk มี categories ของตัวเอง ต่อกันแล้วจึงต้องแปลงกลับเป็น category
+        combined = pd.concat(chunks, ignore_index=True).astype(expected.dtypes.to_dict())
+        pd.testing.assert_frame_equal(combined, expected)
+        pd.testing.assert_frame_equal(parallel_df, expected)
+
+
+# สำหรับรันทดสอบแบบ standalone
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
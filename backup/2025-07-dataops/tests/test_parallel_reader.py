@@ -0,0 +1,103 @@
+"""
+Test cases สำหรับการอ่านไฟล์ CSV แบบขนาน
+ไฟล์นี้ทดสอบ find_row_boundaries และ read_csv_parallel
+"""
+
+import pytest
+import pandas as pd
+import sys
+from pathlib import Path
+
+# เพิ่ม path เพื่อ import module จาก pre-production
+sys.path.append(str(Path(__file__).parent.parent / 'pre-production'))
+
+from utils.parallel_reader import find_row_boundaries, read_csv_parallel
+from utils.ingest import read_typed_csv
+
+
+class TestParallelReader:
+    """Test cases สำหรับ parallel_reader functions"""
+
+    @pytest.fixture
+    def csv_file(self, tmp_path):
+        """สร้างไฟล์ CSV ที่มี quoted fields ซึ่งมีขึ้นบรรทัดใหม่และ quote ซ้อน"""
+        rows = 300
+        df = pd.DataFrame({
+            'id': range(rows),
+            'desc': [f'line one\nline "{i}"\nline three' if i % 3 == 0 else f'plain {i}'
+                     for i in range(rows)],
+            'loan_amnt': [1000.5 + i for i in range(rows)],
+            'issue_d': ['2018-12-01', '2019-01-01'] * (rows // 2),
+        })
+        file_path = tmp_path / 'loans.csv'
+        df.to_csv(file_path, index=False)
+        return file_path
+
+    def test_boundaries_start_at_rows(self, csv_file):
+        """ทดสอบว่าทุกช่วงเริ่มที่ต้นแถว ไม่ตัดกลาง quoted field"""
+        # Act
+        ranges = find_row_boundaries(csv_file, 8)
+
+        # Assert
+        assert len(ranges) > 1
+        data = Path(csv_file).read_bytes()
+        for start, end in ranges:
+            assert data[start - 1:start] == b'\n'
+            assert data[start:end].count(b'"') % 2 == 0
+        assert ranges[-1][1] == len(data)
+
+    def test_matches_single_reader(self, csv_file):
+        """ทดสอบว่าการอ่านแบบขนานได้ผลเหมือน pd.read_csv"""
+        # Arrange
+        options = {'dtype': {'desc': 'string'}, 'parse_dates': ['issue_d']}
+        expected = pd.read_csv(csv_file, **options)
+
+        # Act
+        result = read_csv_parallel(csv_file, 4, min_range_bytes=1, **options)
+
+        # Assert
+        pd.testing.assert_frame_equal(result, expected)
+
+    def test_category_columns_share_categories(self, csv_file):
+        """ทดสอบว่า category columns จากทุกช่วงต่อกันแล้วยังเป็น category เดียวกัน"""
+        # Arrange
+        options = {'dtype': {'desc': 'string', 'issue_d': 'category'}}
+        expected = pd.read_csv(csv_file, **options)
+
+        # Act
+        result = read_csv_parallel(csv_file, 4, min_range_bytes=1, **options)
+
+        # Assert
+        assert isinstance(result['issue_d'].dtype, pd.CategoricalDtype)
+        pd.testing.assert_frame_equal(result, expected)
+
+    def test_usecols_and_no_headers(self, csv_file, tmp_path):
+        """ทดสอบการเลือก columns และไฟล์ที่ไม่มี header"""
+        # Arrange
+        no_header = tmp_path / 'no_header.csv'
+        no_header.write_bytes(b''.join(Path(csv_file).read_bytes().split(b'\n', 1)[1:]))
+        expected = pd.read_csv(no_header, header=None, usecols=[0, 2])
+
+        # Act
+        result = read_csv_parallel(no_header, 3, has_headers=False, usecols=[0, 2],
+                                   min_range_bytes=1)
+
+        # Assert
+        pd.testing.assert_frame_equal(result, expected)
+
+    def test_read_typed_csv_with_workers(self, csv_file):
+        """ทดสอบว่า read_typed_csv ที่ใช้หลาย process ได้ผลเหมือนการอ่านปกติ"""
+        # Arrange
+        _, expected, column_types = read_typed_csv(csv_file)
+
+        # Act
+        success, df, _ = read_typed_csv(csv_file, column_types=column_types, workers=2)
+
+        # Assert
+        assert success
+        pd.testing.assert_frame_equal(df, expected)
+
+
+# สำหรับรันทดสอบแบบ standalone
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,111 @@
+"""
+Test cases สำหรับการแปลงข้อความเป็นค่าที่ใช้คำนวณได้
+ไฟล์นี้ทดสอบ to_datetime_cached และ parse_percent
+"""
+
+import pytest
+import pandas as pd
+import sys
+from pathlib import Path
+
+# เพิ่ม path เพื่อ import module จาก pre-production
+sys.path.append(str(Path(__file__).parent.parent / 'pre-production'))
+
+from utils.parsers import to_datetime_cached, parse_percent
+
+
+class TestToDatetimeCached:
+    """Test cases สำหรับ to_datetime_cached function"""
+
+    @pytest.fixture
+    def issue_d(self):
+        """สร้าง column เดือนที่มีค่าซ้ำและค่า null พร้อม index ที่ไม่เรียงต่อกัน"""
+        values = ['Dec-2018', 'Jan-2019', None, 'Dec-2018', 'Mar-2011'] * 20
+        return pd.Series(values, index=range(0, 200, 2), name='issue_d', dtype='string')
+
+    def test_matches_to_datetime(self, issue_d):
+        """ทดสอบว่าได้ผลเหมือน pd.to_datetime รวมถึง NaT, index และชื่อ column"""
+        # Arrange
+        expected = pd.to_datetime(issue_d, format='%b-%Y')
+
+        # Act
+        result = to_datetime_cached(issue_d, format='%b-%Y')
+
+        # Assert
+        pd.testing.assert_series_equal(result, expected)
+        assert result.isna().sum() == 20
+
+    def test_category_uses_codes(self, issue_d):
+        """ทดสอบว่า column แบบ category แปลงจาก categories แล้วได้ผลเหมือนกัน"""
+        # Arrange
+        expected = pd.to_datetime(issue_d, format='%b-%Y')
+
+        # Act
+        result = to_datetime_cached(issue_d.astype('category'), format='%b-%Y')
+
+        # Assert
+        pd.testing.assert_series_equal(result, expected)
+
+    def test_invalid_value_raises(self):
+        """ทดสอบว่าค่าที่ไม่ตรงรูปแบบ error เหมือน pd.to_datetime"""
+        # Arrange
+        values = pd.Series(['Dec-2018', 'not a month'])
+
+        # Act / Assert
+        with pytest.raises(ValueError):
+            to_datetime_cached(values, format='%b-%Y')
+
+
+
+class TestParsePercent:
+    """Test cases สำหรับ parse_percent function"""
+
+    @pytest.fixture
+    def int_rate(self):
+        """สร้าง column อัตราดอกเบี้ยที่มีเว้นวรรค เครื่องหมาย และค่า null"""
+        values = [' 10.65%', '7.5%', None, '-0.25%', '18.51% ', '12']
+        return pd.Series(values, index=range(10, 16), name='int_rate', dtype='string')
+
+    def test_fractions(self, int_rate):
+        """ทดสอบว่าแปลงเป็นสัดส่วนที่ใกล้กับเลขทศนิยมที่สุด พร้อม index และชื่อเดิม"""
+        # Act
+        result = parse_percent(int_rate)
+
+        # Assert
+        assert result.dtype == 'float64'
+        assert result.index.tolist() == int_rate.index.tolist()
+        assert result.name == 'int_rate'
+        assert result.isna().tolist() == [False, False, True, False, False, False]
+        assert result.dropna().tolist() == [0.1065, 0.075, -0.0025, 0.1851, 0.12]
+
+    def test_matches_string_conversion(self, int_rate):
+        """ทดสอบว่าผลต่างจากการแปลงด้วย str.rstrip และหาร 100 ไม่เกินความละเอียดของ float"""
+        # Arrange
+        expected = int_rate.str.rstrip().str.rstrip('%').astype('float') / 100.0
+
+        # Act
+        result = parse_percent(int_rate.astype('category'))
+
+        # Assert
+        pd.testing.assert_series_equal(result, expected.astype('float64'), rtol=1e-15)
+
+    def test_basis_points(self, int_rate):
+        """ทดสอบการแปลงเป็น basis points แบบจำนวนเต็ม"""
+        # Act
+        result = parse_percent(int_rate, basis_points=True)
+
+        # Assert
+        assert result.dtype == 'Int64'
+        assert result.tolist() == [1065, 750, pd.NA, -25, 1851, 1200]
+
+    @pytest.mark.parametrize('value', ['abc', '1.2.3%', '5%%', '%5', '1 2%', '1-2%'])
+    def test_invalid_value_raises(self, value):
+        """ทดสอบว่าค่าที่ไม่ใช่ตัวเลขเปอร์เซ็นต์ error เหมือนการแปลงเป็น float"""
+        # Act / Assert
+        with pytest.raises(ValueError):
+            parse_percent(pd.Series(['10%', value]))
+
+
+# สำหรับรันทดสอบแบบ standalone
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,126 @@
+"""
+Test cases สำหรับ Polars engine
+ไฟล์นี้ทดสอบว่า build_star_schema_polars ได้ star schema เหมือนกับ pipeline ของ pandas
+"""
+
+import gzip
+import pytest
+import pandas as pd
+import sys
+from pathlib import Path
+
+# เพิ่ม path เพื่อ import module จาก pre-production
+sys.path.append(str(Path(__file__).parent.parent / 'pre-production'))
+sys.path.append(str(Path(__file__).parent))
+
+from utils.data_types import guess_column_types, correct_column_types
+from utils.ingest import read_typed_csv
+from etl.cleaning_rules import compile_cleaning_rules
+from etl.data_cleaning import (remove_high_null_columns, clean_loan_data, select_columns_for_analysis,
+                               ANALYSIS_COLUMNS, LOAN_CLEANING_RULES)
+from etl.dimensions import create_all_dimensions, create_dimension_mappings
+from etl.fact_table import create_fact_table
+from etl.polars_engine import build_star_schema_polars
+from fixtures.sample_data import get_sample_loan_data
+
+
+class TestBuildStarSchemaPolars:
+    """Test cases สำหรับ build_star_schema_polars function"""
+
+    @pytest.fixture(autouse=True)
+    def require_polars(self):
+        """ข้ามการทดสอบถ้าไม่ได้ติดตั้ง polars"""
+        pytest.importorskip('polars')
+
+    @pytest.fixture
+    def csv_file(self, tmp_path):
+        """สร้างไฟล์ CSV ของข้อมูล loan ตัวอย่างที่มีค่าซ้ำหลายรอบ"""
+        df = pd.concat([get_sample_loan_data()] * 3, ignore_index=True)
+        df.loc[7, 'int_rate'] = ' 7.5 %'
+        file_path = tmp_path / 'loans.csv'
+        df.to_csv(file_path, index=False)
+        return file_path
+
+    @pytest.fixture
+    def column_types(self, csv_file):
+        """data types ที่คาดเดาจากไฟล์ CSV"""
+        _, column_types = guess_column_types(csv_file)
+        return correct_column_types(column_types)
+
+    def run_pandas(self, csv_file, column_types, max_null_percentage, plan=None):
+        """สร้าง star schema ด้วยขั้นตอนของ pandas"""
+        _, raw_df, _ = read_typed_csv(csv_file, ',', True, column_types, usecols=ANALYSIS_COLUMNS)
+        df_cleaned = remove_high_null_columns(select_columns_for_analysis(raw_df), max_null_percentage)
+        df_prepared = clean_loan_data(df_cleaned, plan=plan)
+        dimensions = create_all_dimensions(df_prepared)
+        fact_table = create_fact_table(df_prepared, create_dimension_mappings(dimensions))
+        return dimensions, fact_table.reset_index(drop=True)
+
+    def test_matches_pandas_pipeline(self, csv_file, column_types):
+        """ทดสอบว่า dimensions และ fact table เหมือนกับ pipeline ของ pandas"""
+        # Arrange
+        expected_dimensions, expected_fact = self.run_pandas(csv_file, column_types, 50)
+
+        # Act
+        dimensions, fact_table, stats = build_star_schema_polars(
+            csv_file, column_types, usecols=ANALYSIS_COLUMNS, max_null_percentage=50)
+
+        # Assert
+        assert list(dimensions) == list(expected_dimensions)
+        for dim_name, dim_df in dimensions.items():
+            pd.testing.assert_frame_equal(dim_df, expected_dimensions[dim_name].reset_index(drop=True))
+        pd.testing.assert_frame_equal(fact_table, expected_fact)
+        assert stats['raw_rows'] == 18
+        assert 'annual_inc_joint' not in stats['columns']
+        assert stats['filter_report']['dropped'] == {'application_type_na': 3}
+
+    def test_custom_rules(self, csv_file, column_types):
+        """ทดสอบว่ากฎจาก CLEANING_CONFIG ชุดอื่นได้ผลเหมือน clean_loan_data"""
+        # Arrange
+        plan = compile_cleaning_rules(LOAN_CLEANING_RULES + [
+            {'type': 'filter', 'column': 'loan_status', 'drop_values': ['Charged Off']},
+            {'type': 'cast', 'column': 'loan_amnt', 'dtype': 'float64'},
+        ])
+        _, expected_fact = self.run_pandas(csv_file, column_types, 50, plan)
+
+        # Act
+        dimensions, fact_table, stats = build_star_schema_polars(
+            csv_file, column_types, usecols=ANALYSIS_COLUMNS, max_null_percentage=50, plan=plan)
+
+        # Assert
+        pd.testing.assert_frame_equal(fact_table, expected_fact)
+        assert dimensions['loan_status']['loan_status'].tolist() == ['Current']
+        assert stats['filter_report']['dropped']['loan_status_filter'] == 3
+
+    def test_compressed_input(self, csv_file, tmp_path, column_types):
+        """ทดสอบว่าไฟล์ gzip ได้ผลเหมือนไฟล์ CSV ปกติ"""
+        # Arrange
+        gz_file = tmp_path / 'loans.csv.gz'
+        gz_file.write_bytes(gzip.compress(csv_file.read_bytes()))
+        _, expected_fact, _ = build_star_schema_polars(
+            csv_file, column_types, usecols=ANALYSIS_COLUMNS, max_null_percentage=50)
+
+        # Act
+        _, fact_table, stats = build_star_schema_polars(
+            gz_file, column_types, usecols=ANALYSIS_COLUMNS, max_null_percentage=50)
+
+        # Assert
+        pd.testing.assert_frame_equal(fact_table, expected_fact)
+        assert stats['raw_rows'] == 18
+
+    def test_invalid_percent_raises(self, tmp_path, column_types):
+        """ทดสอบว่าค่าเปอร์เซ็นต์ที่แปลงไม่ได้ error เหมือน parse_percent"""
+        # Arrange
+        df = get_sample_loan_data()
+        df.loc[0, 'int_rate'] = '1.2.3%'
+        file_path = tmp_path / 'invalid.csv'
+        df.to_csv(file_path, index=False)
+
+        # Act / Assert
+        with pytest.raises(ValueError, match='1.2.3%'):
+            build_star_schema_polars(file_path, column_types, usecols=ANALYSIS_COLUMNS)
+
+
+# สำหรับรันทดสอบแบบ standalone
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
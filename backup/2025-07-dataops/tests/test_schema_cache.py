@@ -0,0 +1,84 @@
+"""
+Test cases สำหรับ schema cache
+ไฟล์นี้ทดสอบ fingerprint และการอ่าน/เขียน cache ของ data types
+"""
+
+import pytest
+import sys
+from pathlib import Path
+
+# เพิ่ม path เพื่อ import module จาก pre-production
+sys.path.append(str(Path(__file__).parent.parent / 'pre-production'))
+
+from utils.schema_cache import (compute_schema_fingerprint, load_schema_cache,
+                                save_schema_cache, diff_column_types)
+
+
+class TestSchemaCache:
+    """Test cases สำหรับ schema cache"""
+
+    @pytest.fixture
+    def csv_file(self, tmp_path):
+        """สร้างไฟล์ CSV ตัวอย่างสำหรับทดสอบ"""
+        file_path = tmp_path / 'loans.csv'
+        file_path.write_text('loan_amnt,int_rate\n10000,10.25%\n20000,15.50%\n')
+        return file_path
+
+    def test_fingerprint_ignores_rows_after_sample(self, csv_file):
+        """ทดสอบว่าแถวที่ต่อท้ายหลังช่วงตัวอย่างไม่ทำให้ fingerprint เปลี่ยน"""
+        # Arrange
+        before = compute_schema_fingerprint(csv_file, sample_lines=2)
+
+        # Act
+        with open(csv_file, 'a') as f:
+            f.write('30000,9.99%\n')
+        after = compute_schema_fingerprint(csv_file, sample_lines=2)
+
+        # Assert
+        assert before == after
+
+    def test_fingerprint_changes_with_header(self, csv_file):
+        """ทดสอบว่า header ที่เปลี่ยนทำให้ fingerprint เปลี่ยน"""
+        # Arrange
+        before = compute_schema_fingerprint(csv_file)
+
+        # Act
+        csv_file.write_text('loan_amnt,int_rate,term\n10000,10.25%,36\n20000,15.50%,60\n')
+        after = compute_schema_fingerprint(csv_file)
+
+        # Assert
+        assert before != after
+
+    def test_save_and_load_round_trip(self, tmp_path):
+        """ทดสอบว่า cache ที่บันทึกแล้วอ่านกลับมาได้เหมือนเดิม"""
+        # Arrange
+        cache_path = tmp_path / 'schema_cache.json'
+        column_types = {'loan_amnt': 'float64', 'issue_d': 'string'}
+
+        # Act
+        saved = save_schema_cache(cache_path, 'abc123', column_types)
+        cached = load_schema_cache(cache_path)
+
+        # Assert
+        assert saved
+        assert cached == {'fingerprint': 'abc123', 'column_types': column_types}
+
+    def test_load_missing_cache_returns_none(self, tmp_path):
+        """ทดสอบว่าไม่มีไฟล์ cache จะคืนค่า None"""
+        assert load_schema_cache(tmp_path / 'missing.json') is None
+
+    def test_diff_reports_changed_columns(self):
+        """ทดสอบว่า diff รายงาน columns ที่เพิ่ม ลบ และเปลี่ยน type"""
+        # Act
+        changes = diff_column_types(
+            {'loan_amnt': 'float64', 'int_rate': 'string', 'term': 'string'},
+            {'loan_amnt': 'float64', 'int_rate': 'float64', 'grade': 'string'}
+        )
+
+        # Assert
+        assert changes == {'added': ['grade'], 'removed': ['term'], 'changed': ['int_rate']}
+
+
+# สำหรับรันทดสอบแบบ standalone
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
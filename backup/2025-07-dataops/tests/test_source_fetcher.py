@@ -0,0 +1,298 @@
+"""
+Test cases สำหรับการดาวน์โหลดไฟล์ต้นทาง
+ไฟล์นี้ทดสอบ fetch_source กับ HTTP server ในเครื่องที่รองรับ ETag และ Range
+"""
+
+import hashlib
+import threading
+import time
+import pytest
+import sys
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+# เพิ่ม path เพื่อ import module จาก pre-production
+sys.path.append(str(Path(__file__).parent.parent / 'pre-production'))
+
+from utils.source_fetcher import (fetch_source, load_fetch_state, save_fetch_state,
+                                  mark_source_loaded)
+
+
+class SourceHandler(BaseHTTPRequestHandler):
+    """HTTP handler ที่ส่ง body ของ server พร้อม ETag และรองรับ Range/If-Range"""
+
+    def do_GET(self):
+        server = self.server
+        server.requests.append(dict(self.headers))
+        with server.lock:
+            server.active += 1
+            server.max_active = max(server.max_active, server.active)
+        try:
+            self._respond(server)
+        finally:
+            with server.lock:
+                server.active -= 1
+
+    def _respond(self, server):
+        body = server.body
+        etag = '"' + hashlib.md5(body).hexdigest() + '"'
+
+        if server.status is not None:
+            self.send_response(server.status)
+            self.end_headers()
+            return
+
+        if self.headers.get('If-None-Match') == etag:
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.end_headers()
+            return
+
+        start, end = 0, len(body) - 1
+        range_header = self.headers.get('Range')
+        partial = (range_header is not None and server.accept_ranges
+                   and self.headers.get('If-Range') in (None, etag))
+        if partial:
+            first, last = range_header.split('=')[1].split('-')
+            start, end = int(first), min(int(last or end), end)
+            if start > end:
+                self.send_response(416)
+                self.send_header('Content-Range', f'bytes */{len(body)}')
+                self.end_headers()
+                return
+            self.send_response(206)
+            self.send_header('Content-Range', f'bytes {start}-{end}/{len(body)}')
+        else:
+            self.send_response(200)
+        self.send_header('ETag', etag)
+        self.send_header('Content-Length', str(end + 1 - start))
+        self.end_headers()
+
+        # จำลองความเร็วต่อการเชื่อมต่อที่จำกัด (bytes ต่อวินาที)
+        for offset in range(start, end + 1, 64 * 1024):
+            self.wfile.write(body[offset:min(offset + 64 * 1024, end + 1)])
+            if server.rate:
+                time.sleep(64 * 1024 / server.rate)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class TestFetchSource:
+    """Test cases สำหรับ fetch_source function"""
+
+    @pytest.fixture
+    def server(self):
+        """เปิด HTTP server ในเครื่องสำหรับทดสอบ"""
+        httpd = ThreadingHTTPServer(('127.0.0.1', 0), SourceHandler)
+        httpd.body = b'loan_amnt,term\n' + b'1000,36 months\n' * 5000
+        httpd.requests = []
+        httpd.accept_ranges = True
+        httpd.rate = None
+        httpd.status = None
+        httpd.lock = threading.Lock()
+        httpd.active = 0
+        httpd.max_active = 0
+        thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+        thread.start()
+        httpd.url = f'http://127.0.0.1:{httpd.server_address[1]}/LoanStats_web.csv'
+        yield httpd
+        httpd.shutdown()
+        httpd.server_close()
+
+    @pytest.fixture
+    def paths(self, tmp_path):
+        """ที่อยู่ของไฟล์ปลายทางและไฟล์สถานะ"""
+        return tmp_path / 'LoanStats_web.csv', tmp_path / 'fetch_state.json'
+
+    def test_first_download(self, server, paths):
+        """ทดสอบการดาวน์โหลดครั้งแรกและการตรวจ checksum"""
+        # Arrange
+        dest_path, state_path = paths
+        expected_sha256 = hashlib.sha256(server.body).hexdigest()
+
+        # Act
+        success, result = fetch_source(server.url, dest_path, state_path,
+                                       expected_sha256=expected_sha256)
+
+        # Assert
+        assert success
+        assert result['changed'] and not result['loaded']
+        assert dest_path.read_bytes() == server.body
+        assert load_fetch_state(state_path)['sha256'] == expected_sha256
+
+    def test_unchanged_source_short_circuits(self, server, paths):
+        """ทดสอบว่าไฟล์ต้นทางที่ไม่เปลี่ยนได้ 304 และไม่ดาวน์โหลดซ้ำ"""
+        # Arrange
+        dest_path, state_path = paths
+        fetch_source(server.url, dest_path, state_path)
+        mark_source_loaded(state_path)
+
+        # Act
+        success, result = fetch_source(server.url, dest_path, state_path)
+
+        # Assert
+        assert success
+        assert not result['changed'] and result['loaded']
+        assert result['bytes'] == 0
+        assert 'If-None-Match' in server.requests[-1]
+
+    def test_changed_source_downloads_again(self, server, paths):
+        """ทดสอบว่าไฟล์ต้นทางที่เปลี่ยนถูกดาวน์โหลดใหม่และต้องโหลดใหม่"""
+        # Arrange
+        dest_path, state_path = paths
+        fetch_source(server.url, dest_path, state_path)
+        mark_source_loaded(state_path)
+        server.body += b'2000,60 months\n'
+
+        # Act
+        success, result = fetch_source(server.url, dest_path, state_path)
+
+        # Assert
+        assert success
+        assert result['changed'] and not result['loaded']
+        assert dest_path.read_bytes() == server.body
+
+    def test_resume_interrupted_download(self, server, paths):
+        """ทดสอบการดาวน์โหลดต่อจากไฟล์ .part ด้วย Range"""
+        # Arrange
+        dest_path, state_path = paths
+        etag = '"' + hashlib.md5(server.body).hexdigest() + '"'
+        Path(f'{dest_path}.part').write_bytes(server.body[:1000])
+        save_fetch_state(state_path, {'url': server.url,
+                                      'partial': {'etag': etag, 'last_modified': None}})
+
+        # Act
+        success, result = fetch_source(server.url, dest_path, state_path,
+                                       expected_sha256=hashlib.sha256(server.body).hexdigest())
+
+        # Assert
+        assert success
+        assert result['resumed']
+        assert result['bytes'] == len(server.body) - 1000
+        assert server.requests[-1]['Range'] == 'bytes=1000-'
+        assert dest_path.read_bytes() == server.body
+
+    def test_unsatisfiable_range_restarts_download(self, server, paths):
+        """ทดสอบว่า 416 ของส่วนที่ค้างไว้ทำให้เริ่มดาวน์โหลดใหม่ทั้งไฟล์"""
+        # Arrange
+        dest_path, state_path = paths
+        etag = '"' + hashlib.md5(server.body).hexdigest() + '"'
+        Path(f'{dest_path}.part').write_bytes(server.body + b'extra')
+        save_fetch_state(state_path, {'url': server.url,
+                                      'partial': {'etag': etag, 'last_modified': None}})
+
+        # Act
+        success, result = fetch_source(server.url, dest_path, state_path)
+
+        # Assert
+        assert success
+        assert not result['resumed']
+        assert dest_path.read_bytes() == server.body
+        assert 'Range' not in server.requests[-1]
+
+    def test_unexpected_416_fails_without_retry(self, server, paths):
+        """ทดสอบว่า 416 ของ request ที่ไม่ได้ขอ Range คืน error โดยไม่ลองใหม่ไม่รู้จบ"""
+        # Arrange
+        dest_path, state_path = paths
+        server.status = 416
+
+        # Act
+        success, result = fetch_source(server.url, dest_path, state_path, connections=4)
+
+        # Assert
+        assert not success
+        assert '416' in result
+        assert len(server.requests) == 2
+
+    def test_checksum_mismatch(self, server, paths):
+        """ทดสอบว่า checksum ไม่ตรงจะไม่แทนที่ไฟล์ปลายทาง"""
+        # Arrange
+        dest_path, state_path = paths
+
+        # Act
+        success, message = fetch_source(server.url, dest_path, state_path,
+                                        expected_sha256='0' * 64)
+
+        # Assert
+        assert not success
+        assert 'checksum' in message
+        assert not dest_path.exists()
+        assert not Path(f'{dest_path}.part').exists()
+
+
+    def test_parallel_ranged_download(self, server, paths):
+        """ทดสอบการดาวน์โหลดหลายช่วงพร้อมกันได้ไฟล์ครบและ checksum ถูกต้อง"""
+        # Arrange
+        dest_path, state_path = paths
+        expected_sha256 = hashlib.sha256(server.body).hexdigest()
+
+        # Act
+        success, result = fetch_source(server.url, dest_path, state_path,
+                                       expected_sha256=expected_sha256,
+                                       block_size=8 * 1024, connections=4)
+
+        # Assert
+        assert success
+        assert result['connections'] == 5  # ช่วงแรก + 4 ช่วงที่เหลือ
+        assert result['bytes'] == len(server.body)
+        assert dest_path.read_bytes() == server.body
+
+    def test_without_range_support_uses_single_stream(self, server, paths):
+        """ทดสอบว่า server ที่ไม่รองรับ Range ใช้การดาวน์โหลดแบบ stream เดียว"""
+        # Arrange
+        dest_path, state_path = paths
+        server.accept_ranges = False
+
+        # Act
+        success, result = fetch_source(server.url, dest_path, state_path,
+                                       block_size=8 * 1024, connections=4)
+
+        # Assert
+        assert success
+        assert result['connections'] == 1
+        assert dest_path.read_bytes() == server.body
+
+    def test_on_block_receives_data_in_order(self, server, paths):
+        """ทดสอบว่า on_block ได้ข้อมูลตามลำดับ รวมส่วนที่ดาวน์โหลดไว้ก่อนหน้า"""
+        # Arrange
+        dest_path, state_path = paths
+        etag = '"' + hashlib.md5(server.body).hexdigest() + '"'
+        Path(f'{dest_path}.part').write_bytes(server.body[:1000])
+        save_fetch_state(state_path, {'url': server.url,
+                                      'partial': {'etag': etag, 'last_modified': None}})
+        blocks = []
+
+        # Act
+        success, result = fetch_source(server.url, dest_path, state_path, block_size=4096,
+                                       connections=4, on_block=blocks.append)
+
+        # Assert
+        assert success
+        assert result['connections'] == 1
+        assert b''.join(blocks) == server.body
+
+    def test_parallel_download_overlaps_ranges(self, server, paths):
+        """ทดสอบว่าการดาวน์โหลดหลายช่วงขอ Range ครบทุกช่วงและดาวน์โหลดพร้อมกัน"""
+        # Arrange
+        dest_path, state_path = paths
+        server.body = bytes(range(256)) * 4096  # 1 MB
+        server.rate = 2 * 1024 * 1024          # 2 MB/s ต่อการเชื่อมต่อ
+
+        # Act
+        success, result = fetch_source(server.url, dest_path, state_path,
+                                       block_size=64 * 1024, connections=4)
+
+        # Assert
+        assert success
+        # ช่วงแรก 64 KB แล้วแบ่งส่วนที่เหลือเป็น 4 ช่วงเท่าๆ กัน
+        assert sorted(request['Range'] for request in server.requests) == [
+            'bytes=0-65535', 'bytes=311296-557055', 'bytes=557056-802815',
+            'bytes=65536-311295', 'bytes=802816-1048575',
+        ]
+        assert server.max_active > 1
+        assert dest_path.read_bytes() == server.body
+
+# สำหรับรันทดสอบแบบ standalone
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,112 @@
+"""
+Test cases สำหรับ staging cache
+ไฟล์นี้ทดสอบการบันทึกและอ่านข้อมูลดิบเป็นไฟล์ Parquet ตาม checksum ของไฟล์ input
+"""
+
+import pytest
+import pandas as pd
+import sys
+from pathlib import Path
+
+# เพิ่ม path เพื่อ import module จาก pre-production
+sys.path.append(str(Path(__file__).parent.parent / 'pre-production'))
+
+from utils.ingest import read_typed_csv
+from utils.staging_cache import (compute_file_checksum, compute_staging_key,
+                                 load_staging_cache, save_staging_cache)
+
+
+class TestStagingCache:
+    """Test cases สำหรับ staging cache functions"""
+
+    @pytest.fixture
+    def csv_file(self, tmp_path):
+        """สร้างไฟล์ CSV ตัวอย่างสำหรับทดสอบ"""
+        df = pd.DataFrame({
+            'loan_amnt': [1000.0, 2500.5, None],
+            'issue_d': ['Dec-2018', 'Jan-2019', 'Dec-2018'],
+            'created_at': ['2018-01-01 10:00:00'] * 3,
+        })
+        file_path = tmp_path / 'loans.csv'
+        df.to_csv(file_path, index=False)
+        return file_path
+
+    def test_round_trip_preserves_frame(self, csv_file, tmp_path):
+        """ทดสอบว่าข้อมูลที่อ่านจาก staging เหมือนกับที่อ่านจาก CSV"""
+        # Arrange
+        pytest.importorskip('pyarrow')
+        _, df, column_types = read_typed_csv(csv_file)
+        staging_path = tmp_path / 'staging.parquet'
+        key = compute_staging_key(compute_file_checksum(csv_file))
+
+        # Act
+        saved = save_staging_cache(staging_path, key, df, column_types)
+        staged = load_staging_cache(staging_path, key)
+
+        # Assert
+        assert saved
+        staged_df, staged_types = staged
+        assert staged_types == column_types
+        pd.testing.assert_frame_equal(staged_df, df)
+
+    def test_changed_input_invalidates_staging(self, csv_file, tmp_path):
+        """ทดสอบว่าไฟล์ input ที่เปลี่ยนไปทำให้ key ไม่ตรงกับ staging เดิม"""
+        # Arrange
+        pytest.importorskip('pyarrow')
+        _, df, column_types = read_typed_csv(csv_file)
+        staging_path = tmp_path / 'staging.parquet'
+        save_staging_cache(staging_path, compute_staging_key(compute_file_checksum(csv_file)),
+                           df, column_types)
+
+        # Act
+        with open(csv_file, 'a') as f:
+            f.write('3000.0,Feb-2019,2018-01-02 10:00:00\n')
+        staged = load_staging_cache(staging_path,
+                                    compute_staging_key(compute_file_checksum(csv_file)))
+
+        # Assert
+        assert staged is None
+
+    def test_key_depends_on_projection(self):
+        """ทดสอบว่า key แยกตาม columns ที่เลือกอ่าน"""
+        # Act
+        full_key = compute_staging_key('abc')
+        projected_key = compute_staging_key('abc', usecols=['loan_amnt'])
+
+        # Assert
+        assert full_key != projected_key
+        assert projected_key == compute_staging_key('abc', usecols=['loan_amnt'])
+
+    def test_key_depends_on_null_limit(self):
+        """ทดสอบว่า key แยกตามเกณฑ์ null ที่ใช้ลบ columns ระหว่างอ่าน"""
+        # Act
+        full_key = compute_staging_key('abc')
+        pruned_key = compute_staging_key('abc', max_null_percentage=30)
+
+        # Assert
+        assert full_key != pruned_key
+        assert pruned_key != compute_staging_key('abc', max_null_percentage=50)
+
+    def test_key_depends_on_inference(self):
+        """ทดสอบว่า key แยกตามการตั้งค่าการคาดเดา types"""
+        # Act
+        default_key = compute_staging_key('abc')
+        sampled_key = compute_staging_key('abc', inference={'sample_mode': 'head', 'confidence': 0.95})
+
+        # Assert
+        assert sampled_key != default_key
+        assert sampled_key != compute_staging_key('abc', inference={'sample_mode': 'head',
+                                                                     'confidence': 0.9})
+
+    def test_missing_staging_returns_none(self, tmp_path):
+        """ทดสอบว่าไม่มี staging file คืนค่า None"""
+        # Act
+        staged = load_staging_cache(tmp_path / 'missing.parquet', 'key')
+
+        # Assert
+        assert staged is None
+
+
+# สำหรับรันทดสอบแบบ standalone
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
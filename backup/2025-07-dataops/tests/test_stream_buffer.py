@@ -0,0 +1,136 @@
+"""
+Test cases สำหรับ buffer ระหว่างการดาวน์โหลดกับ parser
+ไฟล์นี้ทดสอบ BlockStream ที่ producer และ consumer อยู่คนละ thread
+"""
+
+import io
+import threading
+import pytest
+import pandas as pd
+import sys
+from pathlib import Path
+
+# เพิ่ม path เพื่อ import module จาก pre-production
+sys.path.append(str(Path(__file__).parent.parent / 'pre-production'))
+
+from utils.stream_buffer import BlockStream, consume_while_producing
+from utils.ingest import read_typed_csv
+
+
+def produce(stream, data, block_size=100, error=None):
+    """ส่งข้อมูลทีละ block จาก thread แยก"""
+    def run():
+        try:
+            for offset in range(0, len(data), block_size):
+                stream.put(data[offset:offset + block_size])
+        except OSError:
+            pass
+        stream.finish(error)
+
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    return thread
+
+
+class TestBlockStream:
+    """Test cases สำหรับ BlockStream class"""
+
+    @pytest.fixture
+    def csv_bytes(self):
+        """ข้อมูล CSV ตัวอย่าง"""
+        df = pd.DataFrame({'loan_amnt': range(500), 'term': ['36 months', '60 months'] * 250})
+        return df.to_csv(index=False).encode('utf-8')
+
+    def test_parser_reads_while_producing(self, csv_bytes):
+        """ทดสอบว่า pd.read_csv อ่านทีละ chunk จาก stream ได้ข้อมูลครบ"""
+        # Arrange
+        stream = BlockStream(max_blocks=2)
+        thread = produce(stream, csv_bytes)
+
+        # Act
+        assert stream.wait_for_data()
+        with pd.read_csv(io.BufferedReader(stream), chunksize=100) as reader:
+            df = pd.concat(reader, ignore_index=True)
+        thread.join(timeout=5)
+
+        # Assert
+        pd.testing.assert_frame_equal(df, pd.read_csv(io.BytesIO(csv_bytes)))
+
+    def test_producer_error_reaches_parser(self, csv_bytes):
+        """ทดสอบว่า error ของการดาวน์โหลดทำให้ parser ได้ OSError"""
+        # Arrange
+        stream = BlockStream()
+        produce(stream, csv_bytes[:1000], error='connection reset')
+
+        # Act / Assert
+        with pytest.raises(OSError, match='connection reset'):
+            stream.read()
+
+    def test_no_data(self):
+        """ทดสอบว่า producer ที่จบโดยไม่มีข้อมูล (เช่น 304) ทำให้ wait_for_data เป็น False"""
+        # Arrange
+        stream = BlockStream()
+        produce(stream, b'')
+
+        # Act / Assert
+        assert not stream.wait_for_data()
+
+    def test_closed_reader_stops_producer(self, csv_bytes):
+        """ทดสอบว่า producer ไม่ค้างเมื่อ parser ปิด stream ก่อนอ่านจบ"""
+        # Arrange
+        stream = BlockStream(max_blocks=1)
+        thread = produce(stream, csv_bytes, block_size=10)
+
+        # Act
+        stream.read(10)
+        stream.close()
+        thread.join(timeout=5)
+
+        # Assert
+        assert not thread.is_alive()
+
+
+
+class TestConsumeWhileProducing:
+    """Test cases สำหรับ consume_while_producing function"""
+
+    def producer(self, data, block_size=100):
+        """producer ที่ส่งข้อมูลทีละ block และคืนจำนวน bytes ที่ส่ง"""
+        def run(put):
+            for offset in range(0, len(data), block_size):
+                put(data[offset:offset + block_size])
+            return (True, len(data))
+        return run
+
+    def test_consumer_reads_all_data(self):
+        """ทดสอบว่า consumer อ่านข้อมูลครบและได้ผลลัพธ์ของทั้งสองฝั่ง"""
+        # Arrange
+        data = pd.DataFrame({'loan_amnt': range(500)}).to_csv(index=False).encode('utf-8')
+
+        # Act
+        produced, consumed, error = consume_while_producing(
+            self.producer(data), lambda reader: read_typed_csv(reader), max_blocks=2)
+
+        # Assert
+        assert produced == (True, len(data))
+        assert error is None
+        assert consumed[1]['loan_amnt'].tolist() == list(range(500))
+
+    def test_malformed_stream_lets_producer_finish(self):
+        """ทดสอบว่า parse ไม่สำเร็จ (read_typed_csv คืน False) แล้ว producer ยังทำงานจนจบ"""
+        # Arrange
+        data = b'loan_amnt,term\n1000,36 months\n' + b'2000,60 months,extra,fields\n' * 200000
+
+        # Act
+        produced, consumed, error = consume_while_producing(
+            self.producer(data), lambda reader: read_typed_csv(reader), max_blocks=2)
+
+        # Assert
+        assert produced == (True, len(data))
+        assert consumed is None
+        assert isinstance(error, ValueError)
+
+
+# สำหรับรันทดสอบแบบ standalone
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,121 @@
+"""
+Test cases สำหรับ pipeline แบบ streaming
+ไฟล์นี้ทดสอบว่า star schema ที่สร้างทีละ chunk เหมือนกับการประมวลผลในหน่วยความจำ
+"""
+
+import pytest
+import pandas as pd
+import sys
+from pathlib import Path
+
+# เพิ่ม path เพื่อ import module จาก pre-production
+sys.path.append(str(Path(__file__).parent.parent / 'pre-production'))
+sys.path.append(str(Path(__file__).parent))
+
+from etl.data_cleaning import remove_high_null_columns, clean_loan_data, select_columns_for_analysis
+from etl.dimensions import create_all_dimensions, create_dimension_mappings
+from etl.fact_table import create_fact_table
+from etl.streaming import compute_null_percentages, build_star_schema_streaming
+from fixtures.sample_data import get_sample_loan_data
+
+
+def split_into_chunks(df, chunksize):
+    """แบ่ง DataFrame เป็น chunks เหมือนการอ่านด้วย chunksize"""
+    return [df.iloc[start:start + chunksize] for start in range(0, len(df), chunksize)]
+
+
+class TestStreamingPipeline:
+    """Test cases สำหรับ build_star_schema_streaming"""
+
+    @pytest.fixture
+    def raw_data(self):
+        """ข้อมูล loan ตัวอย่างที่มีค่าซ้ำกระจายอยู่หลาย chunks"""
+        return pd.concat([get_sample_loan_data()] * 3, ignore_index=True)
+
+    @pytest.fixture
+    def in_memory_result(self, raw_data):
+        """ผลลัพธ์จากการประมวลผลทั้งหมดในหน่วยความจำ"""
+        df_cleaned = remove_high_null_columns(select_columns_for_analysis(raw_data), 50)
+        df_prepared = clean_loan_data(df_cleaned)
+        dimensions = create_all_dimensions(df_prepared)
+        fact_table = create_fact_table(df_prepared, create_dimension_mappings(dimensions))
+        return dimensions, fact_table
+
+    @pytest.mark.parametrize('chunksize', [1, 4, 100])
+    def test_streaming_matches_in_memory(self, raw_data, in_memory_result, chunksize):
+        """ทดสอบว่า dimensions และ fact table เหมือนกับแบบในหน่วยความจำ"""
+        # Arrange
+        expected_dimensions, expected_fact = in_memory_result
+        chunks = split_into_chunks(raw_data, chunksize)
+        missing_percentage = compute_null_percentages(select_columns_for_analysis(c) for c in chunks)
+        columns_to_keep = missing_percentage[missing_percentage <= 50].index.tolist()
+
+        # Act
+        dimensions, fact_table, stats = build_star_schema_streaming(chunks, columns_to_keep)
+
+        # Assert
+        assert list(dimensions) == list(expected_dimensions)
+        for dim_name, dim_df in dimensions.items():
+            pd.testing.assert_frame_equal(dim_df, expected_dimensions[dim_name])
+        pd.testing.assert_frame_equal(fact_table, expected_fact)
+        assert stats['fact_rows'] == len(expected_fact)
+
+    def test_category_columns_match_in_memory(self, raw_data, in_memory_result):
+        """ทดสอบว่า dimension columns แบบ category ได้ star schema เหมือนแบบข้อความ"""
+        # Arrange
+        expected_dimensions, expected_fact = in_memory_result
+        categories = {column: 'category' for column in
+                      ['home_ownership', 'loan_status', 'application_type', 'emp_length']}
+        chunks = split_into_chunks(raw_data.astype(categories), 4)
+        columns_to_keep = list(
+            remove_high_null_columns(select_columns_for_analysis(raw_data), 50).columns)
+
+        # Act
+        dimensions, fact_table, _ = build_star_schema_streaming(chunks, columns_to_keep)
+
+        # Assert
+        for dim_name, dim_df in dimensions.items():
+            pd.testing.assert_frame_equal(dim_df, expected_dimensions[dim_name])
+        pd.testing.assert_frame_equal(fact_table, expected_fact)
+
+    def test_fact_chunks_are_passed_to_loader(self, raw_data):
+        """ทดสอบว่า fact chunks ถูกส่งให้ loader ตามลำดับโดยไม่เก็บไว้เอง"""
+        # Arrange
+        loaded = []
+        chunks = split_into_chunks(raw_data, 6)
+        columns_to_keep = list(select_columns_for_analysis(raw_data).columns)
+
+        # Act
+        _, fact_table, stats = build_star_schema_streaming(
+            chunks, columns_to_keep,
+            on_fact_chunk=lambda fact_chunk, chunk_number: loaded.append(chunk_number)
+        )
+
+        # Assert
+        assert fact_table is None
+        assert loaded == list(range(len(chunks)))
+        assert stats['chunks'] == len(chunks)
+
+    def test_stops_after_failed_chunk(self, raw_data):
+        """ทดสอบว่าหยุดหลัง loader โหลด chunk ไม่สำเร็จ ไม่ต่อท้ายตารางที่โหลดไม่ครบ"""
+        # Arrange
+        loaded = []
+        chunks = split_into_chunks(raw_data, 6)
+        columns_to_keep = list(select_columns_for_analysis(raw_data).columns)
+
+        def fail_first_chunk(fact_chunk, chunk_number):
+            loaded.append(chunk_number)
+            return chunk_number != 0
+
+        # Act
+        _, _, stats = build_star_schema_streaming(chunks, columns_to_keep, on_fact_chunk=fail_first_chunk)
+
+        # Assert
+        assert loaded == [0]
+        assert stats['failed_chunks'] == 1
+        assert stats['chunks'] == 1
+
+
+# สำหรับรันทดสอบแบบ standalone
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])